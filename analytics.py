@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+釣果履歴の集計（NumPy）
+釣果を列ごとの配列（CatchFrame）に変換し、釣り場 × 魚種 × 潮 × 時間帯 のグループ集計を
+ベクトル演算で行う。AI予測のおすすめカードは forecast.py がこの集計から作る
+"""
+
+import copy
+import json
+import re
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+import dedup
+from catch_record import parse_count, parse_date, parse_size
+from ephemeris import TIDES, tide_codes
+from species import species_id
+from spots import CATALOG
+
+# 終日 = 時刻が分からない釣果
+TIMES = ('朝まずめ', '日中', '夕まずめ', '夜', '終日')
+UNKNOWN_TIME = TIMES.index('終日')
+
+RE_CLOCK = re.compile(r'(\d{1,2}):(\d{2})')
+
+
+def time_codes(hours):
+    """時（-1 は不明）の配列から時間帯（TIMES の添字）を返す"""
+    conditions = [
+        hours < 0,
+        (4 <= hours) & (hours < 8),
+        (8 <= hours) & (hours < 16),
+        (16 <= hours) & (hours < 19),
+    ]
+    return np.select(conditions, [UNKNOWN_TIME, 0, 1, 2], default=3).astype(np.int8)
+
+
+def _encode(values):
+    """文字列列を (値の配列, コード配列) に（出現順）"""
+    index = {}
+    codes = np.fromiter((index.setdefault(v or '', len(index)) for v in values), dtype=np.int64)
+    return np.array(list(index), dtype=object), codes
+
+
+def _midpoint(lo, hi):
+    if lo is None and hi is None:
+        return np.nan
+    if lo is None or hi is None:
+        return lo if hi is None else hi
+    return (lo + hi) / 2
+
+
+class CatchFrame:
+    """釣果の列指向テーブル（各列は同じ長さの NumPy 配列、文字列は辞書＋コードで持つ）"""
+
+    def __init__(self, spot, species, day, hour, size, count, unit, method):
+        self.spots, self.spot = _encode(spot)
+        self.species, self.sp = _encode(species)
+        self.units, self.unit = _encode(unit)
+        self.methods, self.method = _encode(method)
+        self.day = np.asarray(day, dtype=np.int64)
+        self.size = np.asarray(size, dtype=np.float64)
+        self.count = np.asarray(count, dtype=np.float64)
+        self.tide = tide_codes(self.day)
+        self.tod = time_codes(np.asarray(hour, dtype=np.int64))
+
+    def __len__(self):
+        return len(self.day)
+
+    def codes(self, name):
+        """キー列のコード配列と取りうる値の数"""
+        return {
+            'spot': (self.spot, len(self.spots)),
+            'species': (self.sp, len(self.species)),
+            'tide': (self.tide, len(TIDES)),
+            'tod': (self.tod, len(TIMES)),
+        }[name]
+
+    def with_spots(self, names):
+        """釣り場を names（今の釣り場コード → 新しい釣り場名、'' の釣り場の行は除く）で付け直した CatchFrame
+        同じ名前になった釣り場は1つのコードにまとめる"""
+        new = copy.copy(self)
+        mapped = np.array(list(names) + [''], dtype=object)[self.spot] if len(self) else np.array([], dtype=object)
+        keep = mapped != ''
+        new.spots, new.spot = _encode(mapped[keep])
+        for name in ('sp', 'unit', 'method', 'day', 'size', 'count', 'tide', 'tod'):
+            setattr(new, name, getattr(self, name)[keep])
+        return new
+
+    @classmethod
+    def from_rows(cls, rows):
+        """(釣り場, 魚種ID, date, 時, サイズ, 匹数, 単位, 釣り方) のタプル列から作る"""
+        cols = list(zip(*rows)) or [()] * 8
+        spot, species, day, hour, size, count, unit, method = cols
+        return cls(spot, species, np.fromiter((d.toordinal() for d in day), dtype=np.int64, count=len(day)), hour,
+                   np.array(size, dtype=np.float64), np.array(count, dtype=np.float64), unit, method)
+
+
+def store_rows(store, days=365, today=None):
+    """CatchStore の直近 days 日分を CatchFrame.from_rows の行に（日付のない釣果・カタログの釣り場にならない釣果は除く）
+    spot 列がカタログの釣り場名でない行（以前の形式のエリア名・ソース名）は、本文・場所から釣り場を解決し直す"""
+    since = ((today or datetime.now()) - timedelta(days=days)).date()
+    rows = store.history(since, ('spot', 'species', 'fish', 'date', 'size_min', 'size_max',
+                                 'size_unit', 'count_min', 'count_max', 'method', 'extra'))
+    names = {s.name for s in CATALOG}
+    resolved = {}
+    for spot, sid, fish, d, smin, smax, unit, cmin, cmax, method, extra in rows:
+        if spot not in names:
+            if (spot, extra) not in resolved:
+                resolved[spot, extra] = dedup.catch_spot(json.loads(extra or '{}'), spot)
+            spot = resolved[spot, extra]
+            if not spot:
+                continue
+        yield (spot, sid or fish, date.fromisoformat(d), -1, _midpoint(smin, smax),
+               _midpoint(cmin, cmax), unit, method)
+
+
+def site_rows(data, today=None):
+    """generate_site の {釣り場: [{f, s, ct, t, m, ...}]} を CatchFrame.from_rows の行に"""
+    today = today or datetime.now()
+    for spot, catches in data.items():
+        for c in catches:
+            day = parse_date(c.get('t', ''), today)
+            if not day:
+                continue
+            clock = RE_CLOCK.search(c.get('t', ''))
+            smin, smax, unit = parse_size(c.get('s', ''))
+            cmin, cmax = parse_count(c.get('ct', ''))
+            yield (spot, species_id(c['f']) or c['f'], day, int(clock.group(1)) if clock else -1,
+                   _midpoint(smin, smax), _midpoint(cmin, cmax), unit, c.get('m', ''))
+
+
+def _group_quantiles(group, values, n_groups, qs):
+    """グループごとの分位点（NaN は除く）。1回の並べ替えで qs の全分位点を求める"""
+    valid = ~np.isnan(values)
+    g, v = group[valid], values[valid]
+    order = np.lexsort((v, g))
+    v = v[order]
+    sizes = np.bincount(g, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    has = sizes > 0
+    result = []
+    for q in qs:
+        pos = starts + q * np.maximum(sizes - 1, 0)
+        lo, hi = np.floor(pos).astype(np.int64), np.ceil(pos).astype(np.int64)
+        frac = pos - lo
+        out = np.full(n_groups, np.nan)
+        out[has] = v[lo[has]] * (1 - frac[has]) + v[hi[has]] * frac[has]
+        result.append(out)
+    return result
+
+
+def _group_mode(group, codes, n_groups, n_codes, weights=None):
+    """グループごとの最頻値コード"""
+    if not n_codes:
+        return np.zeros(n_groups, dtype=np.int64)
+    table = np.bincount(group * n_codes + codes, weights=weights, minlength=n_groups * n_codes)
+    return table.reshape(n_groups, n_codes).argmax(axis=1)
+
+
+def group_stats(frame, keys=('spot', 'species', 'tide', 'tod'), today=None, windows=(7, 30)):
+    """keys ごとの集計
+
+    返り値は列の dict（1行 = 1グループ、釣果のないグループは含まない）
+      <key>          : キーのコード
+      reports        : 直近 max(windows) 日の釣果件数
+      rate<N>        : 直近 N 日の 1日あたり匹数
+      trend          : rate<短期> / rate<長期>（1 より大きければ上向き）
+      size_median/size_lo/size_hi : サイズの中央値・25%点・75%点
+      count_lo/count_hi           : 1件あたり匹数の 25%点・75%点
+      unit / method  : 最頻のサイズ単位・釣り方のコード
+    """
+    age = (today or datetime.now()).toordinal() - frame.day
+    span = max(windows)
+    in_span = (age >= 0) & (age < span)
+
+    # 複数キーを1つの整数コードにまとめる
+    code = np.zeros(len(frame), dtype=np.int64)
+    radix = []
+    for k in keys:
+        c, n = frame.codes(k)
+        code = code * n + c
+        radix.append(n)
+    groups, group = np.unique(code[in_span], return_inverse=True)
+    n_groups = len(groups)
+    count = np.nan_to_num(frame.count[in_span], nan=1.0)
+    sub_age = age[in_span]
+
+    out = {}
+    rest = groups
+    for k, n in zip(reversed(keys), reversed(radix)):
+        out[k] = rest % n
+        rest = rest // n
+    out['reports'] = np.bincount(group, minlength=n_groups)
+    for w in windows:
+        out[f'rate{w}'] = np.bincount(group, weights=count * (sub_age < w), minlength=n_groups) / w
+    short, long_ = f'rate{min(windows)}', f'rate{span}'
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out['trend'] = np.where(out[long_] > 0, out[short] / out[long_], np.nan)
+    out['size_median'], out['size_lo'], out['size_hi'] = _group_quantiles(
+        group, frame.size[in_span], n_groups, (0.5, 0.25, 0.75))
+    out['count_lo'], out['count_hi'] = _group_quantiles(group, frame.count[in_span], n_groups, (0.25, 0.75))
+    out['unit'] = _group_mode(group, frame.unit[in_span], n_groups, len(frame.units),
+                              weights=(~np.isnan(frame.size[in_span])).astype(np.float64))
+    out['method'] = _group_mode(group, frame.method[in_span], n_groups, len(frame.methods), weights=count)
+    return out
+
+
+def _scatter(stats, keys, shape, column, fill=0.0):
+    """集計結果を keys の多次元配列に広げる（存在しないグループは fill）"""
+    table = np.full(shape, fill, dtype=np.float64)
+    table[tuple(stats[k] for k in keys)] = stats[column]
+    return table
+
+
+def _range_text(lo, hi, suffix):
+    if np.isnan(lo):
+        return '-'
+    lo, hi = int(round(lo)), int(round(hi))
+    return f"{lo}{suffix}" if lo == hi else f"{lo}-{hi}{suffix}"
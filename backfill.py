@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+須磨・平磯の過去の釣果の取り込み（バックフィル）
+日々の収集は一覧の先頭（須磨7日分・平磯5件）しか見ないため、過去の日別ページを一覧の /page/N/ から順にたどって取り込む
+  一覧ページを1ページずつ返す generator → 詳細ページを並行に取得・解析（同一ホストの間隔は host_scheduler が制御）
+  → 一覧1ページ分ずつ履歴DBへ書き込み → 進捗を .cache/backfill-<ソース>.json に保存
+解析は既定で同じプロセス、--processes を付けると bulk_parse のプロセスプールで行う
+中断しても次回は続きのページから再開する（途中のページはやり直すが、履歴DBの登録は重複しない）
+取得したHTMLはキャッシュに残さず、メモリに持つのも一覧1ページ分だけ
+
+使い方:
+  python backfill.py                            # 須磨・平磯を最後のページまで
+  python backfill.py --source suma --max-pages 50
+  python backfill.py --until 2023-01-01         # この日より古いページに達したら終了
+  python backfill.py --reset                    # 進捗を消して最初から
+  python backfill.py --processes 4              # 解析を4プロセスで（取得間隔を詰めたホストや遅いマシン向け）
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+
+import parsers
+from bulk_parse import BulkParser
+from catch_store import DB_PATH, CatchStore
+from collect_fishing_data import HEADERS, report_error
+from fetcher import CACHE_DIR, fetch
+from source_health import check_response
+
+# 一覧の先頭ページ・詳細ページのパーサー名（parsers.PARSERS のキー、name・source は collect_fishing_data の収集結果と揃える）
+ARCHIVES = {
+    'suma': {
+        'name': '須磨海づり公園',
+        'spot': '須磨海釣り公園',
+        'source': 'sumasakana-park.com',
+        'url': 'https://sumasakana-park.com/fishing/',
+        'links': parsers.parse_suma_index,
+        'parser': 'suma_detail',
+    },
+    'hiraiso': {
+        'name': '平磯海づり公園',
+        'spot': '平磯海づり公園',
+        'source': 'kobeumiduri.jp',
+        'url': 'https://kobeumiduri.jp/fishresult/',
+        'links': lambda html: parsers.parse_hiraiso_index(html)[1],
+        'parser': 'hiraiso_detail',
+    },
+}
+# 1ソースあたりの詳細ページの同時取得数（間隔の制限内で応答待ちを重ねる）
+WORKERS = 4
+
+
+def page_url(base, page):
+    """一覧の page ページ目のURL（WordPress の /page/N/）"""
+    return base if page <= 1 else f"{base}page/{page}/"
+
+
+class Checkpoint:
+    """ソースごとの進捗（次に読む一覧ページ・取得に失敗した詳細ページ・件数）"""
+
+    def __init__(self, name, directory=CACHE_DIR):
+        self.path = os.path.join(directory, f'backfill-{name}.json')
+        self.state = {'next_page': 1, 'done': False, 'failed': [], 'last_urls': [],
+                      'pages': 0, 'details': 0, 'added': 0, 'oldest': None, 'updated': None}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.state.update(json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+
+    def advance(self, page, urls, fetched, added, oldest):
+        """一覧 page ページ目の書き込みが済んだ"""
+        s = self.state
+        s['next_page'] = page + 1
+        s['last_urls'] = urls
+        s['pages'] += 1
+        s['details'] += fetched
+        s['added'] += added
+        if oldest and (not s['oldest'] or oldest.isoformat() < s['oldest']):
+            s['oldest'] = oldest.isoformat()
+
+    def save(self):
+        self.state['updated'] = datetime.now().isoformat(timespec='seconds')
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, self.path)
+
+    def reset(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def listing_pages(archive, start=1):
+    """一覧ページを start ページ目から順に取得し、(ページ番号, 詳細ページのURL) を返す（404・リンクなしで終了）"""
+    page = start
+    while True:
+        resp = fetch(page_url(archive['url'], page), headers=HEADERS, encoding='utf-8', store=False)
+        if resp.status_code == 404:
+            return
+        urls = archive['links'](check_response(resp).text)
+        if not urls:
+            return
+        yield page, urls
+        page += 1
+
+
+def fetch_detail(url):
+    return check_response(fetch(url, headers=HEADERS, encoding='utf-8', store=False)).text
+
+
+def fetch_details(key, archive, urls, pool, bulk):
+    """詳細ページを pool で並行に取得して bulk で解析し、(釣果リスト, 失敗したURL) を返す"""
+    futures = [(url, pool.submit(fetch_detail, url)) for url in urls]
+    pages, failed = [], []
+    for url, future in futures:
+        try:
+            pages.append((url, future.result()))
+        except Exception as e:
+            print(f"  ⚠️ {key} 詳細ページエラー: {url} - {e}")
+            report_error(key, url, e)
+            failed.append(url)
+    catches = []
+    for (url, _), (records, error) in zip(pages, bulk.map((archive['parser'], html, url) for url, html in pages)):
+        if error:
+            print(f"  ⚠️ {key} 詳細ページの解析エラー: {url} - {error}")
+            report_error(key, url, error)
+        catches.extend(records)
+    return catches, failed
+
+
+def write(store, archive, catches):
+    """釣果を履歴DBへ書き込み、新規件数を返す"""
+    if not catches:
+        return 0
+    # キーは日々の収集と同じ名前（name）で作り、釣り場はカタログの釣り場名（spot）で書く
+    return store.add_spots([{'name': archive['name'], 'spot': archive['spot'], 'source': archive['source'],
+                             'catches': catches}])
+
+
+def backfill(key, store, max_pages=None, until=None, workers=WORKERS, checkpoint=None, bulk=None):
+    """key のソースの一覧をチェックポイントの続きからたどって取り込み、進捗を返す（bulk 省略時は同じプロセスで解析）"""
+    archive = ARCHIVES[key]
+    bulk = bulk or BulkParser(processes=1)
+    cp = checkpoint or Checkpoint(key)
+    state = cp.state
+    if state['done'] and not state['failed']:
+        print(f"  ✅ {key}: 取り込み済み（{state['pages']}ページ・{state['added']}件、--reset で最初から）")
+        return state
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # 前回失敗した詳細ページを先に取り直す
+        if state['failed']:
+            catches, state['failed'] = fetch_details(key, archive, state['failed'], pool, bulk)
+            state['added'] += write(store, archive, catches)
+            cp.save()
+        pages = 0
+        try:
+            for page, urls in ([] if state['done'] else listing_pages(archive, state['next_page'])):
+                # 前回の実行後に新しい記事が増えると一覧がずれるので、前回の最後のページと重なった分は飛ばす
+                new = [u for u in urls if u not in state['last_urls']]
+                catches, failed = fetch_details(key, archive, new, pool, bulk)
+                added = write(store, archive, catches)
+                dates = [c.date for c in catches if c.date]
+                state['failed'] = state['failed'] + failed
+                cp.advance(page, urls, len(new) - len(failed), added, min(dates) if dates else None)
+                cp.save()
+                pages += 1
+                print(f"  📄 {key} {page}ページ目: 詳細 {len(new)}件 新規 {added}件"
+                      f"{f'（{min(dates)}〜{max(dates)}）' if dates else ''}")
+                if until and dates and max(dates) < until:
+                    state['done'] = True
+                    break
+                if max_pages and pages >= max_pages:
+                    break
+            else:
+                state['done'] = True
+        except Exception as e:
+            print(f"  ❌ {key} 一覧ページエラー（次回は{state['next_page']}ページ目から）: {e}")
+            report_error(key, page_url(archive['url'], state['next_page']), e)
+    cp.save()
+    print(f"  ✅ {key}: {pages}ページ {time.perf_counter() - started:.0f}秒"
+          f"（累計 {state['pages']}ページ・{state['added']}件、{state['oldest'] or '-'} まで"
+          f"{'・完了' if state['done'] else ''}）")
+    return state
+
+
+def main():
+    ap = argparse.ArgumentParser(description="須磨・平磯の過去の釣果の取り込み")
+    ap.add_argument('--source', choices=sorted(ARCHIVES), action='append', help='取り込むソース（既定: すべて）')
+    ap.add_argument('--max-pages', type=int, help='今回たどる一覧ページ数の上限')
+    ap.add_argument('--until', type=date.fromisoformat, help='この日より古いページに達したら終了 (例: 2023-01-01)')
+    ap.add_argument('--workers', type=int, default=WORKERS, help=f'詳細ページの同時取得数（既定: {WORKERS}）')
+    ap.add_argument('--processes', type=int, default=1, help='解析のプロセス数（既定: 1 = 取得と同じプロセス）')
+    ap.add_argument('--db', default=DB_PATH, help=f'履歴DB（既定: {DB_PATH}）')
+    ap.add_argument('--reset', action='store_true', help='進捗を消して最初のページから')
+    args = ap.parse_args()
+
+    keys = args.source or sorted(ARCHIVES)
+    if args.reset:
+        for key in keys:
+            Checkpoint(key).reset()
+    print(f"📚 バックフィル: {', '.join(keys)}")
+    with CatchStore(args.db) as store, BulkParser(args.processes) as bulk:
+        # ソースごとにホストが別なので並行にたどる
+        with ThreadPoolExecutor(max_workers=len(keys)) as pool:
+            states = list(pool.map(lambda k: backfill(k, store, args.max_pages, args.until, args.workers, bulk=bulk),
+                                   keys))
+        moved = store.resolve_spots()
+        if moved:
+            print(f"🗄️ 釣り場名を解決し直した行: {moved}件")
+        oldest = min((s['oldest'] for s in states if s['oldest']), default=None)
+        if oldest:
+            dups = store.mark_duplicates(since=date.fromisoformat(oldest))
+            print(f"🔁 他ソースとの重複: {dups}件")
+        print(f"🗄️ 履歴DB: 計{store.count()}件")
+
+
+if __name__ == "__main__":
+    main()
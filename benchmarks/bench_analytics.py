@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+釣果集計のベンチマーク
+1年分の合成データで CatchFrame の構築・グループ集計・7日予報（特徴量の作成と採点）の時間を測る
+
+使い方:
+  python benchmarks/bench_analytics.py              # 1日 500件 × 365日
+  python benchmarks/bench_analytics.py --per-day 2000
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import analytics  # noqa: E402
+import forecast  # noqa: E402
+from species import SPECIES  # noqa: E402
+from spots import CATALOG  # noqa: E402
+
+SPOTS = [f"釣り場{i:02d}" for i in range(40)]
+METHODS = ['サビキ', 'フカセ釣り', 'ワインド', '穴釣り', '投げ釣り', 'エギング']
+
+
+def synthetic_rows(per_day, days, today, seed=0):
+    """1年分の合成釣果行"""
+    rng = np.random.default_rng(seed)
+    n = per_day * days
+    species = list(SPECIES)
+    start = (today - timedelta(days=days - 1)).date()
+    day = rng.integers(0, days, n)
+    hour = rng.integers(-1, 24, n)
+    size = rng.normal(25, 8, n).clip(5)
+    count = rng.integers(1, 40, n)
+    spot = rng.integers(0, len(SPOTS), n)
+    sp = rng.integers(0, len(species), n)
+    method = rng.integers(0, len(METHODS), n)
+    for i in range(n):
+        yield (SPOTS[spot[i]], species[sp[i]], start + timedelta(days=int(day[i])), int(hour[i]),
+               float(size[i]), float(count[i]), 'cm', METHODS[method[i]])
+
+
+def timed(label, func, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    print(f"{label:<28} {best * 1000:9.1f} ms")
+    return result
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--per-day', type=int, default=500, help='1日あたりの釣果件数')
+    ap.add_argument('--days', type=int, default=365)
+    ap.add_argument('--repeat', type=int, default=3)
+    args = ap.parse_args()
+
+    today = datetime(2026, 10, 1)
+    rows = list(synthetic_rows(args.per_day, args.days, today))
+    print(f"{len(rows):,}件 / {args.days}日")
+    frame = timed('CatchFrame.from_rows', lambda: analytics.CatchFrame.from_rows(rows), args.repeat)
+    timed('group_stats (4キー, 30日)', lambda: analytics.group_stats(frame, today=today), args.repeat)
+    timed('group_stats (4キー, 365日)',
+          lambda: analytics.group_stats(frame, today=today, windows=(7, 30, 365)), args.repeat)
+    rng = np.random.default_rng(1)
+    species = list(SPECIES)
+    temps = [(species[s], today.toordinal() - int(d), 22 - d / 30 + rng.normal())
+             for s, d in zip(rng.integers(0, len(species), 5000), rng.integers(0, args.days, 5000))]
+    # 予報はカタログの釣り場だけを扱うので、合成の釣り場をカタログの釣り場に割り振る
+    catalog = frame.with_spots(CATALOG[i % len(CATALOG)].name for i in range(len(frame.spots)))
+    feat = timed('forecast.features', lambda: forecast.features(catalog, today, None, temps), args.repeat)
+    fc = timed(f'forecast.Forecast ({forecast.HORIZON}日)',
+               lambda: forecast.Forecast(feat, today + timedelta(days=1)), args.repeat)
+    print(f"  {' × '.join(map(str, fc.score.shape))} = {fc.score.size:,}通り")
+    timed('Forecast.top (週末)', lambda: fc.top([today + timedelta(days=2), today + timedelta(days=3)]), args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+一括解析のベンチマーク
+リポジトリのフィクスチャを繰り返して大量のページにし、bulk_parse.BulkParser のプロセス数ごとの
+1秒あたりの解析ページ数と、1プロセスに対する効率（速度比 ÷ プロセス数）を表示する
+
+使い方:
+  python benchmarks/bench_bulk_parse.py                   # 2000ページを 1, 2, 4 ... コア数 プロセスで
+  python benchmarks/bench_bulk_parse.py --pages 5000 --chunksize 16
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from bench_parse import load_dir_pages  # noqa: E402
+from bulk_parse import CHUNKSIZE, BulkParser  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--pages', type=int, default=2000, help='解析するページ数')
+    ap.add_argument('--chunksize', type=int, default=CHUNKSIZE, help='1回に渡すページ数')
+    args = ap.parse_args()
+
+    fixtures = load_dir_pages(FIXTURES)
+    items = [fixtures[i % len(fixtures)] for i in range(args.pages)]
+    cores = os.cpu_count() or 1
+    counts = sorted({1, cores} | {2 ** k for k in range(1, 8) if 2 ** k < cores})
+
+    base = None
+    for processes in counts:
+        with BulkParser(processes, args.chunksize) as bulk:
+            started = time.perf_counter()
+            catches = sum(len(records) for records, _ in bulk.map(items))
+            elapsed = time.perf_counter() - started
+        rate = len(items) / elapsed
+        base = base or rate
+        print(f"{processes:>3}プロセス {rate:9.0f}ページ/秒 ×{rate / base:5.2f}（効率 {rate / base / processes:4.0%}）"
+              f" 釣果 {catches:,}件")
+
+
+if __name__ == '__main__':
+    main()
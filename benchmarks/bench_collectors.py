@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+収集・サイト生成のベンチマーク（記録済みフィクスチャ使用、ネットワーク不要）
+benchmarks/fixtures/ のHTMLを URL → ファイル の対応表（pages.json）で返す偽フェッチャーに差し替え、
+各パーサー・各収集関数・サイト生成（収集結果から）を測って保存済みのベースラインと比べる
+
+シナリオ（pages.json のキー）:
+  default  : 通常のページ（須磨の「釣果なし」・表のないページ、空のカンパリ一覧を含む）
+  fallback : 店舗ページが空 → Google 検索、Google がブロック → アングラーズ直接 の経路
+
+計測値:
+  ms     : 1回あたりの時間の中央値
+  CPU ms : 同じくプロセスCPU時間
+  ピーク : tracemalloc で測ったピークメモリ（KiB）
+  確保   : 1回の実行で tracemalloc が記録したメモリブロック数（実行後に解放されたものを除く）
+
+使い方:
+  python benchmarks/bench_collectors.py                   # 計測してベースラインと比較
+  python benchmarks/bench_collectors.py --save-baseline   # 計測結果をベースラインとして保存
+  python benchmarks/bench_collectors.py --fail-over 20    # ベースラインより20%以上遅い項目があれば終了コード1
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..'))
+
+import collect_fishing_data  # noqa: E402
+import fetcher  # noqa: E402
+import generate_site  # noqa: E402
+import parsers  # noqa: E402
+from crawl_state import CrawlManifest  # noqa: E402
+from fetcher import FetchResult  # noqa: E402
+from source_health import SourceHealth  # noqa: E402
+from stage_cache import StageCache  # noqa: E402
+
+FIXTURE_DIR = os.path.join(BENCH_DIR, 'fixtures')
+BASELINE_PATH = os.path.join(BENCH_DIR, 'baseline.json')
+
+
+def full_url(url, params=None):
+    """fetcher.Fetcher.get と同じ手順でクエリ付きURLを作る"""
+    return requests.Request('GET', url, params=params).prepare().url
+
+
+class FixtureFetcher:
+    """pages.json の対応表から応答を返すフェッチャー（表にないURLは404）"""
+
+    def __init__(self, scenario='default', directory=FIXTURE_DIR):
+        with open(os.path.join(directory, 'pages.json'), 'r', encoding='utf-8') as f:
+            table = json.load(f)
+        entries = table['default'] + (table[scenario] if scenario != 'default' else [])
+        self.pages = {}
+        for e in entries:
+            with open(os.path.join(directory, e['file']), 'rb') as f:
+                self.pages[full_url(e['url'], e.get('params'))] = (e['file'], f.read())
+        self.replay = True
+        self.requests = 0
+
+    def get(self, url, params=None, headers=None, timeout=15, encoding=None, conditional=True, retries=None):
+        self.requests += 1
+        u = full_url(url, params)
+        if u not in self.pages:
+            return FetchResult(u, 404, b'', encoding or 'utf-8')
+        return FetchResult(u, 200, self.pages[u][1], encoding or 'utf-8', not_modified=True, attempts=0)
+
+    def close(self):
+        pass
+
+
+@contextlib.contextmanager
+def fixtures(scenario):
+    """共通フェッチャー・クロール状態・取得先の健全性・段ごとのメモをフィクスチャ用に差し替える（毎回計算する）"""
+    saved = (fetcher._default, collect_fishing_data.MANIFEST, collect_fishing_data.HEALTH, collect_fishing_data.STAGES,
+             generate_site.STAGES, generate_site.DB_PATH)
+    fetcher._default = FixtureFetcher(scenario)
+    collect_fishing_data.MANIFEST = CrawlManifest(enabled=False)
+    collect_fishing_data.HEALTH = SourceHealth(enabled=False)
+    collect_fishing_data.STAGES = generate_site.STAGES = StageCache(enabled=False)
+    generate_site.DB_PATH = os.path.join(tempfile.gettempdir(), 'bench-no-history.db')
+    try:
+        yield fetcher._default
+    finally:
+        (fetcher._default, collect_fishing_data.MANIFEST, collect_fishing_data.HEALTH, collect_fishing_data.STAGES,
+         generate_site.STAGES, generate_site.DB_PATH) = saved
+
+
+def _size(result):
+    """結果の件数（釣果数・記事数など、HTMLは文字数）"""
+    if isinstance(result, dict):
+        if 'catches' in result:
+            return len(result['catches'])
+        return sum(_size(v) for v in result.values())
+    if isinstance(result, tuple):
+        return sum(_size(v) for v in result if isinstance(v, list))
+    if isinstance(result, list):
+        return sum(_size(v) if isinstance(v, dict) and 'catches' in v else 1 for v in result)
+    if isinstance(result, str):
+        return len(result)
+    return 0
+
+
+def measure(func, repeat):
+    """func を1回ウォームアップしてから repeat 回計測する"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = func()
+        walls, cpus = [], []
+        for _ in range(repeat):
+            w, c = time.perf_counter(), time.process_time()
+            func()
+            walls.append(time.perf_counter() - w)
+            cpus.append(time.process_time() - c)
+
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        func()
+        after = tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    blocks = sum(max(0, s.count_diff) for s in after.compare_to(before, 'lineno'))
+    return {
+        'ms': statistics.median(walls) * 1000,
+        'cpu_ms': statistics.median(cpus) * 1000,
+        'peak_kib': peak / 1024,
+        'blocks': blocks,
+        'items': _size(result),
+    }
+
+
+def parser_cases():
+    """フィクスチャを1ファイルずつソースのパーサーにかける"""
+    pages = {}
+    with open(os.path.join(FIXTURE_DIR, 'pages.json'), 'r', encoding='utf-8') as f:
+        table = json.load(f)
+    for e in table['default'] + table['fallback']:
+        source = parsers.source_for_url(full_url(e['url'], e.get('params')))
+        pages.setdefault(e['file'], source)
+    cases = []
+    for name, source in sorted(pages.items()):
+        with open(os.path.join(FIXTURE_DIR, name), 'r', encoding='utf-8') as f:
+            html = f.read()
+        cases.append((f"parse/{name[:-5]}", lambda html=html, p=parsers.PARSERS[source]: p(html)))
+    return cases
+
+
+def collector_cases(scenario):
+    cases = [(f"{scenario}/{c.__name__}", c) for c in collect_fishing_data.COLLECTORS]
+    cases.append((f"{scenario}/collect_all", lambda: collect_fishing_data.collect_all(concurrent=False)))
+    return cases
+
+
+def site_cases():
+    out = tempfile.mkdtemp(prefix='bench-site-')
+    # サイト生成は収集結果（fishing-data.json の spots）から作る
+    with contextlib.redirect_stdout(io.StringIO()):
+        spots = [{**s, 'catches': [c.to_dict() for c in s['catches']]}
+                 for s in collect_fishing_data.collect_all(concurrent=False)]
+        data = generate_site.collect(spots)
+
+    def build():
+        return generate_site.build(data, out)
+
+    def end_to_end():
+        return generate_site.build(generate_site.collect(spots), out)
+
+    return [
+        ("site/collect", lambda: generate_site.collect(spots)),
+        ("site/gen_html", lambda: generate_site.gen_html("assets/app.css", "assets/app.js", "data/site.json")),
+        ("site/build", build),
+        ("site/end_to_end", end_to_end),
+    ]
+
+
+def load_baseline(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('results', {})
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--repeat', type=int, default=5, help='計測の繰り返し回数')
+    ap.add_argument('--only', default='', help='名前にこの文字列を含む項目だけ測る')
+    ap.add_argument('--baseline', default=BASELINE_PATH, help='比較・保存するベースラインのパス')
+    ap.add_argument('--save-baseline', action='store_true', help='計測結果をベースラインとして保存')
+    ap.add_argument('--fail-over', type=float, default=None, help='ベースラインよりこの%%以上遅ければ終了コード1')
+    ap.add_argument('--json', help='計測結果をJSONで書き出すパス')
+    args = ap.parse_args()
+
+    baseline = load_baseline(args.baseline)
+    results = {}
+    regressions = []
+    print(f"{'項目':<34}{'件数':>6}{'ms':>9}{'CPU ms':>9}{'ピークKiB':>11}{'確保':>8}{'基準ms':>9}{'差':>8}")
+
+    groups = [
+        (None, parser_cases),
+        ('default', lambda: collector_cases('default')),
+        ('fallback', lambda: collector_cases('fallback')),
+        ('default', site_cases),
+    ]
+    for scenario, make_cases in groups:
+        with fixtures(scenario) if scenario else contextlib.nullcontext():
+            for name, func in make_cases():
+                if args.only not in name:
+                    continue
+                r = measure(func, args.repeat)
+                results[name] = r
+                base = baseline.get(name)
+                diff = ''
+                if base and base['ms'] > 0:
+                    pct = (r['ms'] / base['ms'] - 1) * 100
+                    diff = f"{pct:+.0f}%"
+                    if args.fail_over is not None and pct > args.fail_over:
+                        regressions.append(name)
+                print(f"{name:<34}{r['items']:>6}{r['ms']:>9.2f}{r['cpu_ms']:>9.2f}{r['peak_kib']:>11.0f}"
+                      f"{r['blocks']:>8}{base['ms'] if base else float('nan'):>9.2f}{diff:>8}")
+
+    report = {'python': platform.python_version(), 'machine': platform.machine(), 'results': results}
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"💾 ベースラインを保存しました: {args.baseline}")
+    if regressions:
+        print(f"❌ ベースラインより {args.fail_over:.0f}% 以上遅い項目: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+重複判定のベンチマーク
+合成した釣果候補（一部を別ソースの重複としてサイズ・匹数をずらして複製）で dedup.cluster の時間を測り、
+件数を倍にしたときにほぼ比例して伸びること（総当たりにならないこと）を確認する
+
+使い方:
+  python benchmarks/bench_dedup.py                 # 2万件から4段階
+  python benchmarks/bench_dedup.py --start 50000 --steps 3
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import dedup  # noqa: E402
+from lexicon import SPOTS  # noqa: E402
+from species import SPECIES  # noqa: E402
+
+SOURCES = ['fishing.ne.jp', 'anglers.jp', 'fishingmax.co.jp', 'sumaturi-park.jp']
+
+
+def synthetic(n, dup_rate=0.2, days=365, seed=0):
+    """n 件の候補と、そのうち重複として作った件数"""
+    rng = np.random.default_rng(seed)
+    species, spots = list(SPECIES), list(SPOTS) + ['']
+    base = int(n / (1 + dup_rate))
+    src = rng.integers(0, len(SOURCES), base)
+    sp = rng.integers(0, len(species), base)
+    spot = rng.integers(0, len(spots), base)
+    day = rng.integers(0, days, base) + 739000
+    size = rng.normal(25, 8, base).clip(5).round()
+    count = rng.integers(1, 40, base)
+    out = [dedup.Candidate(SOURCES[src[i]], species[sp[i]], spots[spot[i]], int(day[i]), float(size[i]),
+                           float(size[i]), float(count[i]), float(count[i]), '') for i in range(base)]
+    for i in rng.integers(0, base, n - base):
+        c = out[i]
+        out.append(c._replace(source=SOURCES[(SOURCES.index(c.source) + 1) % len(SOURCES)],
+                              size_lo=c.size_lo - 1, size_hi=c.size_hi + 1))
+    return out, n - base
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--start', type=int, default=20000, help='最初の件数')
+    ap.add_argument('--steps', type=int, default=4, help='件数を倍にする回数')
+    args = ap.parse_args()
+
+    prev = None
+    for k in range(args.steps):
+        n = args.start * 2 ** k
+        cands, planted = synthetic(n)
+        started = time.perf_counter()
+        roots = dedup.cluster(cands)
+        elapsed = time.perf_counter() - started
+        found = sum(1 for i, r in enumerate(roots) if r != i)
+        ratio = f"×{elapsed / prev:.2f}" if prev else ''
+        print(f"{n:>9,}件 {elapsed * 1000:9.1f} ms {ratio:>6}  重複 {found:,}件（複製 {planted:,}件）")
+        prev = elapsed
+
+
+if __name__ == '__main__':
+    main()
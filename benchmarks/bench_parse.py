@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTMLパーサーのベンチマーク
+保存済みページを使い、ソースごとに解析時間とピークメモリを比較する
+  before: BeautifulSoup(html, 'lxml') で全体ツリーを作り get_text() で全文を走査（旧実装の処理）
+  after : parsers.py の lxml 直接解析
+
+使い方:
+  python benchmarks/bench_parse.py                 # .cache/html のスナップショットを使う
+  python benchmarks/bench_parse.py --dir pages/    # <ソース名>*.html のファイルを使う
+  python benchmarks/bench_parse.py --dir benchmarks/fixtures  # リポジトリのフィクスチャを使う
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+import parsers  # noqa: E402
+from fetcher import CACHE_DIR  # noqa: E402
+from html_cache import HtmlCache  # noqa: E402
+
+
+def load_cache_pages(cache_dir):
+    """HTMLキャッシュの最新スナップショットを (ソース, html) で返す"""
+    cache = HtmlCache(os.path.join(cache_dir, 'html'))
+    pages = []
+    for url in cache.urls():
+        source = parsers.source_for_url(url)
+        snap = cache.latest(url)
+        if source and snap:
+            pages.append((source, cache.read(snap['hash']).decode(snap.get('encoding') or 'utf-8', 'replace')))
+    return pages
+
+
+def load_dir_pages(directory):
+    """ファイル名の先頭がソース名（例: suma_detail_0210.html）のHTMLを読み込む"""
+    pages = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.html'):
+            continue
+        source = next((s for s in sorted(parsers.PARSERS, key=len, reverse=True) if name.startswith(s)), None)
+        if source:
+            with open(os.path.join(directory, name), 'r', encoding='utf-8') as f:
+                pages.append((source, f.read()))
+    return pages
+
+
+def legacy_parse(html):
+    """旧実装相当: 全体ツリーを構築して全文テキストを取る"""
+    soup = BeautifulSoup(html, 'lxml')
+    soup.get_text()
+    return soup
+
+
+def measure(func, htmls, repeat):
+    """1ページあたりの平均時間(ms)とピークメモリ(KiB)"""
+    tracemalloc.start()
+    for html in htmls:
+        func(html)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for html in htmls:
+            func(html)
+    elapsed = time.perf_counter() - started
+    return elapsed * 1000 / (repeat * len(htmls)), peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTMLパーサーのベンチマーク")
+    parser.add_argument('--dir', help='ベンチマークに使うHTMLのディレクトリ')
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help='HTMLキャッシュのディレクトリ')
+    parser.add_argument('--repeat', type=int, default=5, help='計測の繰り返し回数')
+    args = parser.parse_args()
+
+    pages = load_dir_pages(args.dir) if args.dir else load_cache_pages(args.cache_dir)
+    if not pages:
+        print("❌ 解析対象のページがありません（先に collect_fishing_data.py を実行してください）")
+        return 1
+
+    by_source = defaultdict(list)
+    for source, html in pages:
+        by_source[source].append(html)
+
+    print(f"{'ソース':<18}{'件数':>5}{'before ms':>11}{'after ms':>10}{'速度比':>8}{'before KiB':>12}{'after KiB':>11}")
+    for source in sorted(by_source):
+        htmls = by_source[source]
+        b_ms, b_kib = measure(legacy_parse, htmls, args.repeat)
+        a_ms, a_kib = measure(parsers.PARSERS[source], htmls, args.repeat)
+        print(f"{source:<18}{len(htmls):>5}{b_ms:>11.2f}{a_ms:>10.2f}{b_ms / a_ms:>7.1f}x{b_kib:>12.0f}{a_kib:>11.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+釣り場の空間索引のベンチマーク
+兵庫南部（北緯34〜35.5, 東経134〜135.6）に合成した釣り場で、spots.SpotIndex の格子（scan_max=0 で件数によらず格子を引く）の
+半径検索・近い順k件と、全釣り場との距離を毎回計算する総当たりの1回あたりの時間を比べる
+（SpotIndex は spots.SCAN_MAX 件以下なら総当たりと同じ全件計算になるので、この表で格子が速くなる件数を確かめて決める）
+
+使い方:
+  python benchmarks/bench_spots.py                       # 12・100・1000・10000件
+  python benchmarks/bench_spots.py --radius 10 --k 3
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import spots  # noqa: E402
+
+
+def synthetic(n, seed=0):
+    rng = np.random.default_rng(seed)
+    lat, lon = rng.uniform(34.0, 35.5, n), rng.uniform(134.0, 135.6, n)
+    return [spots.Spot(f"釣り場{i}", '', float(lat[i]), float(lon[i]), (), '') for i in range(n)]
+
+
+def per_query(func, queries):
+    started = time.perf_counter()
+    for q in queries:
+        func(*q)
+    return (time.perf_counter() - started) * 1e6 / len(queries)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--sizes', default='12,100,1000,10000', help='釣り場数（カンマ区切り）')
+    ap.add_argument('--radius', type=float, default=20.0, help='半径検索の半径km')
+    ap.add_argument('--k', type=int, default=5, help='近い順の件数')
+    ap.add_argument('--queries', type=int, default=500, help='検索回数')
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(1)
+    queries = list(zip(rng.uniform(34.3, 35.2, args.queries), rng.uniform(134.3, 135.3, args.queries)))
+    print(f"{'件数':>7}{'格子 半径µs':>10}{'総当たり':>10}{'格子 k件µs':>10}{'総当たり':>10}")
+    for n in (int(s) for s in args.sizes.split(',')):
+        index = spots.SpotIndex(synthetic(n), scan_max=0)
+
+        def brute_within(lat, lon):
+            d = spots.haversine(lat, lon, index.lat, index.lon)
+            hit = np.where(d <= args.radius)[0]
+            return hit[np.argsort(d[hit])]
+
+        def brute_nearest(lat, lon):
+            return np.argsort(spots.haversine(lat, lon, index.lat, index.lon))[:args.k]
+
+        w = per_query(lambda lat, lon: index.within(lat, lon, args.radius), queries)
+        bw = per_query(brute_within, queries)
+        k = per_query(lambda lat, lon: index.nearest(lat, lon, args.k), queries)
+        bk = per_query(brute_nearest, queries)
+        print(f"{n:>7,}{w:>10.1f}{bw:>10.1f}{k:>10.1f}{bk:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+大量のページの一括解析（パーサー修正後の再解析・バックフィル用）
+(パーサー名, HTML[, URL]) の作業をチャンクにまとめて子プロセスへ配り、釣果のレコードだけを受け取る
+HTMLの木は子プロセスの中で捨て、受け渡すのは本文（またはキャッシュのファイル名）と CatchRecord だけなので、
+コア数にほぼ比例して速くなる（日々の収集は1回数十ページなので従来どおりスレッドで解析する）
+
+使い方:
+  python bulk_parse.py                      # .cache/html の各URLの最新スナップショットを再解析
+  python bulk_parse.py --all-snapshots      # 全スナップショットを再解析
+  python bulk_parse.py --processes 4 --chunksize 16
+"""
+
+import argparse
+import gzip
+import os
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+import parsers
+from catch_record import CatchRecord
+from fetcher import CACHE_DIR
+from html_cache import HtmlCache
+
+# 1回の受け渡しでまとめるページ数（小さいとプロセス間通信、大きいと負荷の偏りが増える）
+CHUNKSIZE = 8
+
+
+class CachedPage(NamedTuple):
+    """HTMLキャッシュ上の本文（子プロセスが自分で読んで展開する）"""
+    path: str
+    encoding: str
+
+
+def _load(page):
+    if isinstance(page, CachedPage):
+        with gzip.open(page.path, 'rb') as f:
+            return f.read().decode(page.encoding or 'utf-8', 'replace')
+    if isinstance(page, bytes):
+        return page.decode('utf-8', 'replace')
+    return page
+
+
+def catches_of(result):
+    """パーサーの戻り値（釣果リスト・(日付, 釣果)・(釣果, URL)・URLリスト）から釣果だけを取り出す"""
+    parts = result if isinstance(result, tuple) else (result,)
+    return [c for part in parts if isinstance(part, list) for c in part if isinstance(c, CatchRecord)]
+
+
+def _parse_chunk(chunk):
+    """子プロセスで (パーサー名, 本文[, URL]) を順に解析し、(釣果リスト, エラー) のリストを返す
+    URL はカンパリのエリアなど URL から決まるものに使う（日々の収集と同じレコードになる）"""
+    out = []
+    for name, page, *url in chunk:
+        try:
+            out.append((catches_of(parsers.parse(name, _load(page), *url)), None))
+        except Exception as e:
+            out.append(([], f"{type(e).__name__}: {e}"))
+    return out
+
+
+def _chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class BulkParser:
+    """プロセスプール（processes=1 なら同じプロセスで解析）"""
+
+    def __init__(self, processes=None, chunksize=CHUNKSIZE):
+        self.processes = max(1, processes or os.cpu_count() or 1)
+        self.chunksize = max(1, chunksize)
+        self._pool = ProcessPoolExecutor(max_workers=self.processes) if self.processes > 1 else None
+
+    def close(self):
+        if self._pool:
+            self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def map(self, items):
+        """(パーサー名, 本文[, URL]) を順に解析し、入力と同じ順で (釣果リスト, エラー) を返す generator
+        items は必要な分だけ読む（送り出し中のチャンクはプロセス数の2倍まで）"""
+        chunks = _chunks(items, self.chunksize)
+        if self._pool is None:
+            for chunk in chunks:
+                yield from _parse_chunk(chunk)
+            return
+        pending = deque()
+        for chunk in chunks:
+            pending.append(self._pool.submit(_parse_chunk, chunk))
+            if len(pending) >= self.processes * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def cached_pages(cache_dir=CACHE_DIR, all_snapshots=False):
+    """HTMLキャッシュのスナップショットを (URL, パーサー名, CachedPage) で返す（既定は各URLの最新だけ）"""
+    cache = HtmlCache(os.path.join(cache_dir, 'html'))
+    latest = {}
+    for url, snap in cache.iter_snapshots(lambda u: parsers.source_for_url(u) is not None):
+        if all_snapshots:
+            yield url, parsers.source_for_url(url), CachedPage(cache._object_path(snap['hash']), snap.get('encoding'))
+        else:
+            latest[url] = snap
+    for url, snap in latest.items():
+        yield url, parsers.source_for_url(url), CachedPage(cache._object_path(snap['hash']), snap.get('encoding'))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="HTMLキャッシュの一括再解析")
+    ap.add_argument('--cache-dir', default=CACHE_DIR, help='キャッシュのディレクトリ')
+    ap.add_argument('--all-snapshots', action='store_true', help='各URLの最新だけでなく全スナップショットを解析')
+    ap.add_argument('--processes', type=int, help='子プロセス数（既定: コア数）')
+    ap.add_argument('--chunksize', type=int, default=CHUNKSIZE, help=f'1回に渡すページ数（既定: {CHUNKSIZE}）')
+    args = ap.parse_args()
+
+    pages, catches, errors = Counter(), Counter(), Counter()
+    items = list(cached_pages(args.cache_dir, args.all_snapshots))
+    if not items:
+        print("❌ 解析対象のページがありません（先に collect_fishing_data.py を実行してください）")
+        return
+    started = time.perf_counter()
+    with BulkParser(args.processes, args.chunksize) as bulk:
+        for (url, name, _), (records, error) in zip(items, bulk.map((n, p, u) for u, n, p in items)):
+            pages[name] += 1
+            catches[name] += len(records)
+            if error:
+                errors[name] += 1
+                print(f"  ⚠️ {name}: {url} - {error}")
+        processes = bulk.processes
+    elapsed = time.perf_counter() - started
+    for name in sorted(pages):
+        print(f"📄 {name:<18}{pages[name]:>6}ページ {catches[name]:>7}件" + (f" エラー{errors[name]}" if errors[name] else ''))
+    total = sum(pages.values())
+    print(f"⏱️ {total}ページ {elapsed:.2f}秒（{total / elapsed:.0f}ページ/秒、{processes}プロセス）")
+
+
+if __name__ == "__main__":
+    main()
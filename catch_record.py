@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+釣果レコード
+サイズ・匹数・日付を数値に解析した型付きの釣果（表示用の元の文字列も保持）
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Optional
+
+from species import species_id
+
+RE_NUMBER = re.compile(r'\d+(?:\.\d+)?')
+RE_WEIGHT = re.compile(r'\d\s*(?:kg|g|グラム|キロ)', re.IGNORECASE)
+RE_KILO = re.compile(r'\d\s*(?:kg|キロ)', re.IGNORECASE)
+RE_MONTH_DAY = re.compile(r'(\d{1,2})/(\d{1,2})')
+OPEN_MAX = ('超', '以上', '+', '＋')
+FEW = ('数匹', '数尾', '数枚', '数杯', '数本')
+
+# dict 形式で固有の意味を持つキー（それ以外は extra に入れる）
+_BASE_KEYS = ('fish', 'size', 'count', 'method', 'user', 'date', 'emoji')
+_DERIVED_KEYS = ('species', 'size_min', 'size_max', 'size_unit', 'count_min', 'count_max', 'date_iso')
+
+
+def parse_size(raw):
+    """サイズ文字列を (最小, 最大, 単位) に。単位は 'cm' か 'g'、読めなければ (None, None, '')"""
+    text = unicodedata.normalize('NFKC', raw or '').strip()
+    nums = [float(n) for n in RE_NUMBER.findall(text)]
+    if not nums:
+        return None, None, ''
+    unit = 'g' if RE_WEIGHT.search(text) else 'cm'
+    if RE_KILO.search(text):
+        nums = [n * 1000 for n in nums]
+    if text.startswith(('~', '〜', '-')):
+        return None, nums[0], unit
+    if len(nums) >= 2:
+        return min(nums[:2]), max(nums[:2]), unit
+    return nums[0], nums[0], unit
+
+
+def parse_count(raw):
+    """匹数文字列を (最小, 最大) に。上限なしは最大 None"""
+    text = unicodedata.normalize('NFKC', raw or '').strip()
+    nums = [int(float(n)) for n in RE_NUMBER.findall(text)]
+    if not nums:
+        if any(f in text for f in FEW):
+            return 2, 9
+        return None, None
+    if any(o in text for o in OPEN_MAX):
+        return nums[0], None
+    if text.startswith(('~', '〜')):
+        return 0, nums[0]
+    if len(nums) >= 2:
+        return min(nums[:2]), max(nums[:2])
+    return nums[0], nums[0]
+
+
+def parse_date(raw, ref=None):
+    """'M/D' を含む文字列を ref 基準で年付きの date に（未来の月は前年扱い）"""
+    m = RE_MONTH_DAY.search(raw or '')
+    if not m:
+        return None
+    ref = ref or datetime.now()
+    month, day = int(m.group(1)), int(m.group(2))
+    year = ref.year - 1 if month > ref.month else ref.year
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+@dataclass(slots=True)
+class CatchRecord:
+    """1件の釣果"""
+    fish: str
+    species: str = ''
+    size_raw: str = ''
+    size_min: Optional[float] = None
+    size_max: Optional[float] = None
+    size_unit: str = ''
+    count_raw: str = ''
+    count_min: Optional[int] = None
+    count_max: Optional[int] = None
+    date: Optional[date] = None
+    date_raw: str = ''
+    method: str = ''
+    user: str = ''
+    emoji: str = ''
+    extra: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, d, ref=None):
+        """収集時の dict（fish/size/count/date ...）からレコードを作る"""
+        fish = d.get('fish', '')
+        size_min, size_max, size_unit = parse_size(d.get('size', ''))
+        count_min, count_max = parse_count(d.get('count', ''))
+        return cls(
+            fish=fish,
+            species=species_id(fish),
+            size_raw=d.get('size', ''),
+            size_min=size_min,
+            size_max=size_max,
+            size_unit=size_unit,
+            count_raw=d.get('count', ''),
+            count_min=count_min,
+            count_max=count_max,
+            date=date.fromisoformat(d['date_iso']) if d.get('date_iso') else parse_date(d.get('date', ''), ref),
+            date_raw=d.get('date', ''),
+            method=d.get('method', ''),
+            user=d.get('user', ''),
+            emoji=d.get('emoji', ''),
+            extra={k: v for k, v in d.items() if k not in _BASE_KEYS and k not in _DERIVED_KEYS},
+        )
+
+    def to_dict(self):
+        """fishing-data.json 用の dict（元の文字列＋解析済みの数値）"""
+        return {
+            "fish": self.fish,
+            "size": self.size_raw,
+            "count": self.count_raw,
+            "method": self.method,
+            "user": self.user,
+            "date": self.date_raw,
+            "emoji": self.emoji,
+            **self.extra,
+            "species": self.species,
+            "size_min": self.size_min,
+            "size_max": self.size_max,
+            "size_unit": self.size_unit,
+            "count_min": self.count_min,
+            "count_max": self.count_max,
+            "date_iso": self.date.isoformat() if self.date else None,
+        }
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+釣果履歴ストア（SQLite）
+収集のたびに釣果を追記し、正規化キーで重複をまとめる（削除はしない）
+ソースをまたいだ同じ釣果は dedup で判定して dup_of に代表のキーを入れ、集計（history）から除く
+登録後に dup_of・spot を書き換えた行は changed に日時を入れ、差分で集計する側（seasonal）が作り直せるようにする
+(釣り場, 日付)・(魚種, 日付)・(ソース, 日付)・(魚種ID, 日付) の索引で直近N日の検索を高速に行う
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import unicodedata
+from datetime import datetime, timedelta
+
+import dedup
+from spots import CATALOG
+
+DB_PATH = 'fishing-history.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS catches (
+    key        TEXT PRIMARY KEY,
+    source     TEXT NOT NULL,
+    spot       TEXT NOT NULL,
+    fish       TEXT NOT NULL,
+    species    TEXT NOT NULL DEFAULT '',
+    date       TEXT,
+    date_raw   TEXT NOT NULL DEFAULT '',
+    size       TEXT NOT NULL DEFAULT '',
+    size_min   REAL,
+    size_max   REAL,
+    size_unit  TEXT NOT NULL DEFAULT '',
+    count      TEXT NOT NULL DEFAULT '',
+    count_min  INTEGER,
+    count_max  INTEGER,
+    method     TEXT NOT NULL DEFAULT '',
+    user       TEXT NOT NULL DEFAULT '',
+    extra      TEXT NOT NULL DEFAULT '{}',
+    dup_of     TEXT NOT NULL DEFAULT '',
+    changed    TEXT NOT NULL DEFAULT '',
+    first_seen TEXT NOT NULL,
+    last_seen  TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    name       TEXT PRIMARY KEY,
+    value      TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_catches_spot_date ON catches(spot, date);
+CREATE INDEX IF NOT EXISTS idx_catches_fish_date ON catches(fish, date);
+CREATE INDEX IF NOT EXISTS idx_catches_source_date ON catches(source, date);
+CREATE INDEX IF NOT EXISTS idx_catches_species_date ON catches(species, date);
+CREATE INDEX IF NOT EXISTS idx_catches_first_seen ON catches(first_seen);
+CREATE INDEX IF NOT EXISTS idx_catches_changed ON catches(changed);
+"""
+
+# 後から追加した列（既存DBには ALTER TABLE で足す）
+ADDED_COLUMNS = {
+    'species': "TEXT NOT NULL DEFAULT ''",
+    'size_min': 'REAL',
+    'size_max': 'REAL',
+    'size_unit': "TEXT NOT NULL DEFAULT ''",
+    'count_min': 'INTEGER',
+    'count_max': 'INTEGER',
+    'dup_of': "TEXT NOT NULL DEFAULT ''",
+    'changed': "TEXT NOT NULL DEFAULT ''",
+}
+
+# added_since・on_dates で返す列（集計用）
+SUMMARY_COLUMNS = ('source, spot, fish, species, date, size_min, size_max, size_unit, count_min, count_max,'
+                   ' method, extra, first_seen')
+
+INSERT_COLUMNS = ('key', 'source', 'spot', 'fish', 'species', 'date', 'date_raw', 'size', 'size_min',
+                  'size_max', 'size_unit', 'count', 'count_min', 'count_max', 'method', 'user', 'extra',
+                  'first_seen', 'last_seen')
+
+
+# カタログ（釣り場・別名・ヒント・位置）が変わったら resolve_spots を全件からやり直す
+CATALOG_DIGEST = hashlib.sha1(repr(CATALOG).encode('utf-8')).hexdigest()[:16]
+
+
+def normalize_text(text):
+    """全角半角・空白の揺れをなくした比較用文字列"""
+    return ''.join(unicodedata.normalize('NFKC', text or '').split()).lower()
+
+
+def catch_key(source, spot, rec, ref):
+    """重複判定用の正規化キー（'今月実績' など日付のない釣果は収集月で区切る）"""
+    date = rec.date.isoformat() if rec.date else f"{normalize_text(rec.date_raw)}@{ref:%Y-%m}"
+    parts = [source, spot, rec.fish, date, rec.size_raw, rec.count_raw, rec.user]
+    return hashlib.sha1('\x1f'.join(normalize_text(p) for p in parts).encode('utf-8')).hexdigest()
+
+
+class CatchStore:
+    """釣果履歴のSQLiteストア"""
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+        self.conn.executescript(INDEXES)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _migrate(self):
+        existing = {r[1] for r in self.conn.execute('PRAGMA table_info(catches)')}
+        for name, decl in ADDED_COLUMNS.items():
+            if name not in existing:
+                self.conn.execute(f'ALTER TABLE catches ADD COLUMN {name} {decl}')
+
+    def _row(self, source, spot, rec, ref, seen, resolved=None):
+        """spot は収集時の名前（釣り場・エリア・ソース名）。キーはこの名前で作り（既存の行と同じキーになる）、
+        spot 列には resolved（なければ本文・場所・エリア名から解決したカタログの釣り場名、それもなければ収集時の名前）を入れる"""
+        extra = dict(rec.extra, emoji=rec.emoji)
+        return (
+            catch_key(source, spot, rec, ref), source, resolved or dedup.catch_spot(rec.extra, spot) or spot,
+            rec.fish, rec.species,
+            rec.date.isoformat() if rec.date else None, rec.date_raw,
+            rec.size_raw, rec.size_min, rec.size_max, rec.size_unit,
+            rec.count_raw, rec.count_min, rec.count_max, rec.method, rec.user,
+            json.dumps(extra, ensure_ascii=False), seen, seen,
+        )
+
+    def add_spots(self, spots, collected_at=None):
+        """collect_fishing_data の spots をまとめて登録し、新規件数を返す（'spot' があれば釣り場はそのカタログの釣り場名）"""
+        ref = collected_at or datetime.now()
+        seen = ref.isoformat(timespec='seconds')
+        rows = []
+        for spot in spots:
+            source = spot.get('source', spot.get('name', ''))
+            for rec in spot.get('catches', []):
+                # カンパリ・アングラーズはエリア、ブログはソース名が収集時の名前
+                rows.append(self._row(source, rec.extra.get('area_detail') or spot['name'], rec, ref, seen,
+                                      spot.get('spot')))
+        return self.upsert(rows)
+
+    def resolve_spots(self):
+        """spot 列がカタログの釣り場名でない行（以前の形式で登録したエリア名・ソース名の行）を解決し直し、更新件数を返す
+        見るのは前回の実行以降に登録された行だけ（解決できない行を毎回読み直さない。カタログが変わったら全件から）"""
+        names = [s.name for s in CATALOG]
+        with self._lock:
+            mark = json.loads(self._get_meta('resolve_spots') or '{}')
+            since = mark.get('first_seen') if mark.get('catalog') == CATALOG_DIGEST else None
+            latest = self.conn.execute('SELECT MAX(first_seen) FROM catches').fetchone()[0]
+            sql = f"SELECT key, spot, extra FROM catches WHERE spot NOT IN ({', '.join('?' * len(names))})"
+            if since:
+                sql += ' AND first_seen >= ?'
+            rows = self.conn.execute(sql, names + ([since] if since else [])).fetchall()
+        now = datetime.now().isoformat(timespec='seconds')
+        updates = []
+        for r in rows:
+            spot = dedup.catch_spot(json.loads(r['extra'] or '{}'), r['spot'])
+            if spot:
+                updates.append((spot, now, r['key']))
+        with self._lock, self.conn:
+            self.conn.executemany('UPDATE catches SET spot = ?, changed = ? WHERE key = ?', updates)
+            if latest:
+                self._set_meta('resolve_spots', json.dumps({'catalog': CATALOG_DIGEST, 'first_seen': latest}))
+        return len(updates)
+
+    def _get_meta(self, name):
+        row = self.conn.execute('SELECT value FROM meta WHERE name = ?', [name]).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, name, value):
+        self.conn.execute('INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)', [name, value])
+
+    def upsert(self, rows):
+        """行をまとめて登録（既存キーは最終確認日時だけ更新）"""
+        with self._lock, self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                f'INSERT OR IGNORE INTO catches ({", ".join(INSERT_COLUMNS)})'
+                f' VALUES ({", ".join("?" * len(INSERT_COLUMNS))})',
+                rows)
+            inserted = self.conn.total_changes - before
+            self.conn.executemany('UPDATE catches SET last_seen = ? WHERE key = ? AND last_seen < ?',
+                                  [(r[-1], r[0], r[-1]) for r in rows])
+        return inserted
+
+    def _recent(self, column, value, days, today, limit):
+        since = ((today or datetime.now()) - timedelta(days=days)).date().isoformat()
+        sql = f'SELECT * FROM catches WHERE {column} = ? AND date >= ? ORDER BY date DESC'
+        params = [value, since]
+        if limit:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [self._to_dict(r) for r in rows]
+
+    def recent_by_spot(self, spot, days=7, today=None, limit=None):
+        """釣り場の直近 days 日の釣果（新しい順）"""
+        return self._recent('spot', spot, days, today, limit)
+
+    def recent_by_fish(self, fish, days=7, today=None, limit=None):
+        """魚種の直近 days 日の釣果（新しい順）"""
+        return self._recent('fish', fish, days, today, limit)
+
+    def recent_by_species(self, species, days=7, today=None, limit=None):
+        """魚種ID（ガシラ/カサゴ などをまとめたもの）の直近 days 日の釣果（新しい順）"""
+        return self._recent('species', species, days, today, limit)
+
+    def recent_by_source(self, source, days=7, today=None, limit=None):
+        """ソースの直近 days 日の釣果（新しい順）"""
+        return self._recent('source', source, days, today, limit)
+
+    def history(self, since, columns):
+        """日付が since 以降の釣果を columns のタプルで返す（集計用、他ソースの重複は除く）"""
+        with self._lock:
+            return self.conn.execute(
+                f"SELECT {', '.join(columns)} FROM catches WHERE date >= ? AND dup_of = ''",
+                [since.isoformat()]).fetchall()
+
+    def added_since(self, seen=None):
+        """first_seen が seen 以降（None なら全件）の日付のある釣果を登録順に返す（他ソースの重複は除く）"""
+        sql = f"SELECT {SUMMARY_COLUMNS} FROM catches WHERE date IS NOT NULL AND dup_of = ''"
+        params = []
+        if seen:
+            sql += ' AND first_seen >= ?'
+            params.append(seen)
+        with self._lock:
+            return self.conn.execute(sql + ' ORDER BY first_seen', params).fetchall()
+
+    def changed_since(self, changed=None):
+        """changed が changed より後（None なら全件）の行の (日付の集合, 最新の changed) を返す
+        登録後に重複になった・重複でなくなった・釣り場が変わった釣果の日付"""
+        sql = "SELECT DISTINCT date, changed FROM catches WHERE date IS NOT NULL AND changed != ''"
+        params = []
+        if changed:
+            sql += ' AND changed > ?'
+            params.append(changed)
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return {r['date'] for r in rows}, max((r['changed'] for r in rows), default=changed)
+
+    def on_dates(self, dates, chunk=500):
+        """日付が dates のどれかの釣果を返す（added_since と同じ列、他ソースの重複は除く）"""
+        dates = sorted(dates)
+        rows = []
+        with self._lock:
+            for i in range(0, len(dates), chunk):
+                part = dates[i:i + chunk]
+                rows += self.conn.execute(
+                    f"SELECT {SUMMARY_COLUMNS} FROM catches WHERE date IN ({', '.join('?' * len(part))})"
+                    " AND dup_of = ''", part).fetchall()
+        return rows
+
+    def mark_duplicates(self, since=None):
+        """日付が since 以降（None なら全期間）の釣果で、ソースをまたいだ重複に dup_of を付け直し、重複の件数を返す
+        先に登録された釣果を代表にする"""
+        sql = ('SELECT key, source, spot, fish, species, date, size_min, size_max, count_min, count_max,'
+               ' method, extra, dup_of FROM catches WHERE date IS NOT NULL')
+        params = []
+        if since:
+            sql += ' AND date >= ?'
+            params.append(since.isoformat())
+        with self._lock:
+            rows = self.conn.execute(sql + ' ORDER BY first_seen, key', params).fetchall()
+        roots = dedup.cluster([dedup.from_row(r) for r in rows])
+        dup_of = [rows[root]['key'] if root != i else '' for i, root in enumerate(roots)]
+        now = datetime.now().isoformat(timespec='seconds')
+        changes = [(d, now, r['key']) for r, d in zip(rows, dup_of) if r['dup_of'] != d]
+        with self._lock, self.conn:
+            self.conn.executemany('UPDATE catches SET dup_of = ?, changed = ? WHERE key = ?', changes)
+        return sum(1 for d in dup_of if d)
+
+    def count(self):
+        with self._lock:
+            return self.conn.execute('SELECT COUNT(*) FROM catches').fetchone()[0]
+
+    @staticmethod
+    def _to_dict(row):
+        d = dict(row)
+        d.update(json.loads(d.pop('extra') or '{}'))
+        return d
@@ -6,12 +6,26 @@
 """
 
 import json
-import requests
-from bs4 import BeautifulSoup
+import os
 from datetime import datetime, timedelta
-import re
 import time
-import math
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import catch_record
+import dedup
+import ephemeris
+import fetcher
+import lexicon
+import parsers
+import run_metrics
+import species
+import stage_cache
+from fetcher import fetch
+from crawl_state import CrawlManifest
+from catch_store import CatchStore
+from source_health import SourceHealth, check_response
+from spots import INDEX as SPOT_INDEX
 
 # リクエストヘッダー
 HEADERS = {
@@ -20,25 +34,65 @@ HEADERS = {
     'Accept-Language': 'ja,en-US;q=0.7,en;q=0.3',
 }
 
-# 魚種の絵文字マッピング
-FISH_EMOJI = {
-    'アジ': '🐠', 'サバ': '🐟', 'メバル': '🐟', 'タチウオ': '🗡️',
-    'タコ': '🐙', 'イカ': '🦑', 'アオリイカ': '🦑', 'チヌ': '🐟',
-    'キス': '🐠', 'カレイ': '🐟', 'ハゼ': '🐠', 'カサゴ': '🐟',
-    'ガシラ': '🐟', 'シーバス': '🐟', 'ハマチ': '🐟', 'サワラ': '🐟',
-    'マダイ': '🎣', 'イワシ': '🐠', 'ハネ': '🐟', 'グレ': '🐟',
-    'サヨリ': '🐠', 'ウミタナゴ': '🐟', 'コブダイ': '🐟', 'フグ': '🐡',
-    'ウマヅラハギ': '🐟', 'カワハギ': '🐟', 'ツバス': '🐟', 'ブリ': '🐟',
-    'スズキ': '🐟', 'アイナメ': '🐟', 'ヒラメ': '🐟', 'ベラ': '🐠',
-    'ウナギ': '🐍', 'アナゴ': '🐍', 'サンバソウ': '🐟',
-}
+# 魚種の絵文字マッピング・HTMLパーサーは parsers.py に集約
+FISH_EMOJI = parsers.FISH_EMOJI
+get_emoji = parsers.get_emoji
+
+# 詳細ページのクロール状態（前回までに取り込んだページは再取得しない）
+MANIFEST = CrawlManifest()
+# 取得先ごとの健全性（続けて失敗・空振りする取得先はしばらくスキップ）
+HEALTH = SourceHealth()
+# 履歴ストアで他ソースとの重複を付け直す日数（遅れて載る投稿・ブログを拾える程度）
+DEDUP_DAYS = 14
+# 段ごとの出力のメモ（本文が変わらないページは解析し直さず、結果が変わらなければ保存・履歴DBの更新を飛ばす）
+STAGES = stage_cache.StageCache()
+# メモのキーに含めるコードのバージョン（パーサー・辞書・正規化・重複判定が変わったら計算し直す）
+PARSE_VERSION = stage_cache.code_version(parsers, lexicon, species, catch_record)
+NORMALIZE_VERSION = stage_cache.code_version(dedup, lexicon, species, catch_record)
+
+
+def parse_page(source, resp, parse, *args, count=len):
+    """parse(resp.text, *args) を実行し、解析時間と釣果数（count(結果)）をメトリクスに記録する
+    本文・引数・パーサーのコードが前回と同じなら解析せず保存済みの結果を返す"""
+    metrics = run_metrics.current()
+    key = stage_cache.digest(PARSE_VERSION, parse.__name__, args, resp.content)
+    result = STAGES.get('parse', key)
+    if result is not None:
+        metrics.record_parse(source, resp.url, 0.0, count(result))
+        return result
+    result = metrics.parse(source, resp.url, parse, resp.text, *args, count=count)
+    STAGES.put('parse', key, result)
+    return result
 
-def get_emoji(fish_name):
-    """魚名から絵文字を取得"""
-    for key, emoji in FISH_EMOJI.items():
-        if key in fish_name:
-            return emoji
-    return '🐟'
+
+def report_error(source, url, error):
+    run_metrics.current().record_error(source, url, error)
+
+
+def guarded(key, request):
+    """サーキットブレーカー越しに request(fetch の追加引数) を実行して釣果リストを返す（遮断中は空）"""
+    if not HEALTH.allow(key):
+        print(f"  ⏭️ {key} をスキップ（{HEALTH.describe(key)}）")
+        return []
+    try:
+        catches = request(HEALTH.fetch_options(key))
+    except Exception as e:
+        HEALTH.record_failure(key, e)
+        raise
+    HEALTH.record_success(key, len(catches))
+    return catches
+
+
+def collect_detail(source, url, parse):
+    """詳細ページを取得・解析（変化のないページは保存済みの解析結果を再利用）"""
+    if MANIFEST.is_settled(url):
+        return MANIFEST.cached_catches(url)
+    resp = fetch(url, headers=HEADERS, encoding='utf-8')
+    catches = MANIFEST.cached_catches(url, resp.content)
+    if catches is None:
+        date_str, catches = parse_page(source, resp, parse, count=lambda r: len(r[1]))
+        MANIFEST.record(url, resp.content, date_str, catches)
+    return catches
 
 
 # =============================================================
@@ -52,112 +106,26 @@ def collect_suma():
     try:
         # 釣果一覧ページ取得
         url = "https://sumasakana-park.com/fishing/"
-        resp = requests.get(url, headers=HEADERS, timeout=15)
-        resp.encoding = 'utf-8'
-        soup = BeautifulSoup(resp.text, 'lxml')
-        
-        # 各日の釣果リンクを取得（最新5件）
-        articles = soup.select('a[href*="/fishing/"]')
-        detail_urls = []
-        for a in articles:
-            href = a.get('href', '')
-            if href and '/fishing/' in href and href != '/fishing/' and 'page' not in href:
-                full_url = href if href.startswith('http') else f"https://sumasakana-park.com{href}"
-                if full_url not in detail_urls:
-                    detail_urls.append(full_url)
-        
-        detail_urls = detail_urls[:7]  # 最新7日分
+        resp = fetch(url, headers=HEADERS, encoding='utf-8')
+        detail_urls = parse_page('suma', resp, parsers.parse_suma_index, count=lambda r: 0)[:7]  # 最新7日分
         
         for detail_url in detail_urls:
             try:
-                time.sleep(1)  # 礼儀正しく
-                resp2 = requests.get(detail_url, headers=HEADERS, timeout=15)
-                resp2.encoding = 'utf-8'
-                soup2 = BeautifulSoup(resp2.text, 'lxml')
-                
-                # 日付取得
-                title = soup2.find('h2', string=re.compile(r'20\d{2}\.\d{2}\.\d{2}'))
-                date_str = ""
-                if title:
-                    m = re.search(r'(\d{4})\.(\d{2})\.(\d{2})', title.text)
-                    if m:
-                        date_str = f"{int(m.group(2))}/{int(m.group(3))}"
-                
-                # 天候・水温取得
-                water_temp = ""
-                tide = ""
-                weather = ""
-                for li in soup2.select('li'):
-                    text = li.get_text(strip=True)
-                    if '水温' in text:
-                        m = re.search(r'([\d.]+)℃', text)
-                        if m:
-                            water_temp = m.group(1) + "℃"
-                    if '潮' in text and '満潮' not in text and '干潮' not in text:
-                        for s in ['大潮', '中潮', '小潮', '長潮', '若潮']:
-                            if s in text:
-                                tide = s
-                                break
-                    if any(w in text for w in ['晴れ', '曇り', '雨', '晴']):
-                        for w in ['晴れ', '曇り時々雨', '曇り時々晴れ', '曇り', '雨のち曇り', '雨', '晴']:
-                            if w in text:
-                                weather = w
-                                break
-                
-                # 釣果テーブル取得
-                tables = soup2.select('table')
-                for table in tables:
-                    rows = table.select('tr')
-                    for row in rows:
-                        cells = row.select('td')
-                        if len(cells) >= 3:
-                            fish = cells[0].get_text(strip=True)
-                            size = cells[1].get_text(strip=True)
-                            count = cells[2].get_text(strip=True)
-                            if fish and any(c.isalpha() or ord(c) > 127 for c in fish):
-                                catches.append({
-                                    "fish": fish,
-                                    "size": size,
-                                    "count": count,
-                                    "method": "",
-                                    "user": "",
-                                    "date": date_str,
-                                    "emoji": get_emoji(fish),
-                                    "water_temp": water_temp,
-                                    "tide": tide,
-                                    "weather": weather,
-                                })
-                
-                # テーブルがない場合、本文からも抽出を試みる
-                if not any(c['date'] == date_str for c in catches):
-                    content = soup2.get_text()
-                    # "釣果なし" パターン
-                    if '釣果なし' in content or '目立った釣果なし' in content:
-                        catches.append({
-                            "fish": "釣果なし",
-                            "size": "-",
-                            "count": "-",
-                            "method": "",
-                            "user": "",
-                            "date": date_str,
-                            "emoji": "❌",
-                            "water_temp": water_temp,
-                            "tide": tide,
-                            "weather": weather,
-                        })
-                
+                catches.extend(collect_detail('suma', detail_url, parsers.parse_suma_detail))
             except Exception as e:
                 print(f"  ⚠️ 須磨詳細ページエラー: {detail_url} - {e}")
+                report_error('suma', detail_url, e)
                 continue
         
     except Exception as e:
         print(f"  ❌ 須磨海づり公園エラー: {e}")
+        report_error('suma', url, e)
     
     print(f"  ✅ 須磨: {len(catches)}件取得")
     return {
         "name": "須磨海づり公園",
         "area": "神戸",
-        "distance": 2.3,
+        "distance": SPOT_INDEX.distance("須磨海釣り公園"),
         "info": "ファミリー向け・足場良好・設備充実・駐車場あり",
         "source": "sumasakana-park.com",
         "catches": catches
@@ -174,124 +142,30 @@ def collect_hiraiso():
     
     try:
         url = "https://kobeumiduri.jp/fishresult/"
-        resp = requests.get(url, headers=HEADERS, timeout=15)
-        resp.encoding = 'utf-8'
-        soup = BeautifulSoup(resp.text, 'lxml')
-        
-        # 月間釣果テーブル取得
-        table = soup.select_one('table')
-        if table:
-            rows = table.select('tr')
-            for row in rows[1:]:  # ヘッダースキップ
-                cells = row.select('td')
-                if len(cells) >= 7:
-                    fish = cells[0].get_text(strip=True)
-                    rating = cells[1].get_text(strip=True)
-                    size = cells[2].get_text(strip=True)
-                    count = cells[3].get_text(strip=True)
-                    method = cells[4].get_text(strip=True)
-                    bait = cells[5].get_text(strip=True)
-                    location = cells[6].get_text(strip=True)
-                    
-                    if fish and fish != '魚種':
-                        catches.append({
-                            "fish": fish,
-                            "size": size,
-                            "count": count,
-                            "method": method,
-                            "user": f"エサ:{bait}",
-                            "date": "今月実績",
-                            "emoji": get_emoji(fish),
-                            "rating": rating,
-                            "location": location,
-                        })
+        resp = fetch(url, headers=HEADERS, encoding='utf-8')
         
-        # 個別釣果ページのリンク取得（最新5件）
-        result_links = []
-        for a in soup.select('a[href*="fishresult"]'):
-            href = a.get('href', '')
-            if re.search(r'20\d{2}.*\d{1,2}.*\d{1,2}', href):
-                full_url = href if href.startswith('http') else f"https://kobeumiduri.jp{href}"
-                if full_url not in result_links:
-                    result_links.append(full_url)
+        # 月間釣果テーブルと個別釣果ページのリンク（最新5件）
+        month_catches, result_links = parse_page('hiraiso', resp, parsers.parse_hiraiso_index,
+                                                 count=lambda r: len(r[0]))
+        catches.extend(month_catches)
         
         for detail_url in result_links[:5]:
             try:
-                time.sleep(1)
-                resp2 = requests.get(detail_url, headers=HEADERS, timeout=15)
-                resp2.encoding = 'utf-8'
-                soup2 = BeautifulSoup(resp2.text, 'lxml')
-                
-                # 日付取得
-                h2 = soup2.find('h2', string=re.compile(r'20\d{2}年'))
-                date_str = ""
-                if h2:
-                    m = re.search(r'(\d{1,2})月(\d{1,2})日', h2.text)
-                    if m:
-                        date_str = f"{m.group(1)}/{m.group(2)}"
-                
-                # 天候・水温
-                water_temp = ""
-                tide = ""
-                page_text = soup2.get_text()
-                m = re.search(r'水温\s*([\d.]+)', page_text)
-                if m:
-                    water_temp = m.group(1) + "℃"
-                for s in ['大潮', '中潮', '小潮', '長潮', '若潮']:
-                    if s in page_text:
-                        tide = s
-                        break
-                
-                # 個別釣果の詳細
-                fish_name = ""
-                size_val = ""
-                count_val = ""
-                method_val = ""
-                bait_val = ""
-                
-                for text_block in page_text.split('\n'):
-                    text_block = text_block.strip()
-                    if '魚種' in text_block:
-                        m = re.search(r'魚種\s*(.+)', text_block)
-                        if m: fish_name = m.group(1).strip()
-                    elif 'サイズ' in text_block:
-                        m = re.search(r'サイズ\s*(.+)', text_block)
-                        if m: size_val = m.group(1).strip()
-                    elif '尾数' in text_block:
-                        m = re.search(r'尾数\s*(.+)', text_block)
-                        if m: count_val = m.group(1).strip()
-                    elif '仕掛' in text_block:
-                        m = re.search(r'仕掛\s*(.+)', text_block)
-                        if m: method_val = m.group(1).strip()
-                    elif 'エサ' in text_block:
-                        m = re.search(r'エサ\s*(.+)', text_block)
-                        if m: bait_val = m.group(1).strip()
-                
-                if fish_name:
-                    catches.append({
-                        "fish": fish_name,
-                        "size": size_val,
-                        "count": count_val,
-                        "method": method_val,
-                        "user": f"エサ:{bait_val}" if bait_val else "",
-                        "date": date_str,
-                        "emoji": get_emoji(fish_name),
-                        "water_temp": water_temp,
-                        "tide": tide,
-                    })
-                    
+                catches.extend(collect_detail('hiraiso', detail_url, parsers.parse_hiraiso_detail))
             except Exception as e:
                 print(f"  ⚠️ 平磯詳細ページエラー: {e}")
+                report_error('hiraiso', detail_url, e)
                 continue
     
     except Exception as e:
         print(f"  ❌ 平磯海づり公園エラー: {e}")
+        report_error('hiraiso', url, e)
     
     print(f"  ✅ 平磯: {len(catches)}件取得")
     return {
         "name": "平磯海づり公園",
         "area": "神戸",
-        "distance": 8.5,
+        "distance": SPOT_INDEX.distance("平磯海づり公園"),
         "info": "垂水区・足場良好・投げ釣り人気・駐車場あり",
         "source": "kobeumiduri.jp",
         "catches": catches
@@ -306,80 +180,15 @@ def collect_kanpari():
     print("📡 [3/5] カンパリから収集中...")
     catches = []
     
-    areas = [
-        ("神戸東部", "https://fishing.ne.jp/fishingpost/area/kobe-tobu", "神戸"),
-        ("神戸西部", "https://fishing.ne.jp/fishingpost/area/kobe-seibu", "神戸"),
-        ("明石", "https://fishing.ne.jp/fishingpost/area/akashi", "明石"),
-    ]
-    
-    for area_name, url, area_tag in areas:
+    for slug, area_name in parsers.KANPARI_AREAS.items():
+        url = parsers.KANPARI_AREA_URL + slug
         try:
-            time.sleep(1)
-            resp = requests.get(url, headers=HEADERS, timeout=15)
-            resp.encoding = 'utf-8'
-            soup = BeautifulSoup(resp.text, 'lxml')
-            
-            # 投稿記事を取得
-            articles = soup.select('a[href*="fishingpost&p="]')
-            
-            for article in articles[:5]:
-                title = article.select_one('h1, h2, h3')
-                title_text = title.get_text(strip=True) if title else ""
-                
-                # 日付取得
-                date_str = ""
-                date_elem = article.find(string=re.compile(r'20\d{2}/\d{2}/\d{2}'))
-                if date_elem:
-                    m = re.search(r'(\d{4})/(\d{2})/(\d{2})', str(date_elem))
-                    if m:
-                        date_str = f"{int(m.group(2))}/{int(m.group(3))}"
-                
-                # ユーザー名
-                user_elem = article.select_one('a[href*="profile"]')
-                user_name = user_elem.get_text(strip=True) if user_elem else ""
-                
-                # 説明文
-                desc = ""
-                desc_elem = article.select_one('p') or article.find(string=re.compile(r'.{10,}'))
-                if desc_elem:
-                    desc = str(desc_elem).strip()[:100]
-                
-                # 魚種をタグから取得
-                fish_tags = article.select('a[href*="fish="]')
-                fish_name = ""
-                for ft in fish_tags:
-                    t = ft.get_text(strip=True).replace('釣り', '').replace('釣果', '')
-                    if t:
-                        fish_name = t
-                        break
-                
-                # 仕掛けタグ
-                method_tags = article.select('a[href*="howto="]')
-                method = ""
-                for mt in method_tags:
-                    t = mt.get_text(strip=True).replace('釣果', '')
-                    if t:
-                        method = t
-                        break
-                
-                if not fish_name and title_text:
-                    fish_name = title_text
-                
-                if fish_name or title_text:
-                    catches.append({
-                        "fish": fish_name or title_text,
-                        "size": "",
-                        "count": "",
-                        "method": method,
-                        "user": user_name,
-                        "date": date_str,
-                        "emoji": get_emoji(fish_name or title_text),
-                        "description": desc,
-                        "area_detail": area_name,
-                    })
-            
+            catches.extend(guarded(f"kanpari:{slug}", lambda opts: parse_page(
+                'kanpari', check_response(fetch(url, headers=HEADERS, encoding='utf-8', **opts)),
+                parsers.parse_kanpari_area, area_name)))
         except Exception as e:
             print(f"  ⚠️ カンパリ({area_name})エラー: {e}")
+            report_error('kanpari', url, e)
             continue
     
     print(f"  ✅ カンパリ: {len(catches)}件取得")
@@ -410,71 +219,12 @@ def collect_fishingmax():
         
         for url in urls_to_try:
             try:
-                time.sleep(1)
-                resp = requests.get(url, headers=HEADERS, timeout=15)
-                if resp.status_code == 200:
-                    resp.encoding = 'utf-8'
-                    soup = BeautifulSoup(resp.text, 'lxml')
-                    
-                    # 記事カードを取得
-                    articles = soup.select('article, .post-item, .card, [class*="post"], [class*="article"]')
-                    if not articles:
-                        articles = soup.select('a[href*="fishingpost/"]')
-                    
-                    for article in articles[:10]:
-                        text = article.get_text(strip=True)
-                        
-                        # 日付抽出
-                        date_str = ""
-                        m = re.search(r'(\d{4})\.(\d{1,2})\.(\d{1,2})', text)
-                        if m:
-                            date_str = f"{int(m.group(2))}/{int(m.group(3))}"
-                        
-                        # テキストから魚種検出
-                        found_fish = []
-                        for fish_key in FISH_EMOJI.keys():
-                            if fish_key in text:
-                                found_fish.append(fish_key)
-                        
-                        # サイズ抽出
-                        size = ""
-                        m = re.search(r'([\d.]+)\s*[～~-]\s*([\d.]+)\s*[cC㎝]', text)
-                        if m:
-                            size = f"{m.group(1)}-{m.group(2)}cm"
-                        else:
-                            m = re.search(r'([\d.]+)\s*[cC㎝]', text)
-                            if m:
-                                size = f"~{m.group(1)}cm"
-                        
-                        title_elem = article.select_one('h2, h3, .title')
-                        title = title_elem.get_text(strip=True)[:60] if title_elem else text[:60]
-                        
-                        for fish in found_fish[:2]:
-                            catches.append({
-                                "fish": fish,
-                                "size": size,
-                                "count": "",
-                                "method": "",
-                                "user": "",
-                                "date": date_str,
-                                "emoji": get_emoji(fish),
-                                "description": title,
-                            })
-                        
-                        if not found_fish and date_str:
-                            catches.append({
-                                "fish": title[:20],
-                                "size": size,
-                                "count": "",
-                                "method": "",
-                                "user": "",
-                                "date": date_str,
-                                "emoji": "🐟",
-                                "description": title,
-                            })
-                    
+                catches.extend(guarded(f"fishingmax:{url.rsplit('=', 1)[-1]}", lambda opts: parse_page(
+                    'fishingmax', check_response(fetch(url, headers=HEADERS, encoding='utf-8', **opts)),
+                    parsers.parse_fishingmax_shop)))
             except Exception as e:
                 print(f"  ⚠️ フィッシングマックス直接アクセスエラー: {e}")
+                report_error('fishingmax', url, e)
         
         # 直接アクセスで取れなかった場合、Google検索にフォールバック
         if not catches:
@@ -487,54 +237,37 @@ def collect_fishingmax():
             }
             
             try:
-                time.sleep(2)
-                resp = requests.get(search_url, params=params, headers=HEADERS, timeout=15)
-                if resp.status_code == 200:
-                    soup = BeautifulSoup(resp.text, 'lxml')
-                    
-                    for result in soup.select('div.g, div[data-sokoban-container]'):
-                        title_el = result.select_one('h3')
-                        snippet_el = result.select_one('span, .VwiC3b')
-                        
-                        if title_el:
-                            title = title_el.get_text(strip=True)
-                            snippet = snippet_el.get_text(strip=True) if snippet_el else ""
-                            combined = title + " " + snippet
-                            
-                            found_fish = []
-                            for fish_key in FISH_EMOJI.keys():
-                                if fish_key in combined:
-                                    found_fish.append(fish_key)
-                            
-                            date_str = ""
-                            m = re.search(r'(\d{1,2})/(\d{1,2})', combined)
-                            if m:
-                                date_str = f"{m.group(1)}/{m.group(2)}"
-                            
-                            for fish in found_fish[:2]:
-                                catches.append({
-                                    "fish": fish,
-                                    "size": "",
-                                    "count": "",
-                                    "method": "",
-                                    "user": "",
-                                    "date": date_str,
-                                    "emoji": get_emoji(fish),
-                                    "description": title[:60],
-                                })
-                            
+                catches.extend(guarded('fishingmax:google', lambda opts: parse_page(
+                    'fishingmax', check_response(fetch(search_url, params=params, headers=HEADERS, **opts)),
+                    parsers.parse_fishingmax_google)))
             except Exception as e:
                 print(f"  ⚠️ Google検索エラー: {e}")
+                report_error('fishingmax', search_url, e)
+        
+        # ブログの釣果記事（釣り場名が書かれた記事だけ取り込む）
+        for url in ["https://fishingmax.co.jp/blog/category/fishing-result", "https://fishingmax.co.jp/blog"]:
+            try:
+                blog = guarded('fishingmax:blog', lambda opts: parse_page(
+                    'fishingmax_blog', check_response(fetch(url, headers=HEADERS, encoding='utf-8', **opts)),
+                    parsers.parse_fishingmax_blog))
+            except Exception as e:
+                print(f"  ⚠️ フィッシングマックスブログエラー: {e}")
+                report_error('fishingmax_blog', url, e)
+                continue
+            catches.extend(blog)
+            if blog:
+                break
     
     except Exception as e:
         print(f"  ❌ フィッシングマックスエラー: {e}")
+        report_error('fishingmax', '', e)
     
     print(f"  ✅ フィッシングマックス: {len(catches)}件取得")
     return {
         "name": "フィッシングマックス",
         "area": "神戸",
         "distance": None,
-        "info": "釣具店の釣果レポート（神戸ハーバー店・垂水店）",
+        "info": "釣具店の釣果レポート（神戸ハーバー店・垂水店・ブログ）",
         "source": "fishingmax.co.jp",
         "catches": catches
     }
@@ -556,84 +289,29 @@ def collect_anglers():
             'tbs': 'qdr:w',
         }
         
-        time.sleep(2)
-        resp = requests.get(search_url, params=params, headers=HEADERS, timeout=15)
-        
-        if resp.status_code == 200:
-            soup = BeautifulSoup(resp.text, 'lxml')
-            
-            for result in soup.select('div.g, div[data-sokoban-container]'):
-                title_el = result.select_one('h3')
-                snippet_el = result.select_one('span, .VwiC3b')
-                
-                if title_el:
-                    title = title_el.get_text(strip=True)
-                    snippet = snippet_el.get_text(strip=True) if snippet_el else ""
-                    combined = title + " " + snippet
-                    
-                    found_fish = []
-                    for fish_key in FISH_EMOJI.keys():
-                        if fish_key in combined:
-                            found_fish.append(fish_key)
-                    
-                    # エリア抽出
-                    area = "神戸"
-                    for a in ['明石', '芦屋', '須磨', '垂水', '平磯']:
-                        if a in combined:
-                            area = a
-                            break
-                    
-                    date_str = ""
-                    m = re.search(r'(\d{1,2})月(\d{1,2})日', combined)
-                    if m:
-                        date_str = f"{m.group(1)}/{m.group(2)}"
-                    
-                    for fish in found_fish[:2]:
-                        catches.append({
-                            "fish": fish,
-                            "size": "",
-                            "count": "",
-                            "method": "",
-                            "user": "",
-                            "date": date_str,
-                            "emoji": get_emoji(fish),
-                            "description": title[:60],
-                            "area_detail": area,
-                        })
+        try:
+            catches.extend(guarded('anglers:google', lambda opts: parse_page(
+                'anglers', check_response(fetch(search_url, params=params, headers=HEADERS, **opts)),
+                parsers.parse_anglers_google)))
+        except Exception as e:
+            print(f"  ⚠️ Google検索エラー: {e}")
+            report_error('anglers', search_url, e)
         
         # Google検索がブロックされた場合、アングラーズ兵庫県ページを試行
         if not catches:
             print("  ↪ アングラーズ兵庫県ページを直接試行...")
             try:
-                time.sleep(1)
                 url = "https://anglers.jp/prefectures/28/catches"
-                resp = requests.get(url, headers=HEADERS, timeout=15)
-                if resp.status_code == 200 and len(resp.text) > 500:
-                    soup = BeautifulSoup(resp.text, 'lxml')
-                    
-                    for card in soup.select('[class*="catch"], [class*="card"], article'):
-                        text = card.get_text(strip=True)
-                        found_fish = []
-                        for fish_key in FISH_EMOJI.keys():
-                            if fish_key in text:
-                                found_fish.append(fish_key)
-                        
-                        for fish in found_fish[:1]:
-                            catches.append({
-                                "fish": fish,
-                                "size": "",
-                                "count": "",
-                                "method": "",
-                                "user": "",
-                                "date": "",
-                                "emoji": get_emoji(fish),
-                                "description": text[:60],
-                            })
+                catches.extend(guarded('anglers:hyogo', lambda opts: parse_page(
+                    'anglers', check_response(fetch(url, headers=HEADERS, **opts), min_length=500),
+                    parsers.parse_anglers_page)))
             except Exception as e:
                 print(f"  ⚠️ アングラーズ直接アクセスエラー: {e}")
+                report_error('anglers', url, e)
     
     except Exception as e:
         print(f"  ❌ アングラーズエラー: {e}")
+        report_error('anglers', search_url, e)
     
     print(f"  ✅ アングラーズ: {len(catches)}件取得")
     return {
@@ -649,189 +327,125 @@ def collect_anglers():
 # =============================================================
 # 潮汐・天文データ計算
 # =============================================================
-def calculate_moon_phase():
-    """月齢を計算"""
-    now = datetime.now()
-    # 簡易月齢計算（ブラウンの近似式）
-    year = now.year
-    month = now.month
-    day = now.day
-    
-    if month <= 2:
-        year -= 1
-        month += 12
-    
-    a = int(year / 100)
-    b = 2 - a + int(a / 4)
-    jd = int(365.25 * (year + 4716)) + int(30.6001 * (month + 1)) + day + b - 1524.5
-    
-    # 月齢計算
-    moon_age = (jd - 2451550.1) % 29.530588853
-    moon_age = round(moon_age, 1)
-    
-    # 月の名前
-    if moon_age < 1.84566:
-        name, icon = "新月", "🌑"
-    elif moon_age < 5.53699:
-        name, icon = "三日月", "🌒"
-    elif moon_age < 9.22831:
-        name, icon = "上弦の月", "🌓"
-    elif moon_age < 12.91963:
-        name, icon = "十三夜", "🌔"
-    elif moon_age < 16.61096:
-        name, icon = "満月", "🌕"
-    elif moon_age < 20.30228:
-        name, icon = "十八夜", "🌖"
-    elif moon_age < 23.99361:
-        name, icon = "下弦の月", "🌗"
-    elif moon_age < 27.68493:
-        name, icon = "二十六夜", "🌘"
-    else:
-        name, icon = "新月", "🌑"
-    
-    # 潮名（簡易計算）
-    if moon_age <= 2 or (13.5 <= moon_age <= 16.5) or moon_age >= 28:
-        tide = "大潮"
-    elif (3 <= moon_age <= 5) or (17 <= moon_age <= 19):
-        tide = "中潮"
-    elif (5 < moon_age <= 7) or (19 < moon_age <= 21):
-        tide = "中潮"
-    elif (7 < moon_age <= 9) or (21 < moon_age <= 23):
-        tide = "小潮"
-    elif (9 < moon_age <= 10.5) or (23 < moon_age <= 24.5):
-        tide = "長潮"
-    else:
-        tide = "若潮"
-    
+def calculate_moon_phase(day=None):
+    """月齢と潮名（ephemeris の暦テーブルから）"""
+    e = ephemeris.day(day)
     return {
-        "age": moon_age,
-        "name": name,
-        "icon": icon,
-        "tide": tide,
+        "age": e["moon_age"],
+        "name": e["moon_name"],
+        "icon": e["moon_icon"],
+        "tide": e["tide"],
     }
 
 
-def calculate_sun_times():
-    """日の出・日の入り時刻の近似計算（神戸）"""
-    now = datetime.now()
-    day_of_year = now.timetuple().tm_yday
-    
-    # 神戸（北緯34.69, 東経135.19）での簡易計算
-    lat = 34.69
-    
-    # 赤緯の近似
-    declination = -23.44 * math.cos(math.radians(360/365 * (day_of_year + 10)))
-    
-    # 日の出・日の入り時角
-    cos_hour_angle = (-0.01454 - math.sin(math.radians(lat)) * math.sin(math.radians(declination))) / \
-                     (math.cos(math.radians(lat)) * math.cos(math.radians(declination)))
-    
-    if -1 <= cos_hour_angle <= 1:
-        hour_angle = math.degrees(math.acos(cos_hour_angle))
-        
-        # UTC時刻を計算し、JSTに変換
-        noon_offset = 12 - (135.19 / 15)  # 経度補正
-        sunrise_utc = 12 - hour_angle / 15 + noon_offset
-        sunset_utc = 12 + hour_angle / 15 + noon_offset
-        
-        sunrise_jst = sunrise_utc + 9
-        sunset_jst = sunset_utc + 9
-        
-        sunrise_h = int(sunrise_jst)
-        sunrise_m = int((sunrise_jst - sunrise_h) * 60)
-        sunset_h = int(sunset_jst)
-        sunset_m = int((sunset_jst - sunset_h) * 60)
-        
-        sunrise = f"{sunrise_h:02d}:{sunrise_m:02d}"
-        sunset = f"{sunset_h:02d}:{sunset_m:02d}"
-    else:
-        sunrise = "06:30"
-        sunset = "17:30"
-    
-    return sunrise, sunset
+def calculate_sun_times(day=None):
+    """日の出・日の入り時刻（神戸）"""
+    e = ephemeris.day(day)
+    return e["sunrise"], e["sunset"]
 
 
-def calculate_mazume(sunrise, sunset):
-    """まずめ時間を計算"""
-    # 朝まずめ：日の出30分前〜日の出30分後
-    sr_h, sr_m = map(int, sunrise.split(':'))
-    sr_total = sr_h * 60 + sr_m
-    am_start_total = sr_total - 30
-    am_end_total = sr_total + 30
-    
-    am_start = f"{am_start_total // 60:02d}:{am_start_total % 60:02d}"
-    am_end = f"{am_end_total // 60:02d}:{am_end_total % 60:02d}"
-    
-    # 夕まずめ：日の入り30分前〜日の入り30分後
-    ss_h, ss_m = map(int, sunset.split(':'))
-    ss_total = ss_h * 60 + ss_m
-    pm_start_total = ss_total - 30
-    pm_end_total = ss_total + 30
-    
-    pm_start = f"{pm_start_total // 60:02d}:{pm_start_total % 60:02d}"
-    pm_end = f"{pm_end_total // 60:02d}:{pm_end_total % 60:02d}"
-    
+def calculate_mazume(day=None):
+    """まずめ時間（日の出・日の入りの前後30分）"""
+    m = ephemeris.day(day)["mazume"]
     return {
-        "morning": f"{am_start} - {am_end}",
-        "evening": f"{pm_start} - {pm_end}",
+        "morning": m["morning"],
+        "evening": m["evening"],
     }
 
 
+def calculate_tide_times(day=None):
+    """満潮・干潮の目安時刻"""
+    e = ephemeris.day(day)
+    return {"high": e["high"], "low": e["low"]}
+
+
 # =============================================================
 # メイン処理
 # =============================================================
 def save_data(data, filename='fishing-data.json'):
     """データをJSONファイルに保存"""
-    # 既存データがあれば読み込んでマージ
-    try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            existing = json.load(f)
-            existing_catches = {}
-            for spot in existing.get('spots', []):
-                key = spot.get('source', spot.get('name', ''))
-                for c in spot.get('catches', []):
-                    catch_key = f"{key}_{c.get('fish','')}_{c.get('date','')}_{c.get('size','')}"
-                    existing_catches[catch_key] = True
-    except (FileNotFoundError, json.JSONDecodeError):
-        existing_catches = {}
-    
     print(f"💾 データを {filename} に保存中...")
     with open(filename, 'w', encoding='utf-8') as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
     print("✅ 保存完了！")
 
 
-def run():
-    """全データ収集を実行"""
+COLLECTORS = [
+    collect_suma,
+    collect_hiraiso,
+    collect_kanpari,
+    collect_fishingmax,
+    collect_anglers,
+]
+
+
+def _run_collector(collector):
+    with run_metrics.current().stage(collector.__name__):
+        return collector()
+
+
+def collect_all(concurrent=True):
+    """全ソースから収集（concurrent=True ならソースごとに並列実行）"""
+    if not concurrent:
+        return [_run_collector(collector) for collector in COLLECTORS]
+    # ソースはそれぞれ別ホストなので並列化し、同一ホストの間隔は host_scheduler で守る
+    with ThreadPoolExecutor(max_workers=len(COLLECTORS)) as executor:
+        futures = [executor.submit(_run_collector, collector) for collector in COLLECTORS]
+        return [f.result() for f in futures]
+
+
+def run(concurrent=True, replay=False, replay_at=None, output='fishing-data.json'):
+    """全データ収集を実行（replay=True ならキャッシュ済みHTMLだけで再解析）"""
+    # 実行メトリクス（リプレイは別の job として記録し、本番の推移に混ぜない）
+    metrics = run_metrics.start('replay' if replay else 'collect')
+    try:
+        return _run(metrics, concurrent, replay, replay_at, output)
+    finally:
+        metrics.write()
+
+
+def _run(metrics, concurrent, replay, replay_at, output):
+    global MANIFEST, HEALTH, STAGES
     print("=" * 60)
     print("🎣 神戸釣り情報 自動収集 v2.0")
     print(f"📅 {datetime.now().strftime('%Y年%m月%d日 %H:%M')}")
     print("=" * 60)
     
-    # 各ソースから収集
-    spots = []
-    
-    spot1 = collect_suma()
-    spots.append(spot1)
-    
-    spot2 = collect_hiraiso()
-    spots.append(spot2)
-    
-    spot3 = collect_kanpari()
-    spots.append(spot3)
-    
-    spot4 = collect_fishingmax()
-    spots.append(spot4)
+    if replay:
+        # パーサー確認用なので解析結果の再利用はせず、全ページを解析し直す
+        fetcher.enable_replay(replay_at)
+        MANIFEST = CrawlManifest(enabled=False)
+        HEALTH = SourceHealth(enabled=False)
+        STAGES = stage_cache.StageCache(enabled=False)
+        print(f"📼 リプレイモード（{replay_at.strftime('%Y-%m-%d %H:%M') if replay_at else '最新'}のキャッシュ）")
     
-    spot5 = collect_anglers()
-    spots.append(spot5)
+    # 各ソースから収集
+    started = time.monotonic()
+    with metrics.stage('collect'):
+        spots = collect_all(concurrent=concurrent)
+    print(f"⏱️ 収集時間: {time.monotonic() - started:.1f}秒（{'並列' if concurrent else '逐次'}）")
+    
+    with metrics.stage('manifest'):
+        MANIFEST.save()
+        HEALTH.save()
+    print(f"♻️ 詳細ページ: {MANIFEST.fetches}件解析 / {MANIFEST.hits}件再利用")
+    if HEALTH.skipped:
+        print(f"⏭️ 遮断中でスキップ: {', '.join(HEALTH.skipped)}")
+    
+    # ソースをまたいだ同じ釣果をまとめる（ソースの並び順＝優先順）
+    with metrics.stage('dedup'):
+        key = stage_cache.digest(NORMALIZE_VERSION, [{**s, 'catches': [c.to_dict() for c in s['catches']]} for s in spots])
+        spots, merged = STAGES.memo('normalize', key, lambda: (spots, dedup.dedup_spots(spots)))
+    print(f"🔗 重複統合: {merged}件")
     
     # 潮汐・天文データ
-    moon = calculate_moon_phase()
-    sunrise, sunset = calculate_sun_times()
-    mazume = calculate_mazume(sunrise, sunset)
-    
     now = datetime.now()
+    with metrics.stage('ephemeris'):
+        moon = calculate_moon_phase(now)
+        sunrise, sunset = calculate_sun_times(now)
+        mazume = calculate_mazume(now)
+        tide_times = calculate_tide_times(now)
+    
     weekday_names = ['月', '火', '水', '木', '金', '土', '日']
     
     # 集計
@@ -840,7 +454,7 @@ def run():
     data = {
         "lastUpdated": now.isoformat(),
         "lastUpdatedDisplay": f"{now.year}年{now.month}月{now.day}日({weekday_names[now.weekday()]})",
-        "spots": spots,
+        "spots": [{**s, "catches": [c.to_dict() for c in s['catches']]} for s in spots],
         "tideInfo": {
             "date": f"{now.year}年{now.month}月{now.day}日({weekday_names[now.weekday()]})",
             "tide": moon["tide"],
@@ -850,6 +464,8 @@ def run():
             "sunrise": sunrise,
             "sunset": sunset,
             "mazume": mazume,
+            "highTide": tide_times["high"],
+            "lowTide": tide_times["low"],
         },
         "stats": {
             "totalCatches": total_catches,
@@ -858,7 +474,32 @@ def run():
         }
     }
     
-    save_data(data)
+    # 釣果と潮汐が前回保存した内容と同じなら書き直さない（更新時刻だけの差分を出さない）
+    data_key = stage_cache.digest(data['spots'], data['tideInfo'], output)
+    if STAGES.unchanged('data', data_key) and os.path.exists(output):
+        print(f"♻️ 収集結果に変化なし: {output} の保存をスキップ")
+    else:
+        with metrics.stage('save'):
+            save_data(data, output)
+        STAGES.mark('data', data_key)
+    
+    # 履歴ストアに追記（リプレイは解析確認用なので履歴には残さない。釣果が前回と同じなら触らない）
+    store_key = stage_cache.digest(data['spots'])
+    if not replay and STAGES.unchanged('store', store_key):
+        print("♻️ 収集結果に変化なし: 履歴ストアの更新をスキップ")
+    elif not replay:
+        with metrics.stage('store'), CatchStore() as store:
+            added = store.add_spots(spots, collected_at=now)
+            # 以前の形式（エリア名・ソース名）で登録された行の釣り場をカタログの釣り場名に
+            moved = store.resolve_spots()
+            if moved:
+                print(f"🗃️ 履歴ストア: 釣り場名を解決し直した行 {moved}件")
+            # 前回までに登録された他ソースの釣果との重複も付け直す
+            dups = store.mark_duplicates(since=(now - timedelta(days=DEDUP_DAYS)).date())
+            print(f"🗃️ 履歴ストア: 新規 {added}件 / 累計 {store.count()}件（直近{DEDUP_DAYS}日の重複 {dups}件）")
+        STAGES.mark('store', store_key)
+    STAGES.save()
+    print(f"♻️ メモ再利用: {STAGES.summary() or 'なし'}")
     
     print("=" * 60)
     print(f"🎉 データ収集完了！ 合計 {total_catches} 件")
@@ -870,4 +511,12 @@ def run():
 
 
 if __name__ == "__main__":
-    run() 
+    parser = argparse.ArgumentParser(description="神戸釣り情報 自動データ収集")
+    parser.add_argument('--sequential', action='store_true', help='ソースを1つずつ順番に収集する')
+    parser.add_argument('--replay', action='store_true', help='ネットワークを使わずキャッシュ済みHTMLから再解析する')
+    parser.add_argument('--replay-at', type=datetime.fromisoformat, help='リプレイに使うスナップショットの時刻 (例: 2026-02-10T12:00)')
+    parser.add_argument('--output', help='出力先JSONファイル（既定: fishing-data.json、リプレイ時は fishing-data.replay.json）')
+    args = parser.parse_args()
+    replay = args.replay or args.replay_at is not None
+    output = args.output or ('fishing-data.replay.json' if replay else 'fishing-data.json')
+    run(concurrent=not args.sequential, replay=replay, replay_at=args.replay_at, output=output)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+クロール状態（詳細ページのマニフェスト）
+URL → 本文ハッシュ・取得日時・解析済み釣果 を保存し、過去日の詳細ページは再取得しない
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+
+from catch_record import CatchRecord
+from fetcher import CACHE_DIR
+
+MANIFEST_PATH = os.path.join(CACHE_DIR, 'crawl-manifest.json')
+# これより古いエントリは一覧から消えたものとして削除
+KEEP_DAYS = 60
+
+
+def content_hash(content):
+    """本文のハッシュ"""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+
+def resolve_page_date(date_str, ref):
+    """'M/D' 形式の日付を ref 基準で年付きの date に変換"""
+    try:
+        month, day = (int(x) for x in date_str.split('/')[:2])
+        year = ref.year - 1 if month > ref.month else ref.year
+        return datetime(year, month, day).date()
+    except (ValueError, AttributeError):
+        return None
+
+
+class CrawlManifest:
+    """詳細ページごとの取得状態"""
+
+    def __init__(self, path=MANIFEST_PATH, enabled=True):
+        """enabled=False ならキャッシュを使わず常に取得・解析する（リプレイ時など）"""
+        self.path = path
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.fetches = 0
+        self._entries = {}
+        if enabled:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self._entries = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                pass
+
+    def get(self, url):
+        with self._lock:
+            return self._entries.get(url)
+
+    def is_settled(self, url):
+        """ページの日付が終わってから取得済みなら、もう内容は変わらないとみなす"""
+        entry = self.get(url)
+        if not entry:
+            return False
+        fetched_at = datetime.fromisoformat(entry['fetched_at'])
+        page_date = resolve_page_date(entry.get('page_date', ''), fetched_at)
+        return page_date is not None and fetched_at.date() > page_date
+
+    def cached_catches(self, url, content=None):
+        """再利用できる解析結果を返す（content 指定時はハッシュ一致が条件）"""
+        entry = self.get(url)
+        if not entry:
+            return None
+        if content is not None and entry['hash'] != content_hash(content):
+            return None
+        with self._lock:
+            self.hits += 1
+            if content is not None:
+                # 内容が同じことを確認できた時刻を記録（翌日以降は確定扱いになる）
+                entry['fetched_at'] = datetime.now().isoformat(timespec='seconds')
+        return [CatchRecord.from_dict(c) for c in entry['catches']]
+
+    def record(self, url, content, page_date, catches):
+        with self._lock:
+            self.fetches += 1
+            self._entries[url] = {
+                'hash': content_hash(content),
+                'fetched_at': datetime.now().isoformat(timespec='seconds'),
+                'page_date': page_date,
+                'catches': [c.to_dict() for c in catches],
+            }
+
+    def save(self):
+        """古いエントリを整理して保存"""
+        if not self.enabled:
+            return
+        cutoff = datetime.now() - timedelta(days=KEEP_DAYS)
+        with self._lock:
+            self._entries = {
+                url: e for url, e in self._entries.items()
+                if datetime.fromisoformat(e['fetched_at']) >= cutoff
+            }
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp = self.path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ソースをまたいだ釣果の重複判定・統合
+同じ釣果がカンパリの投稿・アングラーズの検索結果・フィッシングマックスのブログに載ることがあるので、
+  1. 正規化した指紋（魚種ID・釣り場・日付・サイズ帯）のハッシュ索引で完全一致をまとめ、
+  2. (魚種, 日付) でブロック分けし、ブロック内をサイズ順に並べて近くの WINDOW 件とだけ類似度を比べる
+ことで、全件の総当たりをせずにほぼ線形時間で重複をまとめる
+
+候補は優先度の高い順に渡す（各グループで最初の候補が代表になり、残りはその重複になる）
+同じソース内の釣果同士はまとめない（別の釣り人の同じような釣果があり得るため。ソース内の重複は catch_store のキーで除く）
+"""
+
+import hashlib
+import json
+import math
+from datetime import date
+from typing import NamedTuple
+
+import lexicon
+import spots
+from catch_record import parse_count, parse_date, parse_size
+from species import species_id
+
+# 類似度がこれ以上なら同じ釣果とみなす
+THRESHOLD = 0.75
+# ブロック内で比べる前後の件数
+WINDOW = 8
+# 指紋のサイズ帯（cm）
+SIZE_BUCKET = 5
+# サイズ・匹数の範囲が重ならなくても近いとみなす割合
+SIZE_TOLERANCE = 0.1
+COUNT_TOLERANCE = 0.2
+# 類似度の重み（釣り場・サイズ・匹数・本文）
+WEIGHTS = (0.35, 0.3, 0.15, 0.2)
+
+
+class Candidate(NamedTuple):
+    """重複判定に使う正規化済みの特徴"""
+    source: str
+    species: str
+    spot: str        # 正規化した釣り場名（不明は ''）
+    day: int         # 日付の序数（不明は 0）
+    size_lo: float   # 不明は nan
+    size_hi: float
+    count_lo: float
+    count_hi: float
+    text: str        # 本文・釣り方など（比較用に正規化）
+
+
+def canonical_spot(*texts):
+    """文字列のどれかに出てくる最初の釣り場名（なければエリア名（"神戸東部"・"垂水" など）の中の釣り場、それもなければ ''）
+    広いエリアは文字列全体の手がかりの言葉でエリア内の釣り場を選ぶ（spots.SpotIndex.area_spot）"""
+    for t in texts:
+        spot = lexicon.first_spot(lexicon.scan(t or ''))
+        if spot:
+            return spot
+    hint = ' '.join(t or '' for t in texts)
+    return next((s for s in (spots.INDEX.area_spot(t, hint) for t in texts) if s), '')
+
+
+def catch_spot(extra, *names):
+    """釣果の釣り場名（extra の場所・本文・エリア名、names の順に探す。カタログの釣り場にならなければ ''）"""
+    return canonical_spot(extra.get('location'), extra.get('description'), extra.get('area_detail'), *names)
+
+
+def _num(v):
+    return math.nan if v is None else float(v)
+
+
+def _text(*parts):
+    return ''.join(''.join((p or '').split()) for p in parts).lower()
+
+
+def _described(description, size, count):
+    """本文の言及で欠けているサイズ・匹数を補う（カンパリの投稿は本文にしか書かれていないことが多い）"""
+    mentions = lexicon.scan(description or '')
+    if size[0] is None:
+        size = parse_size(next((m.text for m in mentions if m.kind == 'size'), ''))[:2]
+    if count[0] is None:
+        count = parse_count(next((m.text for m in mentions if m.kind == 'count'), ''))
+    return lexicon.first_spot(mentions), [_num(v) for v in (*size, *count)]
+
+
+def from_record(rec, source, spot=''):
+    """CatchRecord から（spot は収集元の名前など、釣り場名の手がかり）"""
+    description = rec.extra.get('description')
+    found, nums = _described(description, (rec.size_min, rec.size_max), (rec.count_min, rec.count_max))
+    return Candidate(
+        source,
+        rec.species or species_id(rec.fish),
+        found or canonical_spot(rec.extra.get('area_detail'), rec.extra.get('location'), spot),
+        rec.date.toordinal() if rec.date else 0,
+        *nums,
+        _text(description, rec.method),
+    )
+
+
+def from_row(row):
+    """catch_store の行（sqlite3.Row）から"""
+    extra = json.loads(row['extra'] or '{}')
+    description = extra.get('description')
+    found, nums = _described(description, (row['size_min'], row['size_max']), (row['count_min'], row['count_max']))
+    return Candidate(
+        row['source'],
+        row['species'] or species_id(row['fish']),
+        found or canonical_spot(extra.get('location'), row['spot']),
+        date.fromisoformat(row['date']).toordinal() if row['date'] else 0,
+        *nums,
+        _text(description, row['method']),
+    )
+
+
+def from_site(c, spot, source, today=None):
+    """generate_site の釣果 {f, s, ct, t, m, ...} から"""
+    day = parse_date(c.get('t', ''), today)
+    smin, smax, _ = parse_size(c.get('s', ''))
+    cmin, cmax = parse_count(c.get('ct', ''))
+    return Candidate(source, species_id(c['f']) or c['f'], canonical_spot(spot), day.toordinal() if day else 0,
+                     _num(smin), _num(smax), _num(cmin), _num(cmax), _text(c.get('m')))
+
+
+def fingerprint(c):
+    """完全一致判定用の指紋（魚種・釣り場・日付・サイズ帯・匹数）"""
+    mid = c.size_hi if math.isnan(c.size_lo) else (c.size_lo + c.size_hi) / 2
+    bucket = '' if math.isnan(mid) else int(mid // SIZE_BUCKET)
+    count = '' if math.isnan(c.count_lo) else int(c.count_lo)
+    key = f"{c.species}\x1f{c.spot}\x1f{c.day}\x1f{bucket}\x1f{count}"
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def _bigrams(text):
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def _range_score(lo1, hi1, lo2, hi2, tolerance):
+    """範囲が重なれば1、tolerance 割以内に近ければ0.5、どちらか不明なら0.5（上限なしは無限大）"""
+    if math.isnan(lo1) or math.isnan(lo2):
+        return 0.5
+    hi1, hi2 = (math.inf if math.isnan(h) else h for h in (hi1, hi2))
+    slack = tolerance * max(lo1, lo2)
+    if lo1 <= hi2 and lo2 <= hi1:
+        return 1.0
+    return 0.5 if lo1 - slack <= hi2 and lo2 - slack <= hi1 else 0.0
+
+
+def similarity(a, b):
+    """同じ釣果らしさ（0〜1、魚種・日付は一致している前提）"""
+    if a.spot and b.spot and a.spot != b.spot:
+        return 0.0
+    spot = 1.0 if a.spot and a.spot == b.spot else 0.5
+    size = _range_score(a.size_lo, a.size_hi, b.size_lo, b.size_hi, SIZE_TOLERANCE)
+    count = _range_score(a.count_lo, a.count_hi, b.count_lo, b.count_hi, COUNT_TOLERANCE)
+    if a.text and b.text:
+        x, y = _bigrams(a.text), _bigrams(b.text)
+        text = len(x & y) / len(x | y) if x | y else 0.0
+    else:
+        text = 0.5
+    w_spot, w_size, w_count, w_text = WEIGHTS
+    return w_spot * spot + w_size * size + w_count * count + w_text * text
+
+
+class _UnionFind:
+    """代表は常に添字の小さい方（= 優先度の高い候補）"""
+
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, i):
+        root = i
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[i] != root:
+            self.parent[i], i = root, self.parent[i]
+        return root
+
+    def union(self, i, j):
+        a, b = self.find(i), self.find(j)
+        if a != b:
+            self.parent[max(a, b)] = min(a, b)
+
+
+def cluster(candidates, threshold=THRESHOLD, window=WINDOW):
+    """各候補の代表の添字のリストを返す（重複でなければ自分自身）"""
+    uf = _UnionFind(len(candidates))
+
+    # 1. 指紋のハッシュ索引で完全一致（指紋ごとにソース別の最初の候補を持つ）
+    #    釣り場とサイズ・匹数のどちらかが分かっているものだけ（魚種と日付だけでは別の釣果と区別できない）
+    index = {}
+    for i, c in enumerate(candidates):
+        if not (c.species and c.day and c.spot) or math.isnan(c.size_hi) and math.isnan(c.count_lo):
+            continue
+        by_source = index.setdefault(fingerprint(c), {})
+        for j in by_source.values():
+            if c.source != candidates[j].source:
+                uf.union(j, i)
+        by_source.setdefault(c.source, i)
+
+    # 2. (魚種, 日付) のブロック内で、サイズ順に近い候補とだけ比べる
+    blocks = {}
+    for i, c in enumerate(candidates):
+        if c.species and c.day and uf.find(i) == i:
+            blocks.setdefault((c.species, c.day), []).append(i)
+    for members in blocks.values():
+        if len(members) < 2:
+            continue
+        members.sort(key=lambda i: (math.inf if math.isnan(candidates[i].size_lo) else candidates[i].size_lo, i))
+        for k, i in enumerate(members):
+            a = candidates[i]
+            for j in members[k + 1:k + 1 + window]:
+                b = candidates[j]
+                # サイズ順なので、サイズが離れすぎたらそれ以降も一致しない（サイズ0点では閾値に届かない）
+                if b.size_lo * (1 - SIZE_TOLERANCE) > a.size_hi:
+                    break
+                if a.source != b.source and uf.find(i) != uf.find(j) and similarity(a, b) >= threshold:
+                    uf.union(i, j)
+    return [uf.find(i) for i in range(len(candidates))]
+
+
+def unique(items, to_candidate):
+    """重複を除いた items（先にあるものを残す）"""
+    roots = cluster([to_candidate(x) for x in items])
+    return [x for i, x in enumerate(items) if roots[i] == i]
+
+
+def _fill(primary, dup):
+    """代表に欠けている項目を重複から補う"""
+    if primary.size_min is None and dup.size_min is not None:
+        primary.size_raw, primary.size_min, primary.size_max, primary.size_unit = (
+            dup.size_raw, dup.size_min, dup.size_max, dup.size_unit)
+    if primary.count_min is None and dup.count_min is not None:
+        primary.count_raw, primary.count_min, primary.count_max = dup.count_raw, dup.count_min, dup.count_max
+    if not primary.method and dup.method:
+        primary.method = dup.method
+
+
+def dedup_spots(spots):
+    """collect_fishing_data の spots（ソース順＝優先順）からソースをまたいだ重複を除き、除いた件数を返す
+    代表の釣果には欠けている サイズ・匹数・釣り方 を補い、extra['also'] に同じ釣果が載っていたソースを記録する"""
+    refs = [(s, rec) for s in spots for rec in s['catches']]
+    roots = cluster([from_record(rec, s['source'], s['name']) for s, rec in refs])
+    dropped = set()
+    for i, root in enumerate(roots):
+        if root != i:
+            (spot, rec), (_, primary) = refs[i], refs[root]
+            _fill(primary, rec)
+            also = primary.extra.setdefault('also', [])
+            if spot['source'] not in also:
+                also.append(spot['source'])
+            dropped.add(id(rec))
+    for s in spots:
+        s['catches'] = [rec for rec in s['catches'] if id(rec) not in dropped]
+    return len(dropped)
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+神戸の暦テーブル（月齢・潮名・日の出/日の入り・まずめ・満潮/干潮の目安）
+数年分を1日1行の NumPy 構造化配列として一度だけ計算して保存し、以降はメモリマップで読む
+日付 → 行番号 は序数の引き算だけなので、何千件の釣果への潮の付与も配列の添字参照で済む
+
+使い方:
+  python ephemeris.py            # テーブルを作り直す
+  python ephemeris.py 2026-02-10 # 指定日の内容を表示
+"""
+
+import os
+import sys
+import threading
+from datetime import date, datetime
+
+import numpy as np
+
+from fetcher import CACHE_DIR
+
+START = date(2024, 1, 1)
+YEARS = 12
+VERSION = 1
+TABLE_PATH = os.path.join(CACHE_DIR, f'ephemeris-v{VERSION}-{START:%Y}-{YEARS}y.npy')
+
+# 神戸（北緯34.69, 東経135.19）
+LAT = 34.69
+LON = 135.19
+SYNODIC = 29.530588853
+NEW_MOON_JD = 2451550.1  # 2000-01-06 の新月
+LUNAR_DAY_H = 24.8412
+# 月の南中から満潮までの遅れ（大阪湾奥の平均的な値）
+LUNITIDAL_H = 7.0
+EPOCH_ORD = date(1970, 1, 1).toordinal()
+
+TIDES = ('大潮', '中潮', '小潮', '長潮', '若潮')
+MOON_PHASES = (
+    (1.84566, '新月', '🌑'), (5.53699, '三日月', '🌒'), (9.22831, '上弦の月', '🌓'),
+    (12.91963, '十三夜', '🌔'), (16.61096, '満月', '🌕'), (20.30228, '十八夜', '🌖'),
+    (23.99361, '下弦の月', '🌗'), (27.68493, '二十六夜', '🌘'), (99, '新月', '🌑'),
+)
+
+# 時刻は 0時からの分（該当なしは -1）
+DTYPE = np.dtype([
+    ('moon_age', 'f4'),
+    ('tide', 'i1'),
+    ('sunrise', 'i2'),
+    ('sunset', 'i2'),
+    ('high', 'i2', (2,)),
+    ('low', 'i2', (2,)),
+])
+
+_lock = threading.Lock()
+_table = None
+
+
+def tide_codes_from_age(age):
+    """月齢の配列から潮名（TIDES の添字）を返す"""
+    a = np.asarray(age)
+    conditions = [
+        (a <= 2) | ((13.5 <= a) & (a <= 16.5)) | (a >= 27.5),
+        (a <= 5) | ((16.5 < a) & (a <= 19.5)),
+        (a <= 8) | ((19.5 < a) & (a <= 22.5)),
+        (a <= 10) | ((22.5 < a) & (a <= 24.5)),
+    ]
+    return np.select(conditions, [0, 1, 2, 3], default=4).astype(np.int8)
+
+
+def moon_phase(age):
+    """月齢から (月の名前, アイコン)"""
+    return next((name, icon) for limit, name, icon in MOON_PHASES if age < limit)
+
+
+def _tide_events(first, period=LUNAR_DAY_H / 2):
+    """最初の時刻（時、0〜period）から1日の中の2回分を分に（24時を過ぎたら -1）"""
+    times = np.stack([first, first + period], axis=-1)
+    return np.where(times < 24, np.round(times * 60), -1).astype(np.int16)
+
+
+def compute(days):
+    """日付（序数）の配列から暦の行を計算する"""
+    days = np.asarray(days, dtype=np.int64)
+    out = np.zeros(days.shape, dtype=DTYPE)
+
+    # 月齢（JST 正午時点）
+    jd = days + 1721424.5 + 3 / 24
+    age = (jd - NEW_MOON_JD) % SYNODIC
+    out['moon_age'] = np.round(age, 1)
+    out['tide'] = tide_codes_from_age(age)
+
+    # 日の出・日の入り（赤緯と均時差の近似、大気差込み）
+    dt = (days - EPOCH_ORD).astype('datetime64[D]')
+    doy = (dt - dt.astype('datetime64[Y]').astype('datetime64[D]')).astype(np.int64) + 1
+    decl = np.radians(-23.44 * np.cos(np.radians(360 / 365 * (doy + 10))))
+    b = np.radians(360 / 365 * (doy - 81))
+    eot = 9.87 * np.sin(2 * b) - 7.53 * np.cos(b) - 1.5 * np.sin(b)
+    lat = np.radians(LAT)
+    cos_h = np.clip((-0.01454 - np.sin(lat) * np.sin(decl)) / (np.cos(lat) * np.cos(decl)), -1, 1)
+    half = np.degrees(np.arccos(cos_h)) / 15
+    noon = 12 + (135 - LON) / 15 - eot / 60
+    out['sunrise'] = np.round((noon - half) * 60)
+    out['sunset'] = np.round((noon + half) * 60)
+
+    # 満潮・干潮の目安（月の南中時刻 + 月潮間隔、半日周潮）
+    transit = (12 + age / SYNODIC * 24) % 24
+    period = LUNAR_DAY_H / 2
+    high = (transit + LUNITIDAL_H) % period
+    out['high'] = _tide_events(high)
+    out['low'] = _tide_events((high + period / 2) % period)
+    return out
+
+
+def build(path=TABLE_PATH):
+    """START から YEARS 年分のテーブルを計算して保存する"""
+    end = date(START.year + YEARS, 1, 1)
+    rows = compute(np.arange(START.toordinal(), end.toordinal()))
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        np.save(f, rows)
+    os.replace(tmp, path)
+    return rows
+
+
+def table():
+    """メモリマップしたテーブル（なければ作る）"""
+    global _table
+    if _table is None:
+        with _lock:
+            if _table is None:
+                try:
+                    _table = np.load(TABLE_PATH, mmap_mode='r')
+                except (FileNotFoundError, ValueError):
+                    print("🌙 暦テーブルを作成中...")
+                    build()
+                    _table = np.load(TABLE_PATH, mmap_mode='r')
+    return _table
+
+
+def lookup(days):
+    """日付（序数）の配列に対応する行（テーブル範囲外はその場で計算）"""
+    days = np.asarray(days, dtype=np.int64)
+    t = table()
+    idx = days - START.toordinal()
+    inside = (idx >= 0) & (idx < len(t))
+    if inside.all():
+        return t[idx]
+    out = compute(days)
+    out[inside] = t[idx[inside]]
+    return out
+
+
+def tide_codes(days):
+    """日付（序数）の配列から潮名（TIDES の添字）を返す"""
+    return lookup(days)['tide']
+
+
+def _hm(minutes):
+    minutes = int(minutes)
+    return '--:--' if minutes < 0 else f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def day(d=None):
+    """1日分の暦を表示用の dict で返す"""
+    d = d or datetime.now()
+    row = lookup(np.array([d.toordinal()]))[0]
+    age = round(float(row['moon_age']), 1)
+    name, icon = moon_phase(age)
+    sunrise, sunset = int(row['sunrise']), int(row['sunset'])
+    return {
+        "date": (d.date() if isinstance(d, datetime) else d).isoformat(),
+        "moon_age": age,
+        "moon_name": name,
+        "moon_icon": icon,
+        "tide": TIDES[row['tide']],
+        "sunrise": _hm(sunrise),
+        "sunset": _hm(sunset),
+        # まずめ：日の出・日の入りの前後30分
+        "mazume": {
+            "morning": f"{_hm(sunrise - 30)} - {_hm(sunrise + 30)}",
+            "evening": f"{_hm(sunset - 30)} - {_hm(sunset + 30)}",
+            "morning_start": _hm(sunrise - 30),
+            "evening_start": _hm(sunset - 30),
+        },
+        "high": [_hm(m) for m in row['high']],
+        "low": [_hm(m) for m in row['low']],
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        print(day(date.fromisoformat(sys.argv[1])))
+    else:
+        rows = build()
+        print(f"✅ {TABLE_PATH} に {len(rows)}日分（{rows.nbytes:,}バイト）を保存しました")
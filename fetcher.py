@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共通HTTP取得レイヤー
+接続プール付きセッション・リトライ・条件付きリクエスト（ETag / Last-Modified）を提供
+取得した本文は html_cache に保存され、リプレイモードではネットワークを使わずに再生する
+リクエストごとに 待ち / 接続（名前解決を含む） / 最初の1バイト / 本文受信 の時間を測り、add_listener で登録した関数に渡す
+"""
+
+import atexit
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+import host_scheduler
+from html_cache import HtmlCache
+
+CACHE_DIR = os.environ.get('FISHING_CACHE_DIR', '.cache')
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRY_AFTER = 30
+
+
+class FetchResult:
+    """取得結果（304で再利用した場合も status_code は 200 として扱う）"""
+
+    __slots__ = ('url', 'status_code', 'content', 'encoding', 'headers', 'not_modified', 'attempts')
+
+    def __init__(self, url, status_code, content, encoding=None, headers=None,
+                 not_modified=False, attempts=1):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.encoding = encoding
+        self.headers = headers or {}
+        self.not_modified = not_modified
+        self.attempts = attempts
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+
+class ReplayMiss(LookupError):
+    """リプレイモードでキャッシュにないURLを要求した"""
+
+
+# =============================================================
+# 接続時間の計測（新しい接続を張ったときだけ connect が入る）
+# =============================================================
+_phase = threading.local()
+
+
+def _add_phase(name, seconds):
+    if getattr(_phase, 'times', None) is not None:
+        _phase.times[name] = _phase.times.get(name, 0.0) + seconds
+
+
+class _TimedConnectionMixin:
+    def connect(self):
+        # 名前解決・TCP 接続（HTTPS なら TLS ハンドシェイクまで）の時間
+        started = time.perf_counter()
+        super().connect()
+        _add_phase('connect', time.perf_counter() - started)
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """接続時間を計測する接続クラスを使うアダプター"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _TimedHTTPConnectionPool,
+            'https': _TimedHTTPSConnectionPool,
+        }
+
+
+# 取得1回ごとに呼ばれる関数 fn(url, status, size, attempts, timings, not_modified=, error=)
+_listeners = []
+
+
+def add_listener(fn):
+    _listeners.append(fn)
+
+
+def _notify(url, status, size, attempts, timings, not_modified=False, error=None):
+    for fn in _listeners:
+        try:
+            fn(url, status, size, attempts, timings, not_modified=not_modified, error=error)
+        except Exception as e:
+            print(f"  ⚠️ 取得記録エラー: {e}")
+
+
+class Fetcher:
+    """ホストごとに接続を使い回す共通フェッチャー"""
+
+    def __init__(self, retries=3, backoff=1.0, pool_size=10, cache_dir=CACHE_DIR, scheduler=None,
+                 replay=False, replay_at=None):
+        self.retries = retries
+        self.backoff = backoff
+        self.scheduler = scheduler or host_scheduler.SCHEDULER
+        self.cache = HtmlCache(os.path.join(cache_dir, 'html'))
+        self.replay = replay
+        self.replay_at = replay_at
+        self.session = requests.Session()
+        adapter = TimedHTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _retry_wait(self, attempt, resp=None):
+        """Retry-After を優先し、なければジッター付き指数バックオフ"""
+        if resp is not None:
+            retry_after = resp.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return min(MAX_RETRY_AFTER, int(retry_after))
+        return self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+    def get(self, url, params=None, headers=None, timeout=15, encoding=None, conditional=True, retries=None,
+            store=True):
+        """GETリクエスト（同一ホストの間隔は host_scheduler で制御、retries 省略時は self.retries 回まで再試行）
+        store=False ならHTMLキャッシュを読み書きしない（一度きりの大量取得で日々のスナップショットを押し出さないため）"""
+        full_url = requests.Request('GET', url, params=params).prepare().url
+        if self.replay:
+            return self._replay(full_url, encoding)
+
+        req_headers = dict(headers or {})
+        cached = self.cache.latest(full_url) if conditional and store else None
+        if cached:
+            if cached.get('etag'):
+                req_headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                req_headers['If-Modified-Since'] = cached['last_modified']
+
+        retries = self.retries if retries is None else retries
+        attempt = 0
+        started = time.perf_counter()
+        wait = 0.0
+        while True:
+            before = time.perf_counter()
+            self.scheduler.acquire(full_url)
+            sent = time.perf_counter()
+            wait += sent - before
+            _phase.times = {}
+            try:
+                resp = self.session.get(full_url, headers=req_headers, timeout=timeout, stream=True)
+                headers_at = time.perf_counter()
+                content = resp.content
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= retries:
+                    _notify(full_url, 0, 0, attempt + 1, self._timings(started, sent, None, None, wait),
+                            error=f"{type(e).__name__}: {e}")
+                    raise
+                time.sleep(self._retry_wait(attempt))
+                attempt += 1
+                continue
+            if resp.status_code in RETRY_STATUSES and attempt < retries:
+                time.sleep(self._retry_wait(attempt, resp))
+                attempt += 1
+                continue
+            break
+        timings = self._timings(started, sent, headers_at, time.perf_counter(), wait)
+
+        if resp.status_code == 304 and cached:
+            self.cache.touch(full_url)
+            _notify(full_url, 304, 0, attempt + 1, timings, not_modified=True)
+            return FetchResult(full_url, 200, self.cache.read(cached['hash']),
+                               encoding or cached.get('encoding'), resp.headers,
+                               not_modified=True, attempts=attempt + 1)
+
+        enc = encoding or resp.encoding
+        if resp.status_code == 200 and store:
+            self.cache.put(full_url, content, enc,
+                           resp.headers.get('ETag'), resp.headers.get('Last-Modified'))
+        _notify(full_url, resp.status_code, len(content), attempt + 1, timings)
+        return FetchResult(full_url, resp.status_code, content, enc,
+                           resp.headers, attempts=attempt + 1)
+
+    @staticmethod
+    def _timings(started, sent, headers_at, finished, wait):
+        """最後の試行の内訳と、リトライ・待ちを含む全体の秒数"""
+        phases = _phase.times or {}
+        _phase.times = None
+        end = finished or time.perf_counter()
+        timings = {'wait': wait, 'connect': phases.get('connect', 0.0),
+                   'total': end - started}
+        if headers_at is not None:
+            timings['ttfb'] = max(0.0, headers_at - sent - timings['connect'])
+            timings['download'] = end - headers_at
+        return timings
+
+    def _replay(self, full_url, encoding):
+        """キャッシュ済みスナップショットから応答を返す"""
+        snap = self.cache.latest(full_url, at=self.replay_at)
+        if snap is None:
+            _notify(full_url, 0, 0, 1, {}, error="ReplayMiss")
+            raise ReplayMiss(f"キャッシュにありません: {full_url}")
+        content = self.cache.read(snap['hash'])
+        _notify(full_url, 200, len(content), 1, {}, not_modified=True)
+        return FetchResult(full_url, 200, content, encoding or snap.get('encoding'), not_modified=True, attempts=0)
+
+    def close(self):
+        """キャッシュを整理してインデックスを保存"""
+        if not self.replay:
+            self.cache.prune()
+        self.cache.flush()
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_fetcher():
+    """プロセス共通のフェッチャーを取得"""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = Fetcher()
+            atexit.register(_default.close)
+        return _default
+
+
+def enable_replay(at=None):
+    """以降の取得をすべてキャッシュからの再生にする"""
+    f = default_fetcher()
+    f.replay = True
+    f.replay_at = at
+
+
+def is_replay():
+    return default_fetcher().replay
+
+
+def fetch(url, **kwargs):
+    """共通フェッチャーでGET"""
+    return default_fetcher().get(url, **kwargs)
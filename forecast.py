@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+釣れやすさの7日予報（NumPy）
+釣り場 × 魚種 ごとの特徴量（直近の釣果・勢い・潮の相性・時合い・例年の傾向・水温の好み）を1日1回だけ作っておき、
+暦（潮・月齢・まずめと満潮/干潮の重なり）と水温の見込みを日ごとの軸にして 釣り場 × 魚種 × 日 を配列演算でまとめて採点する
+明日・週末のおすすめカードは採点結果の上位から作る（採点は数十釣り場 × 数十魚種 × 7日でも数ミリ秒）
+
+使い方:
+  python forecast.py               # 履歴DBから明日からの7日分の上位を表示
+  python forecast.py --n 5 --days 14
+"""
+
+import argparse
+import functools
+import json
+import math
+import os
+import re
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+import dedup
+import ephemeris
+from analytics import TIMES, UNKNOWN_TIME, _range_text, _scatter, group_stats
+from ephemeris import SYNODIC, TIDES
+from species import SPECIES, species_name
+from spots import CATALOG
+
+HORIZON = 7
+# 例年の傾向（釣れた日の割合 × 匹数）を直近の1日あたり匹数に足すときの重み
+SEASON_WEIGHT = 0.3
+# まずめの前後 TURN_MIN 分に満潮・干潮があれば時合いが重なる日とする
+TURN_MIN = 60
+# 時合いが1回重なるごとの上乗せ（まずめに釣れている魚種ほど効く）
+MAZUME_BONUS = 0.15
+# 満月の夜の割り引き（夜に釣れている魚種ほど効く）
+MOON_PENALTY = 0.1
+# 水温の好み: 観測がこれ未満の魚種は使わない、標準偏差の下限、割り引きの下限
+TEMP_MIN_OBS = 5
+TEMP_MIN_SD = 2.0
+TEMP_FLOOR = 0.6
+# 水温の見込み: 直近何日の傾きを延ばすか、1日あたりの変化の上限
+TEMP_TREND_DAYS = 14
+TEMP_MAX_SLOPE = 0.3
+
+RE_TEMP = re.compile(r'(\d+(?:\.\d+)?)')
+MAZUME_TIMES = [TIMES.index('朝まずめ'), TIMES.index('夕まずめ')]
+NIGHT = TIMES.index('夜')
+
+
+def temp_value(text):
+    """'15.2℃' などから水温（分からなければ None）"""
+    m = RE_TEMP.search(text or '')
+    return float(m.group(1)) if m else None
+
+
+def store_temps(store, days=365, today=None):
+    """CatchStore の直近 days 日分の水温つき釣果を (魚種ID, 日の序数, 水温) で返す"""
+    since = ((today or datetime.now()) - timedelta(days=days)).date()
+    for sid, d, extra in store.history(since, ('species', 'date', 'extra')):
+        t = temp_value(json.loads(extra or '{}').get('water_temp'))
+        if t is not None:
+            yield sid or '', date.fromisoformat(d).toordinal(), t
+
+
+def _temp_outlook(days, obs_day, obs_temp, start):
+    """start から days 日分の水温の見込み（直近の日平均の傾きを延ばす。観測がなければ NaN）"""
+    if not len(obs_day):
+        return np.full(days, np.nan)
+    last = obs_day.max()
+    recent = obs_day > last - TEMP_TREND_DAYS
+    uniq, inv = np.unique(obs_day[recent], return_inverse=True)
+    daily = np.bincount(inv, weights=obs_temp[recent]) / np.bincount(inv)
+    slope = np.polyfit(uniq - last, daily, 1)[0] if len(uniq) >= 3 else 0.0
+    slope = float(np.clip(slope, -TEMP_MAX_SLOPE, TEMP_MAX_SLOPE))
+    return daily[-1] + slope * (start + np.arange(days) - last)
+
+
+def features(frame, today=None, baseline=None, temps=(), days=30):
+    """予報の特徴量（釣り場 × 魚種 の配列の dict。日付と入力が同じなら使い回せるよう、日に依らないものだけ）
+
+    frame    : analytics.CatchFrame（履歴DB＋表示中の釣果。釣り場はカタログの釣り場名に付け直す）
+    baseline : seasonal.SeasonalBaseline（例年の傾向。None なら使わない）
+    temps    : (魚種ID, 日の序数, 水温) の並び（store_temps）
+    """
+    today = today or datetime.now()
+    # 釣り場はカタログの釣り場だけ（エリア名・ソース名などの行は釣り場を解決し直し、解決できなければ除く）
+    catalog = {s.name for s in CATALOG}
+    frame = frame.with_spots(s if s in catalog else dedup.canonical_spot(s) for s in map(str, frame.spots))
+    baseline_spots = [s for s in baseline.table if s in catalog] if baseline else []
+    season_rows = [(spot, int(week), r) for spot in baseline_spots
+                   for week, rows in baseline.table[spot].items() for r in rows]
+    # 軸: 集計の釣り場・魚種の後ろに例年の傾向だけにあるものを足し、魚種は SPECIES にあるものだけにする
+    spots = list(dict.fromkeys([*map(str, frame.spots), *baseline_spots]))
+    species_all = list(dict.fromkeys([*map(str, frame.species), *(r[0] for _, _, r in season_rows)]))
+    keep = np.array([s in SPECIES for s in species_all], dtype=bool)
+    species = [s for s in species_all if s in SPECIES]
+    n_frame_spot, n_frame_sp = len(frame.spots), len(frame.species)
+    shape = (len(spots), len(species_all))
+
+    def grid(table, fill=0.0):
+        """frame の (釣り場, 魚種, ...) の表を予報の軸に広げる"""
+        out = np.full(shape + table.shape[2:], fill, dtype=table.dtype)
+        out[:n_frame_spot, :n_frame_sp] = table
+        return out[:, keep]
+
+    windows = (7, days)
+    base = group_stats(frame, ('spot', 'species'), today, windows)
+    by_tide = group_stats(frame, ('spot', 'species', 'tide'), today, windows)
+    by_time = group_stats(frame, ('spot', 'species', 'tod'), today, windows)
+    key2 = ('spot', 'species')
+    fshape = (n_frame_spot, n_frame_sp)
+
+    # 潮の相性: その潮の日の1日あたり匹数の割合 / 直近 days 日にその潮だった日の割合（データがなければ 1）
+    tide_rate = _scatter(by_tide, key2 + ('tide',), fshape + (len(TIDES),), f'rate{days}')
+    tide_days = np.bincount(ephemeris.tide_codes(today.toordinal() - np.arange(days)), minlength=len(TIDES)) / days
+    with np.errstate(divide='ignore', invalid='ignore'):
+        share = tide_rate / tide_rate.sum(axis=2, keepdims=True)
+        affinity = np.where(share > 0, share / tide_days, 1.0)
+    affinity = np.clip(np.nan_to_num(affinity, nan=1.0), 0.5, 1.5)
+
+    # 時合い: 時刻の分かる釣果のうち まずめ・夜 の割合と、最も匹数が多い時間帯
+    time_rate = _scatter(by_time, key2 + ('tod',), fshape + (len(TIMES),), f'rate{days}')
+    time_rate[..., UNKNOWN_TIME] = 0
+    timed = time_rate.sum(axis=2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mazume_share = np.where(timed > 0, time_rate[..., MAZUME_TIMES].sum(axis=2) / timed, 0.0)
+        night_share = np.where(timed > 0, time_rate[..., NIGHT] / timed, 0.0)
+    best_time = np.where(timed > 0, time_rate.argmax(axis=2), UNKNOWN_TIME)
+
+    col = functools.partial(_scatter, base, key2, fshape)
+    unit = np.full(fshape, '', dtype=object)
+    method = np.full(fshape, '', dtype=object)
+    unit[base['spot'], base['species']] = frame.units[base['unit']]
+    method[base['spot'], base['species']] = frame.methods[base['method']]
+
+    out = {
+        'spots': spots,
+        'species': species,
+        'rate': grid(col(f'rate{days}')),
+        'trend': grid(np.nan_to_num(col('trend', fill=1.0), nan=1.0), 1.0),
+        'reports': grid(col('reports')),
+        'tide_affinity': grid(affinity, 1.0),
+        'mazume_share': grid(mazume_share),
+        'night_share': grid(night_share),
+        'best_time': grid(best_time, UNKNOWN_TIME),
+        'size_lo': grid(col('size_lo', fill=np.nan), np.nan),
+        'size_hi': grid(col('size_hi', fill=np.nan), np.nan),
+        'size_median': grid(col('size_median', fill=np.nan), np.nan),
+        'count_lo': grid(col('count_lo', fill=np.nan), np.nan),
+        'count_hi': grid(col('count_hi', fill=np.nan), np.nan),
+        'unit': grid(unit, ''),
+        'method': grid(method, ''),
+        'days': days,
+    }
+
+    # 例年の傾向: ISO週（1〜53、添字0は空き）ごとの釣れた日の割合・匹数・釣れた日数
+    s_index = {s: i for i, s in enumerate(spots)}
+    p_index = {s: i for i, s in enumerate(species)}
+    n_s, n_p = len(spots), len(species)
+    prob, count, season_days = (np.zeros((n_s, n_p, 54)) for _ in range(3))
+    this_week = today.isocalendar()[1]
+    for spot, week, (sid, p, lo, hi, u, c, m, d, _) in season_rows:
+        i, j = s_index[spot], p_index.get(sid)
+        if j is None:
+            continue
+        prob[i, j, week], count[i, j, week], season_days[i, j, week] = p, c or 1.0, d
+        # 直近の釣果がない組み合わせは、サイズ・匹数・釣り方を今週の例年の傾向で埋める
+        if week == this_week and not out['reports'][i, j]:
+            if lo is not None:
+                out['size_lo'][i, j], out['size_hi'][i, j], out['unit'][i, j] = lo, hi, u
+                out['size_median'][i, j] = (lo + hi) / 2
+            if c is not None:
+                out['count_lo'][i, j] = out['count_hi'][i, j] = c
+            out['method'][i, j] = m
+    out.update(season_prob=prob, season_count=count, season_days=season_days)
+
+    # 水温の好み: 魚種ごとの釣れた日の水温の平均・標準偏差（観測の少ない魚種は NaN）
+    t_sp, t_day, t_val = (np.array(v) for v in zip(*temps)) if len(temps) else (np.array([]),) * 3
+    t_day = t_day.astype(np.int64)
+    codes = np.array([p_index.get(s, -1) for s in t_sp], dtype=np.int64)
+    ok = codes >= 0
+    n = np.bincount(codes[ok], minlength=n_p)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.bincount(codes[ok], weights=t_val[ok], minlength=n_p) / n
+        var = np.bincount(codes[ok], weights=t_val[ok] ** 2, minlength=n_p) / n - mean ** 2
+    enough = n >= TEMP_MIN_OBS
+    out['temp_mean'] = np.where(enough, mean, np.nan)
+    out['temp_sd'] = np.where(enough, np.maximum(np.sqrt(np.maximum(var, 0)), TEMP_MIN_SD), np.nan)
+    out['temp_day'], out['temp_obs'] = t_day, t_val
+    return out
+
+
+@functools.lru_cache(maxsize=32)
+def calendar(start, days=HORIZON):
+    """start（日の序数）から days 日分の日ごとの特徴（潮・月の明るさ・まずめと満潮/干潮の重なり・ISO週）"""
+    ordinals = np.arange(start, start + days)
+    rows = ephemeris.lookup(ordinals)
+    events = np.concatenate([rows['high'], rows['low']], axis=1).astype(np.int64)
+    turn = np.zeros(days, dtype=np.int64)
+    for edge in (rows['sunrise'], rows['sunset']):
+        near = (events >= 0) & (np.abs(events - edge.astype(np.int64)[:, None]) <= TURN_MIN)
+        turn += near.any(axis=1)
+    age = rows['moon_age'].astype(np.float64)
+    weeks = np.array([datetime.fromordinal(int(d)).isocalendar()[1] for d in ordinals])
+    return {
+        'days': ordinals,
+        'tide': rows['tide'].astype(np.int64),
+        'moon': (1 - np.cos(2 * np.pi * age / SYNODIC)) / 2,
+        'turn': turn,
+        'week': weeks,
+    }
+
+
+class Forecast:
+    """features の 釣り場 × 魚種 を start から horizon 日分まとめて採点した結果
+    score[釣り場, 魚種, 日] = (直近の1日あたり匹数 × 勢い × 件数による信頼度 + 例年の傾向)
+                              × 潮の相性 × 時合いの重なり × 月の明るさ × 水温"""
+
+    def __init__(self, feat, start, horizon=HORIZON):
+        self.feat = feat
+        self.start = start.toordinal() if hasattr(start, 'toordinal') else int(start)
+        self.cal = calendar(self.start, horizon)
+        self.support = 1 - np.exp(-(feat['reports'][..., None] + 0.5 * feat['season_days'][..., self.cal['week']]) / 5)
+        self.score = self._score()
+
+    def _score(self):
+        f, cal = self.feat, self.cal
+        recent = f['rate'] * np.clip(f['trend'], 0.5, 2.0) * (1 - np.exp(-f['reports'] / 5))
+        season = f['season_prob'][..., cal['week']] * f['season_count'][..., cal['week']]
+        tide = f['tide_affinity'][..., cal['tide']]
+        mazume = 1 + MAZUME_BONUS * f['mazume_share'][..., None] * cal['turn']
+        moon = 1 - MOON_PENALTY * f['night_share'][..., None] * cal['moon']
+        temp = self.temps()
+        with np.errstate(invalid='ignore'):
+            fit = np.exp(-0.5 * ((temp[None, :] - f['temp_mean'][:, None]) / f['temp_sd'][:, None]) ** 2)
+        fit = np.where(np.isnan(fit), 1.0, np.maximum(fit, TEMP_FLOOR))
+        return (recent[..., None] + SEASON_WEIGHT * season) * tide * mazume * moon * fit[None]
+
+    def temps(self):
+        """予報期間の水温の見込み（観測がなければ NaN）"""
+        return _temp_outlook(len(self.cal['days']), self.feat['temp_day'], self.feat['temp_obs'], self.start)
+
+    def top(self, days, n=3):
+        """days（date/datetime の並び）のうち予報期間内の日で、釣れそうな (釣り場, 魚種) を上位 n 件（釣り場は重複させない）
+        複数日なら日ごとの点の平均で並べ、いちばん点の高い日の潮を添える"""
+        idx = sorted({d.toordinal() - self.start for d in days} & set(range(len(self.cal['days']))))
+        if not idx or not self.score.size:
+            return []
+        score = self.score[..., idx]
+        total = score.mean(axis=2)
+        best_day = np.asarray(idx)[score.argmax(axis=2)]
+        top = total.max()
+        if top <= 0:
+            return []
+        f = self.feat
+        picks, used = [], set()
+        for flat in np.argsort(-total, axis=None, kind='stable'):
+            i, j = np.unravel_index(flat, total.shape)
+            spot = f['spots'][i]
+            if total[i, j] <= 0:
+                break
+            if spot in used:
+                continue
+            used.add(spot)
+            sid, d = f['species'][j], best_day[i, j]
+            support = self.support[i, j, d]
+            picks.append({
+                'spot': spot,
+                'species': sid,
+                'fish': species_name(sid) or sid,
+                'size': _range_text(f['size_lo'][i, j], f['size_hi'][i, j], f['unit'][i, j]),
+                'size_median': None if np.isnan(f['size_median'][i, j]) else float(f['size_median'][i, j]),
+                'count': _range_text(f['count_lo'][i, j], f['count_hi'][i, j], '匹'),
+                'time': TIMES[int(f['best_time'][i, j])],
+                'method': f['method'][i, j],
+                'tide': TIDES[self.cal['tide'][d]],
+                'day': datetime.fromordinal(int(self.cal['days'][d])).date(),
+                'reports': int(f['reports'][i, j]),
+                'rate': float(f['rate'][i, j]),
+                'trend': float(f['trend'][i, j]),
+                'probability': float(f['season_prob'][i, j, self.cal['week'][d]]),
+                'score': float(total[i, j]),
+                'confidence': int(np.clip(round(50 + 35 * total[i, j] / top + 10 * support), 0, 98)),
+            })
+            if len(picks) == n:
+                break
+        return picks
+
+
+def main():
+    import analytics
+    import seasonal
+    from catch_store import DB_PATH, CatchStore
+
+    ap = argparse.ArgumentParser(description="釣れやすさの7日予報")
+    ap.add_argument('--days', type=int, default=HORIZON, help=f'予報する日数（既定: {HORIZON}）')
+    ap.add_argument('--n', type=int, default=3, help='1日あたりの件数')
+    ap.add_argument('--db', default=DB_PATH, help=f'履歴DB（既定: {DB_PATH}）')
+    args = ap.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"❌ 履歴DBがありません: {args.db}（先に collect_fishing_data.py を実行してください）")
+        return
+    today = datetime.now()
+    with CatchStore(args.db) as store:
+        frame = analytics.CatchFrame.from_rows(analytics.store_rows(store, today=today))
+        temps = list(store_temps(store, today=today))
+    feat = features(frame, today, seasonal.load(args.db), temps)
+    fc = Forecast(feat, today + timedelta(days=1), args.days)
+    outlook = fc.temps()
+    print(f"📈 {len(feat['spots'])}釣り場 × {len(feat['species'])}魚種 × {args.days}日（釣果 {len(frame):,}件・水温 {len(temps):,}件）")
+    for k, d in enumerate(fc.cal['days']):
+        day = datetime.fromordinal(int(d))
+        temp = '' if math.isnan(outlook[k]) else f" 水温{outlook[k]:.1f}℃"
+        print(f"📅 {day:%m/%d} {TIDES[fc.cal['tide'][k]]} 時合い{fc.cal['turn'][k]}回{temp}")
+        for p in fc.top([day], args.n):
+            print(f"  {p['confidence']:>3}% {p['spot']:<14}{p['fish']:<8}{p['size']:<10}{p['count']:<8}{p['time']}")
+
+
+if __name__ == "__main__":
+    main()
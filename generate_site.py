@@ -1,218 +1,279 @@
 #!/usr/bin/env python3
-"""神戸釣り情報 v6.0 - 自動データ収集&サイト生成"""
-import requests
-from bs4 import BeautifulSoup
+"""神戸釣り情報 v6.0 - サイト生成（collect_fishing_data の収集結果と履歴DBから）"""
 from datetime import datetime, timedelta
-import re, traceback
+import glob, gzip, hashlib, json, os, re, traceback, unicodedata
+import analytics, dedup, ephemeris, forecast, lexicon, run_metrics, seasonal, stage_cache
+from catch_store import DB_PATH, CatchStore
+from catch_record import CatchRecord, parse_date
+from spots import CATALOG as SPOT_CATALOG, INDEX as SPOT_INDEX
+from species import aliases as species_aliases, species_emoji, species_id, species_name
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 TODAY = datetime.now()
+# 集計・描画のメモ（収集結果・履歴DB・日付・コードが前回と同じなら書き出さない）
+STAGES = stage_cache.StageCache()
+SITE_VERSION = stage_cache.digest(stage_cache.file_digest(__file__),stage_cache.code_version(analytics,dedup,ephemeris,forecast,lexicon,seasonal))
 DY = ['月','火','水','木','金','土','日']
 def fd(d): return f"{d.year}年{d.month}月{d.day}日({DY[d.weekday()]})"
 def sd(d): return f"{d.month}/{d.day}({DY[d.weekday()]})"
-HDR = {"User-Agent":"Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"}
 
-def moon(d):
-    a = (11 + (d - datetime(2026,1,1)).days) % 29.53
-    return round(a,1)
-def tide_type(a):
-    if a<=2 or 13.5<=a<=16.5 or a>=27.5: return "大潮"
-    if a<=5 or 16.5<a<=19.5: return "中潮"
-    if a<=8 or 19.5<a<=22.5: return "小潮"
-    if a<=10 or 22.5<a<=24.5: return "長潮"
-    return "若潮"
-def moon_icon(a):
-    for t,i in [(3.7,"🌑"),(7.4,"🌒"),(11.1,"🌓"),(14.8,"🌔"),(18.5,"🌕"),(22.1,"🌖"),(25.8,"🌗")]:
-        if a<t: return i
-    return "🌘"
+# 月齢・潮・まずめは ephemeris の暦テーブルから引く
+def moon(d): return ephemeris.day(d)["moon_age"]
+def tide_type(a): return ephemeris.TIDES[int(ephemeris.tide_codes_from_age(a))]
+def moon_icon(a): return ephemeris.moon_phase(a)[1]
 def tide_times(d):
-    a=moon(d); b=5.0+(a%14.76)*0.08
-    def f(h): h=h%24; return f"{int(h):02d}:{int((h-int(h))*60):02d}"
-    return {"high":[f(b),f(b+12.4)],"low":[f(b+6.2),f((b+18.6)%24) if b+18.6<24 else "--:--"]}
+    e=ephemeris.day(d); return {"high":e["high"],"low":e["low"]}
 def mazume(d):
-    doy=d.timetuple().tm_yday; m=d.month
-    sr=6*60+50-max(0,doy-60)*1; ss=17*60+30+max(0,doy-60)*1
-    if m>=3: sr=max(300,sr-(m-2)*12); ss=min(1140,ss+(m-2)*10)
-    sr=max(300,min(420,sr)); ss=max(1020,min(1140,ss))
-    srh,srm=divmod(sr,60); ssh,ssm=divmod(ss,60)
-    am_e = f"{srh:02d}:{srm+30:02d}" if srm+30<60 else f"{srh+1:02d}:{srm+30-60:02d}"
-    pm_s = f"{ssh-1:02d}:{ssm+30:02d}" if ssm<30 else f"{ssh:02d}:{ssm-30:02d}"
-    pm_e = f"{ssh:02d}:{ssm+30:02d}" if ssm+30<60 else f"{ssh+1:02d}:{ssm+30-60:02d}"
-    return {"am":f"{srh:02d}:{max(0,srm-30):02d} - {am_e}","pm":f"{pm_s} - {pm_e}","ams":f"{srh:02d}:{max(0,srm-30):02d}","pms":f"{ssh:02d}:{max(0,ssm-30):02d}"}
-
-SPOTS = {
- "須磨海釣り公園":{"a":"神戸","d":2.3,"info":"ファミリー向け・設備充実"},
- "南芦屋浜":{"a":"尼崎","d":5.8,"info":"関西最大級・ハネダービー開催中"},
- "神戸空港ベランダ":{"a":"神戸","d":4.1,"info":"アジ好調・24時間"},
- "アジュール舞子":{"a":"神戸","d":6.8,"info":"サビキ大人気・初心者OK"},
- "六甲アイランド":{"a":"神戸","d":3.5,"info":"タチウオの聖地"},
- "明石港":{"a":"明石","d":18.5,"info":"タコ・メバルの名所"},
- "芦屋浜":{"a":"尼崎","d":5.2,"info":"投げ釣りの名所"},
- "ポートアイランド北公園":{"a":"神戸","d":4.5,"info":"メバル好ポイント"},
- "林崎漁港":{"a":"明石","d":20,"info":"穴場スポット"},
- "岩屋港(淡路島)":{"a":"淡路島","d":25,"info":"多魚種・車必須"},
- "赤穂港":{"a":"赤穂","d":75,"info":"穴場・のんびり"},
- "姫路港":{"a":"姫路","d":80,"info":"大型港・多魚種"},
-}
-SPOT_KW={"須磨海釣り公園":["須磨海釣り","須磨"],"南芦屋浜":["南芦屋浜","南芦屋"],"神戸空港ベランダ":["神戸空港"],"アジュール舞子":["アジュール舞子","舞子"],"六甲アイランド":["六甲アイランド","六アイ"],"明石港":["明石港","明石"],"芦屋浜":["芦屋浜"],"ポートアイランド北公園":["ポートアイランド"],"林崎漁港":["林崎"],"岩屋港(淡路島)":["岩屋","淡路島"],"赤穂港":["赤穂"],"姫路港":["姫路"]}
-FISH_KW={"アジ":["アジ"],"サバ":["サバ"],"チヌ":["チヌ","クロダイ"],"ハネ(シーバス)":["ハネ","シーバス"],"タチウオ":["タチウオ"],"メバル":["メバル"],"ガシラ":["ガシラ","カサゴ"],"タコ":["タコ"],"キス":["キス"],"カレイ":["カレイ"],"イワシ":["イワシ"],"アオリイカ":["アオリイカ"],"サヨリ":["サヨリ"]}
-FISH_ICON={"タチウオ":"🗡️","タコ":"🐙","アオリイカ":"🦑","チヌ":"🐡","ガシラ":"🐡","ハネ(シーバス)":"🎣"}def find_spot(t):
-    for s,kws in SPOT_KW.items():
-        for k in kws:
-            if k in t: return s
-    return None
-def find_fish(t):
-    r=[]
-    for f,kws in FISH_KW.items():
-        for k in kws:
-            if k in t:
-                sz=re.search(rf'{k}\D*?(\d+(?:\.\d+)?)\s*(?:cm|CM)',t)
-                ct=re.search(rf'(\d+)\s*(?:匹|尾|枚|杯|本)',t)
-                r.append({"f":f,"s":sz.group(1)+"cm" if sz else "","ct":ct.group(1)+"匹" if ct else "数匹","m":""})
-                break
-    return r
+    m=ephemeris.day(d)["mazume"]
+    return {"am":m["morning"],"pm":m["evening"],"ams":m["morning_start"],"pms":m["evening_start"]}
 
-def scrape_all():
-    catches=[]
-    for url in ["https://fishingmax.co.jp/blog/category/fishing-result","https://fishingmax.co.jp/blog"]:
-        try:
-            r=requests.get(url,headers=HDR,timeout=15); r.encoding='utf-8'
-            soup=BeautifulSoup(r.text,'html.parser')
-            for art in (soup.find_all('article') or soup.find_all('div',class_=re.compile(r'post|entry')))[:10]:
-                txt=art.get_text(' ',strip=True); sp=find_spot(txt)
-                if not sp: continue
-                for fd2 in find_fish(txt):
-                    dm=re.search(r'(\d{1,2})/(\d{1,2})',txt)
-                    t=f"{dm.group(1)}/{dm.group(2)}" if dm else sd(TODAY)
-                    catches.append({"spot":sp,**fd2,"t":t,"u":"フィッシングマックス","i":FISH_ICON.get(fd2["f"],"🐟")})
-            if catches: break
-        except: pass
-    return catches
+# 釣り場（エリア・説明は spots.py のカタログ、d は三宮からの距離km）
+SPOTS = {s.name:{"a":s.area,"d":SPOT_INDEX.distance(s.name),"info":s.info} for s in SPOT_CATALOG}
+FISH_ICON={"タチウオ":"🗡️","タコ":"🐙","アオリイカ":"🦑","チヌ":"🐡","ガシラ":"🐡","ハネ(シーバス)":"🎣"}
 
-def seasonal():
-    y=sd(TODAY-timedelta(days=1)); d2=sd(TODAY-timedelta(days=2)); d3=sd(TODAY-timedelta(days=3)); d4=sd(TODAY-timedelta(days=4))
-    return {
-     "須磨海釣り公園":[
-      {"f":"アジ","s":"18-25cm","ct":"30匹","t":f"{y} 06:30","u":"サビキ釣り師","m":"サビキ","i":"🐟"},
-      {"f":"アジ","s":"15-20cm","ct":"50匹超","t":f"{d2} 07:00","u":"朝活アングラー","m":"サビキ","i":"🐟"},
-      {"f":"サバ","s":"28cm","ct":"12匹","t":f"{y} 08:15","u":"サビキマスター","m":"サビキ","i":"🐟"},
-      {"f":"チヌ","s":"38cm","ct":"1匹","t":f"{y} 10:00","u":"フカセ職人","m":"フカセ釣り","i":"🐡"},
-      {"f":"サヨリ","s":"25-30cm","ct":"20匹","t":f"{d2} 14:00","u":"連掛け名人","m":"サヨリ仕掛け","i":"🐟"},
-      {"f":"ガシラ","s":"20cm","ct":"8匹","t":f"{d4} 16:00","u":"穴釣り名人","m":"穴釣り","i":"🐡"},
-      {"f":"サバ","s":"30cm","ct":"8匹","t":f"{d4} 07:30","u":"ファミリー釣り","m":"サビキ","i":"🐟"},
-     ],
-     "南芦屋浜":[
-      {"f":"チヌ","s":"45cm","ct":"1匹","t":f"{y} 06:30","u":"フカセ名人","m":"フカセ釣り","i":"🐡"},
-      {"f":"チヌ","s":"42cm","ct":"1匹","t":f"{y} 07:00","u":"エビ撒き師","m":"エビ撒き","i":"🐡"},
-      {"f":"ハネ(シーバス)","s":"52cm","ct":"2匹","t":f"{y} 06:15","u":"朝イチ釣り師","m":"エビ撒き","i":"🎣"},
-      {"f":"チヌ","s":"38cm","ct":"2匹","t":f"{d2} 13:00","u":"コーン使い","m":"フカセ釣り","i":"🐡"},
-      {"f":"ハネ(シーバス)","s":"48cm","ct":"3匹","t":f"{d2} 06:30","u":"ハネ師A","m":"エビ撒き","i":"🎣"},
-      {"f":"チヌ","s":"48cm","ct":"1匹","t":f"{d2} 07:30","u":"年無し狙い","m":"フカセ釣り","i":"🐡"},
-      {"f":"メバル","s":"22cm","ct":"5匹","t":f"{d4} 18:00","u":"メバリスト","m":"メバリング","i":"🐟"},
-      {"f":"チヌ","s":"35cm","ct":"3匹","t":f"{d4} 07:00","u":"フカセマスター","m":"フカセ釣り","i":"🐡"},
-     ],
-     "神戸空港ベランダ":[
-      {"f":"アジ","s":"16-20cm","ct":"35匹","t":f"{y} 06:00","u":"朝マズメ常連","m":"サビキ","i":"🐟"},
-      {"f":"アジ","s":"20-25cm","ct":"25匹","t":f"{d2} 06:30","u":"デカアジ師","m":"サビキ","i":"🐟"},
-      {"f":"メバル","s":"23cm","ct":"4匹","t":f"{y} 18:30","u":"メバリスト","m":"エビ撒き","i":"🐟"},
-      {"f":"サバ","s":"30cm","ct":"10匹","t":f"{d2} 07:00","u":"青物ハンター","m":"サビキ","i":"🐟"},
-      {"f":"ガシラ","s":"22cm","ct":"8匹","t":f"{d3} 19:00","u":"根魚マニア","m":"ブラクリ","i":"🐡"},
-      {"f":"アジ","s":"18cm","ct":"45匹","t":f"{d4} 06:15","u":"爆釣アングラー","m":"サビキ","i":"🐟"},
-      {"f":"タチウオ","s":"85cm","ct":"3匹","t":f"{d3} 19:30","u":"ワインドマスター","m":"ワインド","i":"🗡️"},
-     ],
-     "アジュール舞子":[
-      {"f":"アジ","s":"14-18cm","ct":"40匹","t":f"{y} 09:00","u":"家族で釣り","m":"サビキ","i":"🐟"},
-      {"f":"サバ","s":"25cm","ct":"15匹","t":f"{y} 09:30","u":"サビキ初心者","m":"サビキ","i":"🐟"},
-      {"f":"イワシ","s":"12cm","ct":"50匹超","t":f"{d2} 11:00","u":"イワシ大量","m":"サビキ","i":"🐟"},
-      {"f":"ガシラ","s":"18cm","ct":"5匹","t":f"{d4} 15:00","u":"根魚好き","m":"胴突き","i":"🐡"},
-      {"f":"メバル","s":"20cm","ct":"4匹","t":f"{d3} 18:30","u":"メバルハンター","m":"プラグ","i":"🐟"},
-     ],
-     "六甲アイランド":[
-      {"f":"タチウオ","s":"92cm","ct":"3匹","t":f"{y} 18:30","u":"ワインド師","m":"ワインド","i":"🗡️"},
-      {"f":"タチウオ","s":"85cm","ct":"5匹","t":f"{d2} 19:00","u":"テンヤ使い","m":"テンヤ","i":"🗡️"},
-      {"f":"タチウオ","s":"78cm","ct":"2匹","t":f"{d3} 19:30","u":"夜勤明け釣り師","m":"ワインド","i":"🗡️"},
-      {"f":"メバル","s":"22cm","ct":"6匹","t":f"{d3} 18:30","u":"ライトゲーマー","m":"メバリング","i":"🐟"},
-      {"f":"アジ","s":"20cm","ct":"15匹","t":f"{d4} 17:00","u":"アジンガー","m":"アジング","i":"🐟"},
-     ],
-     "明石港":[
-      {"f":"タコ","s":"520g","ct":"2匹","t":f"{y} 10:00","u":"タコ釣り名人","m":"タコテンヤ","i":"🐙"},
-      {"f":"メバル","s":"24cm","ct":"8匹","t":f"{y} 18:00","u":"メバル職人","m":"エビ撒き","i":"🐟"},
-      {"f":"タコ","s":"400g","ct":"3匹","t":f"{d2} 11:00","u":"タコエギ師","m":"タコエギ","i":"🐙"},
-      {"f":"ガシラ","s":"26cm","ct":"5匹","t":f"{d2} 19:30","u":"根魚師","m":"落とし込み","i":"🐡"},
-      {"f":"メバル","s":"22cm","ct":"10匹","t":f"{d3} 18:30","u":"常連さん","m":"メバリング","i":"🐟"},
-      {"f":"チヌ","s":"40cm","ct":"1匹","t":f"{d4} 09:00","u":"明石チヌ師","m":"フカセ釣り","i":"🐡"},
-      {"f":"アジ","s":"20cm","ct":"20匹","t":f"{d3} 07:00","u":"朝釣り組","m":"サビキ","i":"🐟"},
-     ],
-     "芦屋浜":[
-      {"f":"キス","s":"22cm","ct":"8匹","t":f"{y} 09:00","u":"投げ釣り師","m":"投げ釣り","i":"🐟"},
-      {"f":"カレイ","s":"28cm","ct":"2匹","t":f"{d2} 10:30","u":"カレイ狙い","m":"投げ釣り","i":"🐟"},
-      {"f":"チヌ","s":"35cm","ct":"1匹","t":f"{d3} 14:00","u":"エサ釣り師","m":"フカセ釣り","i":"🐡"},
-      {"f":"ガシラ","s":"18cm","ct":"5匹","t":f"{d4} 19:00","u":"穴釣り初心者","m":"穴釣り","i":"🐡"},
-     ],
-     "ポートアイランド北公園":[
-      {"f":"メバル","s":"22cm","ct":"5匹","t":f"{y} 18:30","u":"メバリスト","m":"メバリング","i":"🐟"},
-      {"f":"ガシラ","s":"20cm","ct":"4匹","t":f"{d2} 19:00","u":"根魚ハンター","m":"ブラクリ","i":"🐡"},
-      {"f":"アジ","s":"18cm","ct":"15匹","t":f"{d4} 17:30","u":"アジンガー","m":"アジング","i":"🐟"},
-     ],
-     "林崎漁港":[
-      {"f":"メバル","s":"23cm","ct":"7匹","t":f"{y} 18:00","u":"漁港メバル師","m":"エビ撒き","i":"🐟"},
-      {"f":"アジ","s":"20cm","ct":"25匹","t":f"{d2} 06:30","u":"朝釣り常連","m":"サビキ","i":"🐟"},
-      {"f":"ガシラ","s":"22cm","ct":"6匹","t":f"{d2} 19:30","u":"根魚大好き","m":"穴釣り","i":"🐡"},
-      {"f":"タコ","s":"350g","ct":"2匹","t":f"{d4} 11:00","u":"タコ狙い","m":"タコエギ","i":"🐙"},
-     ],
-     "岩屋港(淡路島)":[
-      {"f":"メバル","s":"25cm","ct":"8匹","t":f"{y} 18:30","u":"淡路メバル師","m":"プラグ","i":"🐟"},
-      {"f":"アジ","s":"22cm","ct":"30匹","t":f"{d2} 07:00","u":"淡路遠征組","m":"サビキ","i":"🐟"},
-      {"f":"アオリイカ","s":"胴長20cm","ct":"3杯","t":f"{d3} 17:00","u":"エギンガー","m":"エギング","i":"🦑"},
-      {"f":"チヌ","s":"42cm","ct":"2匹","t":f"{d4} 09:00","u":"淡路チヌ師","m":"フカセ釣り","i":"🐡"},
-     ],
-     "赤穂港":[
-      {"f":"メバル","s":"24cm","ct":"6匹","t":f"{y} 18:00","u":"赤穂釣り人","m":"メバリング","i":"🐟"},
-      {"f":"ガシラ","s":"22cm","ct":"8匹","t":f"{d2} 19:00","u":"根魚好き","m":"穴釣り","i":"🐡"},
-      {"f":"アジ","s":"20cm","ct":"20匹","t":f"{d3} 07:00","u":"朝活組","m":"サビキ","i":"🐟"},
-     ],
-     "姫路港":[
-      {"f":"メバル","s":"22cm","ct":"5匹","t":f"{y} 18:30","u":"姫路アングラー","m":"メバリング","i":"🐟"},
-      {"f":"チヌ","s":"40cm","ct":"2匹","t":f"{d2} 09:00","u":"姫路チヌ師","m":"落とし込み","i":"🐡"},
-      {"f":"アジ","s":"18cm","ct":"30匹","t":f"{d3} 07:00","u":"姫路サビキ師","m":"サビキ","i":"🐟"},
-      {"f":"タコ","s":"450g","ct":"2匹","t":f"{d4} 10:00","u":"タコ師","m":"タコテンヤ","i":"🐙"},
-     ],
-    }def collect():
-    print(f"🎣 収集開始: {fd(TODAY)}")
-    scraped={}
+COLLECTED_PATH="fishing-data.json"
+def load_collected(path=None):
+    """collect_fishing_data の出力（fishing-data.json）の spots。なければ空"""
     try:
-        raw=scrape_all()
-        for c in raw:
-            sp=c.pop("spot")
-            if sp not in scraped: scraped[sp]=[]
-            scraped[sp].append(c)
-        print(f"  スクレイピング: {sum(len(v) for v in scraped.values())}件")
-    except Exception as e:
-        print(f"  スクレイピング失敗: {e}")
-    sea=seasonal(); final={}
+        with open(path or COLLECTED_PATH,encoding="utf-8") as f: return json.load(f).get("spots",[])
+    except (FileNotFoundError,json.JSONDecodeError) as e:
+        print(f"  収集データなし: {e}"); return []
+def site_catch(d,source):
+    """収集データの1件をサイトの釣果 {f,s,ct,t,u,m,i,src} に（source はソース名。釣り場が SPOTS にないものは None）"""
+    rec=CatchRecord.from_dict(d); x=rec.extra
+    sp=dedup.catch_spot(x,source)
+    if sp not in SPOTS: return None,None
+    return sp,{"f":rec.fish,"s":rec.size_raw or "-","ct":rec.count_raw or "-","t":sd(rec.date) if rec.date else rec.date_raw,
+               "u":rec.user or source,"m":rec.method or "-","i":FISH_ICON.get(rec.fish,rec.emoji or species_emoji(rec.species)),"src":source}
+
+# 釣果が PAD_MIN 件に満たない釣り場は、履歴DBから作った例年の傾向（seasonal.py）を PAD_MAX 件まで添える
+PAD_MIN=3; PAD_MAX=5
+def baseline_catches(base,sp,skip=()):
+    """(釣り場, 今週) の例年の傾向をサイトの釣果の形に（skip の魚種IDは除く。日付がないので履歴・集計には入らない）"""
+    out=[]
+    for e in base.lookup(sp,TODAY.isocalendar()[1]):
+        if e.species in skip: continue
+        f=species_name(e.species) or e.species
+        s="-" if e.size_lo is None else f"{e.size_lo:.0f}{e.size_unit}" if round(e.size_lo)==round(e.size_hi) else f"{e.size_lo:.0f}-{e.size_hi:.0f}{e.size_unit}"
+        out.append({"f":f,"s":s,"ct":f"{e.count:.0f}匹前後" if e.count else "-","t":"例年この時期","u":f"例年の傾向（釣れた日{e.probability:.0%}）",
+                    "m":e.method or "-","i":FISH_ICON.get(f,species_emoji(e.species))})
+    return out[:PAD_MAX]
+
+def collect(spots=None):
+    """収集済みデータ（なければ読み込む）を釣り場ごとにまとめ、少ない釣り場は例年の傾向で補う"""
+    print(f"🎣 サイトデータ作成: {fd(TODAY)}")
+    got={}
+    for src in (load_collected() if spots is None else spots):
+        for d in src.get("catches",[]):
+            sp,c=site_catch(d,src.get("name",""))
+            if c: got.setdefault(sp,[]).append((c,src.get("source","")))
+    print(f"  収集データ: {sum(len(v) for v in got.values())}件")
+    base=seasonal.load(DB_PATH); final={}
     for sp in SPOTS:
-        s=scraped.get(sp,[]); f=sea.get(sp,[])
-        final[sp]=(s if len(s)>=3 else s+f)[:15]
+        s=[c for c,_ in dedup.unique(got.get(sp,[]),lambda x,sp=sp:dedup.from_site(x[0],sp,x[1],TODAY))][:15]
+        final[sp]=s if len(s)>=PAD_MIN else s+baseline_catches(base,sp,{species_id(c["f"]) for c in s})
     print(f"  合計: {sum(len(v) for v in final.values())}件")
     return final
 
-def gen_html(data):
-    tmr=TODAY+timedelta(days=1); ts=sd(tmr)
+ASSET_DIR = "assets"
+DATA_DIR = "data"
+# アプリ本体（内容が変わったときだけファイル名のハッシュが変わるので長期キャッシュできる）
+CSS = r"""@import url('https://fonts.googleapis.com/css2?family=Noto+Sans+JP:wght@400;600;800&display=swap');*{margin:0;padding:0;box-sizing:border-box}:root{--bg:#0b1929;--card:#12243d;--card2:#182d4a;--acc:#00c2e0;--acc2:#0090b8;--gold:#f5a623;--grn:#26b895;--red:#e8634a;--txt:#e4ecf5;--txt2:#7a90a8;--bdr:#1c3455}html{font-size:15px;scroll-behavior:smooth}body{font-family:'Noto Sans JP',sans-serif;background:var(--bg);color:var(--txt);min-height:100vh;padding-bottom:68px}.hdr{background:linear-gradient(180deg,#0f1f35,var(--bg));border-bottom:1px solid var(--bdr);padding:14px 16px 10px;position:sticky;top:0;z-index:100;backdrop-filter:blur(12px)}.hdr-row{display:flex;justify-content:space-between;align-items:center}.logo{font-size:1.2rem;font-weight:800;background:linear-gradient(120deg,var(--acc),var(--grn));-webkit-background-clip:text;-webkit-text-fill-color:transparent}.ver{font-size:.6rem;font-weight:600;background:var(--acc);color:#000;padding:2px 7px;border-radius:8px}.hdr-date{font-size:.72rem;color:var(--txt2);margin-top:3px}.tabs{display:flex;gap:6px;padding:10px 16px 0;overflow-x:auto}.tabs::-webkit-scrollbar{display:none}.tab{flex-shrink:0;padding:7px 15px;border-radius:18px;font-size:.78rem;font-weight:600;border:1px solid var(--bdr);background:transparent;color:var(--txt2);cursor:pointer;font-family:inherit}.tab.on{background:var(--acc);color:#000;border-color:var(--acc)}.sec{padding:14px 16px;display:none}.sec.on{display:block}.sec-t{font-size:1rem;font-weight:800;margin-bottom:10px;display:flex;align-items:center;gap:6px}.pc{background:linear-gradient(140deg,var(--card),var(--card2));border:1px solid var(--bdr);border-radius:14px;padding:14px;margin-bottom:12px;position:relative;overflow:hidden}.pc::before{content:'';position:absolute;top:0;left:0;right:0;height:3px}.pc.g1::before{background:linear-gradient(90deg,var(--gold),var(--red))}.pc.g2::before{background:linear-gradient(90deg,var(--acc),var(--grn))}.pc.g3::before{background:linear-gradient(90deg,var(--grn),var(--acc2))}.badge{display:inline-block;font-size:.65rem;font-weight:700;padding:2px 9px;border-radius:10px;margin-bottom:6px}.b1{background:var(--gold);color:#000}.b2{background:var(--acc);color:#000}.b3{background:var(--grn);color:#fff}.pc-name{font-size:1.05rem;font-weight:800;margin-bottom:3px}.pc-desc{font-size:.78rem;color:var(--txt2);line-height:1.5;margin-bottom:10px}.pc-grid{display:grid;grid-template-columns:1fr 1fr;gap:6px;margin-bottom:8px}.pc-item{background:rgba(0,0,0,.2);border-radius:9px;padding:7px 9px}.pc-label{font-size:.62rem;color:var(--txt2)}.pc-val{font-size:.82rem;font-weight:700}.pc-val.hi{color:var(--gold)}.pc-val.ac{color:var(--acc)}.pc-tackle{background:rgba(0,194,224,.07);border:1px solid rgba(0,194,224,.12);border-radius:9px;padding:9px;margin-top:8px}.pc-tt{font-size:.67rem;color:var(--acc);font-weight:700;margin-bottom:3px}.pc-tx{font-size:.78rem;line-height:1.55}.conf{display:flex;align-items:center;gap:6px;margin-top:8px}.conf-bar{flex:1;height:5px;background:rgba(255,255,255,.06);border-radius:3px;overflow:hidden}.conf-fill{height:100%;border-radius:3px}.conf-txt{font-size:.67rem;font-weight:700;min-width:36px;text-align:right}.tide-box{background:var(--card);border:1px solid var(--bdr);border-radius:12px;padding:12px;margin-bottom:12px}.tide-row{display:flex;justify-content:space-between;align-items:center;padding:5px 0}.tide-row+.tide-row{border-top:1px solid rgba(255,255,255,.04)}.tide-k{font-size:.72rem;color:var(--txt2)}.tide-v{font-size:.82rem;font-weight:700}.tide-v.ac{color:var(--acc)}.tide-v.gd{color:var(--gold)}.spot{background:var(--card);border:1px solid var(--bdr);border-radius:14px;margin-bottom:12px;overflow:hidden}.spot-hdr{padding:12px 14px 8px;display:flex;justify-content:space-between;align-items:flex-start}.spot-name{font-size:.95rem;font-weight:800}.spot-cnt{font-size:.62rem;color:var(--acc);font-weight:600;background:rgba(0,194,224,.1);padding:2px 8px;border-radius:8px}.spot-info{font-size:.7rem;color:var(--txt2);padding:0 14px 8px}.catch-list{padding:0 10px 6px}.catch{display:flex;align-items:center;gap:8px;padding:7px 6px;border-top:1px solid rgba(255,255,255,.03)}.catch-icon{font-size:1.1rem}.catch-body{flex:1;min-width:0}.catch-main{font-size:.8rem;font-weight:700}.catch-sub{font-size:.68rem;color:var(--txt2)}.catch-time{font-size:.65rem;color:var(--txt2)}.more-btn{display:block;width:100%;padding:8px;background:rgba(0,194,224,.06);border:none;border-top:1px solid var(--bdr);color:var(--acc);font-size:.75rem;font-weight:600;cursor:pointer;font-family:inherit}.catch.hid{display:none}.nav{position:fixed;bottom:0;left:0;right:0;background:rgba(11,25,41,.95);border-top:1px solid var(--bdr);display:flex;z-index:100;backdrop-filter:blur(12px);padding-bottom:env(safe-area-inset-bottom)}.nav-btn{flex:1;padding:8px 0 6px;text-align:center;font-size:.6rem;font-weight:600;color:var(--txt2);border:none;background:none;cursor:pointer;font-family:inherit}.nav-btn.on{color:var(--acc)}.nav-ico{font-size:1.2rem;display:block;margin-bottom:1px}.area-f{display:flex;gap:5px;flex-wrap:wrap;margin-bottom:10px}.af{padding:5px 12px;border-radius:14px;font-size:.7rem;font-weight:600;border:1px solid var(--bdr);background:transparent;color:var(--txt2);cursor:pointer;font-family:inherit}.af.on{background:var(--card2);border-color:var(--acc);color:var(--acc)}.hist-card{background:var(--card);border:1px solid var(--bdr);border-radius:12px;padding:12px;margin-bottom:8px}.hist-top{display:flex;justify-content:space-between;align-items:center;margin-bottom:4px}.hist-spot{font-size:.82rem;font-weight:700}.hist-date{font-size:.65rem;color:var(--txt2)}.hist-fish{font-size:.78rem;color:var(--gold);font-weight:600}.hist-method{font-size:.68rem;color:var(--txt2);margin-top:2px}.srch{width:100%;padding:9px 12px;margin-bottom:10px;border-radius:10px;border:1px solid var(--bdr);background:var(--card);color:var(--txt);font-size:.82rem;font-family:inherit}.srch:focus{outline:none;border-color:var(--acc)}.divider{height:1px;background:var(--bdr);margin:16px 0}.footer{text-align:center;padding:20px 0 10px;font-size:.65rem;color:var(--txt2)}"""
+JS = r"""var M={cards:{tmr:[],wk:[]},areas:[],spots:{},history:{}},ARS=[],C={},H={ar:'すべて',p:0},L={};
+function pc(rank,cls,bcls,spot,fish,sz,ct,bt,tk,td,conf,desc){var cc=conf>=85?'var(--grn)':conf>=70?'var(--gold)':'var(--red)';return'<div class="pc '+cls+'"><span class="badge '+bcls+'">'+rank+'</span><div class="pc-name">'+spot+'</div><div class="pc-desc">'+desc+'</div><div class="pc-grid"><div class="pc-item"><div class="pc-label">🎯 狙い目</div><div class="pc-val hi">'+fish+'</div></div><div class="pc-item"><div class="pc-label">📏 予想サイズ</div><div class="pc-val">'+sz+'</div></div><div class="pc-item"><div class="pc-label">🐟 予想匹数</div><div class="pc-val">'+ct+'</div></div><div class="pc-item"><div class="pc-label">⏰ ベストタイム</div><div class="pc-val ac">'+bt+'</div></div></div><div class="pc-tackle"><div class="pc-tt">🎣 '+tk+'</div><div class="pc-tx">'+td+'</div></div><div class="conf"><div class="conf-bar"><div class="conf-fill" style="width:'+conf+'%;background:'+cc+'"></div></div><div class="conf-txt" style="color:'+cc+'">信頼度'+conf+'%</div></div></div>'}
+function mkF(id,cb){var c=document.getElementById(id);c.innerHTML='<button class="af on" data-a="すべて">すべて</button>'+ARS.map(function(a){return'<button class="af" data-a="'+a+'">'+a+'</button>'}).join('');c.querySelectorAll('.af').forEach(function(b){b.onclick=function(){c.querySelectorAll('.af').forEach(function(x){x.classList.remove('on')});b.classList.add('on');cb(b.dataset.a)}})};
+function get(u){return C[u]||(C[u]=fetch(u).then(function(r){return r.json()}))}
+function rS(ar){var el=document.getElementById('sList');get(M.spots[ar]).then(function(sp){el.innerHTML=sp.map(function(s){var h='';s.c.forEach(function(c,ci){h+='<div class="catch'+(ci>=5?' hid':'')+'">'+'<div class="catch-icon">'+c.i+'</div><div class="catch-body"><div class="catch-main">'+c.f+' '+c.s+' × '+c.ct+'</div><div class="catch-sub">'+c.u+' | '+c.m+'</div></div><div class="catch-time">'+c.t+'</div></div>'});var mb=s.c.length>5?'<button class="more-btn" onclick="tM(this)">もっと見る（残り'+(s.c.length-5)+'件）</button>':'';return'<div class="spot"><div class="spot-hdr"><div class="spot-name">'+s.n+'</div><div class="spot-cnt">釣果'+s.c.length+'件</div></div><div class="spot-info">📍 '+s.d+'km｜'+s.info+'</div><div class="catch-list">'+h+'</div>'+mb+'</div>'}).join('')})};
+function tM(b){var sp=b.closest('.spot'),hd=sp.querySelectorAll('.catch.hid');if(hd.length){hd.forEach(function(h){h.classList.remove('hid')});b.textContent='閉じる'}else{var al=sp.querySelectorAll('.catch');al.forEach(function(c,i){if(i>=5)c.classList.add('hid')});b.textContent='もっと見る（残り'+(al.length-5)+'件）'}};
+function hc(c){return'<div class="hist-card"><div class="hist-top"><div class="hist-spot">'+c.i+' '+c.sn+'</div><div class="hist-date">'+c.t+'</div></div><div class="hist-fish">'+c.f+' '+c.s+' × '+c.ct+'</div><div class="hist-method">'+c.u+' | '+c.m+'</div></div>'}
+function rH(ar){H={ar:ar,p:0};var el=document.getElementById('hList');el.innerHTML=(M.history[ar]||[]).length?'':'<div class="hist-method">釣果履歴はまだありません</div>';mH()};
+function mH(){var ws=M.history[H.ar]||[],h=H,el=document.getElementById('hList'),mb=document.getElementById('hMore');if(mb)mb.remove();if(H.p>=ws.length)return;var w=ws[H.p++];get(w.f).then(function(l){if(H!==h)return;el.insertAdjacentHTML('beforeend','<div class="sec-t">'+w.w+'</div>'+l.map(hc).join('')+(H.p<ws.length?'<button class="more-btn" id="hMore" onclick="mH()">もっと見る（'+ws[H.p].w+'）</button>':''))})};
+function sq(x,q,ar){var acc=null,n=x.n;function mark(ts){var m=new Uint8Array(n);ts.forEach(function(i){var p=x.p[i],id=0;for(var j=0;j<p.length;j++){id+=p[j];m[id]=1}});return m}function and(m){if(!acc)acc=m;else for(var i=0;i<n;i++)acc[i]&=m[i]}
+q.normalize('NFKC').toLowerCase().split(/\s+/).filter(Boolean).forEach(function(w){var ts=[];x.t.forEach(function(t,i){if(t.indexOf(w)>=0)ts.push(i)});for(var a in x.a)if(a.indexOf(w)>=0)ts.push(x.a[a]);and(mark(ts))});
+if(acc&&ar!=='すべて'){var i=x.t.indexOf(ar.normalize('NFKC').toLowerCase());and(mark(i>=0?[i]:[]))}var r=[];if(acc)for(var i=0;i<n;i++)if(acc[i])r.push(i);return r};
+function fH(){var q=document.getElementById('hQ').value.trim(),ar=H.ar;if(!q){rH(ar);return}var h=H={ar:ar,p:0,q:q},el=document.getElementById('hList');get(M.search).then(function(x){if(H!==h)return;var ids=sq(x,q,ar),top=ids.slice(0,50),ws=M.history['すべて']||[],wi=0,st=0;
+return Promise.all(top.map(function(id){while(id>=st+ws[wi].n){st+=ws[wi].n;wi++}var o=id-st;return get(ws[wi].f).then(function(l){return l[o]})})).then(function(cs){if(H!==h)return;el.innerHTML='<div class="sec-t">🔍 '+ids.length+'件'+(ids.length>top.length?'（新しい'+top.length+'件を表示）':'')+'</div>'+cs.map(hc).join('')})})};
+function sw(id){document.querySelectorAll('.sec').forEach(function(s){s.classList.remove('on')});document.querySelectorAll('.tab').forEach(function(t){t.classList.remove('on')});document.querySelectorAll('.nav-btn').forEach(function(n){n.classList.remove('on')});document.getElementById('sec-'+id).classList.add('on');document.querySelectorAll('[data-sec="'+id+'"]').forEach(function(e){e.classList.add('on')});window.scrollTo(0,0);if(id==='spots'&&!L.s){L.s=1;rS('すべて')}if(id==='history'&&!L.h){L.h=1;rH('すべて')}};
+document.querySelectorAll('.tab').forEach(function(t){t.onclick=function(){sw(t.dataset.sec)}});
+document.querySelectorAll('.nav-btn').forEach(function(n){n.onclick=function(){sw(n.dataset.sec)}});
+function cards(l){return l.map(function(a){return pc.apply(null,a)}).join('')}
+function init(m){M=m;document.getElementById('tmrC').innerHTML=cards(M.cards.tmr);document.getElementById('wkC').innerHTML=cards(M.cards.wk);ARS=M.areas;mkF('aFilt',rS);mkF('hFilt',function(a){H.ar=a;fH()});var T;document.getElementById('hQ').oninput=function(){clearTimeout(T);T=setTimeout(fH,150)}}
+fetch(document.body.dataset.src).then(function(r){return r.json()}).then(init);
+"""
+
+RANKS=[("🥇","g1","b1"),("🥈","g2","b2"),("🥉","g3","b3")]
+def not_stored(data,stored):
+    """表示中の釣果のうち履歴DBにないもの（収集した釣果は DB にも入っているので、DB を読めたときは除く）"""
+    return {sn:[c for c in cc if not (stored and "src" in c)] for sn,cc in data.items()}
+def history_frame(data):
+    """表示中の釣果＋履歴DB（あれば）から集計用の CatchFrame を作る"""
+    rows=[]
+    if os.path.exists(DB_PATH):
+        try:
+            with CatchStore(DB_PATH) as st: rows+=analytics.store_rows(st,today=TODAY)
+        except Exception as e: print(f"  履歴DB読込失敗: {e}"); rows=[]
+    rows+=analytics.site_rows(not_stored(data,bool(rows)),TODAY)
+    return analytics.CatchFrame.from_rows(rows)
+def forecast_features(data):
+    """予報の特徴量（履歴DB・表示中の釣果・日付が同じなら保存済みのものを使うので、計算は1日1回）"""
+    def compute():
+        temps=[]
+        if os.path.exists(DB_PATH):
+            try:
+                with CatchStore(DB_PATH) as st: temps=list(forecast.store_temps(st,today=TODAY))
+            except Exception as e: print(f"  水温の読込失敗: {e}")
+        return forecast.features(history_frame(data),TODAY,seasonal.load(DB_PATH),temps)
+    return STAGES.memo("forecast",stage_cache.digest(SITE_VERSION,stage_cache.file_digest(DB_PATH),TODAY.date(),data),compute)
+def cards(picks,label):
+    """forecast.Forecast.top の結果をおすすめカード（pc() の引数リスト）に"""
+    out=[]
+    for n,(p,(md,cls,bc)) in enumerate(zip(picks,RANKS),1):
+        mz=mazume(p["day"]); bt={"朝まずめ":f"朝まずめ {mz['ams']}","夕まずめ":f"夕まずめ {mz['pms']}"}.get(p["time"],p["time"])
+        tr="上向き" if p["trend"]>1.1 else "下降気味" if p["trend"]<0.9 else "安定"
+        args=[f"{md} {label}{n}",cls,bc,p["spot"],p["fish"],p["size"],p["count"],bt,p["method"] or "-",
+              f"直近30日 {p['reports']}件・1日平均{p['rate']:.1f}匹" if p["reports"] else f"例年この時期 釣れた日{p['probability']:.0%}",
+              p["confidence"],f"{sd(p['day'])} {p['tide']}。{p['fish']}の釣果{tr if p['reports'] else '例年並み'}。"]
+        out.append(args)
+    return out
+
+def fingerprint(b): return hashlib.sha256(b).hexdigest()[:10]
+def write_compressed(path,b):
+    """本体と事前圧縮版（.gz、brotli があれば .br）を書き出す（brotli がなければ前回の古い .br は消す）"""
+    with open(path,"wb") as f: f.write(b)
+    with open(path+".gz","wb") as f: f.write(gzip.compress(b,9,mtime=0))
+    if brotli:
+        with open(path+".br","wb") as f: f.write(brotli.compress(b))
+    elif os.path.exists(path+".br"): os.remove(path+".br")
+def write_asset(name,ext,text,out="."):
+    """assets/<name>.<hash>.<ext> に書き出してパスを返す（古いハッシュのファイルは削除）"""
+    b=text.encode("utf-8"); fn=f"{name}.{fingerprint(b)}.{ext}"; d=os.path.join(out,ASSET_DIR)
+    os.makedirs(d,exist_ok=True)
+    for old in glob.glob(os.path.join(d,f"{name}.*.{ext}*")):
+        if not os.path.basename(old).startswith(fn): os.remove(old)
+    if not os.path.exists(os.path.join(d,fn)): write_compressed(os.path.join(d,fn),b)
+    return f"{ASSET_DIR}/{fn}"
+def write_data(data,out=".",stored=True):
+    """表示データを書き出し、目次（site.json）のURLを返す
+    釣り場は地域ごと、履歴は地域×週ごとのシャードにし、ページは選んだ地域・ページの分だけ読み込む
+    stored=False なら履歴DB・予報は使わない（履歴は表示中の釣果だけ、おすすめカードは空）"""
+    d=os.path.join(out,DATA_DIR); keep=set()
+    def put(rel,obj):
+        b=json.dumps(obj,ensure_ascii=False,separators=(",",":")).encode("utf-8")
+        path=os.path.join(d,rel); os.makedirs(os.path.dirname(path),exist_ok=True)
+        write_compressed(path,b); keep.add(rel)
+        return f"{DATA_DIR}/{rel}?v={fingerprint(b)}"
+    spots=spot_list(data); hist=history_list(data,stored)
+    areas=list(dict.fromkeys([s["a"] for s in spots]+[h["a"] for h in hist]))
+    man={"cards":recommend_cards(data) if stored else {"tmr":[],"wk":[]},"areas":areas,"spots":{},"history":{}}
+    for a in [ALL]+areas:
+        sl=area_slug(a)
+        man["spots"][a]=put(f"areas/{sl}.json",[s for s in spots if a in (ALL,s["a"])])
+        man["history"][a]=[{"w":lb,"n":len(items),"f":put(f"history/{sl}/{wk}.json",items)}
+                           for wk,lb,items in weekly([h for h in hist if a in (ALL,h["a"])])]
+    man["search"]=put("search.json",search_index(hist))
+    url=put("site.json",man)
+    # 今回書かなかった古いシャードを消す
+    for root,_,files in os.walk(d):
+        for fn in files:
+            rel=os.path.relpath(os.path.join(root,fn),d).replace(os.sep,"/")
+            if re.sub(r"\.(gz|br)$","",rel) not in keep: os.remove(os.path.join(root,fn))
+    return url
+
+ALL="すべて"
+HISTORY_DAYS=365
+def area_slug(a): return "all" if a==ALL else fingerprint(a.encode("utf-8"))[:8]
+def sort_key(t):
+    """表示用の日時文字列（"10/17(土) 06:30" など）を並べ替え用の "YYYY-MM-DD HH:MM" に"""
+    day=parse_date(t,TODAY)
+    if not day: return ""
+    cm=re.search(r"(\d{1,2}):(\d{2})",t)
+    return f"{day.isoformat()} {int(cm.group(1)):02d}:{cm.group(2)}" if cm else day.isoformat()
+def spot_list(data):
+    """釣り場ごとの釣果（新しい順）"""
+    return [{"n":sn,"a":m["a"],"d":m["d"],"info":m["info"],
+             "c":[{k:c[k] for k in ("f","s","ct","t","u","m","i")} for c in sorted(data[sn],key=lambda c:sort_key(c["t"]),reverse=True)]}
+            for sn,m in SPOTS.items() if data.get(sn)]
+def history_list(data,use_db=True):
+    """表示中の釣果＋履歴DB（直近 HISTORY_DAYS 日、use_db=False なら読まない）を新しい順に"""
+    out=[]; stored=False
+    if use_db and os.path.exists(DB_PATH):
+        try:
+            with CatchStore(DB_PATH) as st:
+                rows=st.history((TODAY-timedelta(days=HISTORY_DAYS)).date(),("spot","species","fish","size","count","method","source","user","date","extra"))
+            for spot,sid,fish,size,count,method,source,user,day,extra in rows:
+                # 釣り場は本文・場所・エリア名から解決（カタログの釣り場にならない釣果は表示中の釣果と同じく載せない）
+                sn=dedup.catch_spot(json.loads(extra or "{}"),spot)
+                if sn not in SPOTS: continue
+                f=species_name(sid) or fish
+                out.append({"f":f,"s":size,"ct":count,"t":sd(datetime.fromisoformat(day)),"u":source,"m":method,
+                            "i":FISH_ICON.get(f,species_emoji(sid)),"sn":sn,"a":SPOTS.get(sn,{}).get("a","その他"),"k":day,"b":bait(user)})
+            stored=True
+        except Exception as e: print(f"  履歴DB読込失敗: {e}"); out=[]
+    for sn,cc in not_stored(data,stored).items():
+        for c in cc:
+            k=sort_key(c["t"])
+            if k: out.append({**{x:c[x] for x in ("f","s","ct","t","u","m","i")},"sn":sn,"a":SPOTS.get(sn,{}).get("a","その他"),"k":k,"b":bait(c["u"])})
+    out.sort(key=lambda h:h["k"],reverse=True)
+    return out
+def bait(u): return u[3:].strip() if u.startswith("エサ:") else ""
+def weekly(hist):
+    """新しい順の履歴を ISO 週ごとに (キー, 表示名, 釣果) で分ける"""
+    weeks={}
+    for h in hist:
+        day=datetime.fromisoformat(h["k"][:10]); y,w,_=day.isocalendar()
+        weeks.setdefault(f"{y}-W{w:02d}",(day-timedelta(days=day.weekday()),[]))[1].append(
+            {k:v for k,v in h.items() if k not in ("a","k","b")})
+    return [(wk,f"{mon.month}/{mon.day}〜{(mon+timedelta(days=6)).month}/{(mon+timedelta(days=6)).day}",items)
+            for wk,(mon,items) in weeks.items()]
+
+RE_WORD=re.compile(r"[\s/／・、,，+＋&＆()（）]+")
+def norm(t): return unicodedata.normalize("NFKC",t).lower().strip()
+def search_terms(h):
+    """1件の釣果の検索語（魚種・釣り場・地域・釣り方・エサ）"""
+    sid=species_id(h["f"]); ts={norm(species_name(sid) or h["f"]),norm(h["sn"]),norm(h["a"])}
+    for w in RE_WORD.split(f'{h["m"]} {h["b"]}'):
+        if norm(w) and norm(w)!="-": ts.add(norm(w))
+    return ts
+def search_index(hist):
+    """履歴（新しい順、添字＝釣果ID）の転置索引
+    t: 検索語（ソート済み）、p: 語ごとの釣果IDの差分列、a: 別名 → 検索語の添字
+    IDは「すべて」の週シャードを先頭から数えた通し番号なので、結果の表示はそのシャードを読むだけで済む"""
+    post={}
+    for i,h in enumerate(hist):
+        for t in search_terms(h): post.setdefault(t,[]).append(i)
+    terms=sorted(post); at={t:n for n,t in enumerate(terms)}
+    names=[(a,species_name(sid)) for a,sid in species_aliases()]+[(a,sn) for sn,al in lexicon.SPOTS.items() for a in al]
+    return {"n":len(hist),"t":terms,"p":[[ids[0]]+[b-a for a,b in zip(ids,ids[1:])] for ids in (post[t] for t in terms)],
+            "a":{norm(a):at[norm(t)] for a,t in names if norm(t) in at and norm(a)!=norm(t)}}
+
+def recommend_cards(data):
+    """明日・週末のおすすめカード（明日から7日分の 釣り場 × 魚種 × 日 の予報の上位）"""
+    tmr=TODAY+timedelta(days=1); ns=next_weekend()
+    fc=forecast.Forecast(forecast_features(data),tmr)
+    return {"tmr":cards(fc.top([tmr]),"おすすめ"),"wk":cards(fc.top([ns,ns+timedelta(days=1)]),"週末")}
+def next_weekend():
     ds=(5-TODAY.weekday())%7
     if ds==0: ds=7
-    ns=TODAY+timedelta(days=max(1,ds)); nu=ns+timedelta(days=1)
+    return TODAY+timedelta(days=max(1,ds))
+
+def build(data,out=".",stored=True):
+    """アプリ本体・表示データを書き出し、index.html の内容を返す（stored=False は履歴DB・予報を使わない）"""
+    css=write_asset("app","css",CSS,out); js=write_asset("app","js",JS,out)
+    return gen_html(css,js,write_data(data,out,stored))
+
+def gen_html(css,js,src):
+    """アプリの外枠（日付・潮汐など当日の文字列だけを含む）"""
+    tmr=TODAY+timedelta(days=1); ts=sd(tmr)
+    ns=next_weekend(); nu=ns+timedelta(days=1)
     ws=f"{sd(ns)}・{sd(nu)}"
     ma=moon(TODAY); tt=tide_type(ma); mi=moon_icon(ma); ti=tide_times(TODAY); mz=mazume(TODAY)
-    tma=moon(tmr); ttt=tide_type(tma); tmz=mazume(tmr)
-    sjs=[]
-    for sn in SPOTS:
-        m=SPOTS[sn]; cc=data.get(sn,[])
-        if not cc: continue
-        cj=",".join(['{'+f'f:"{c["f"]}",s:"{c["s"]}",ct:"{c["ct"]}",t:"{c["t"]}",u:"{c["u"]}",m:"{c["m"]}",i:"{c["i"]}"'+"}" for c in cc])
-        sjs.append('{'+f'n:"{sn}",a:"{m["a"]}",d:{m["d"]},info:"{m["info"]}",c:[{cj}]'+'}')
-    sj=",".join(sjs)
     return f'''<!DOCTYPE html>
 <html lang="ja"><head><meta charset="UTF-8"><meta name="viewport" content="width=device-width,initial-scale=1,maximum-scale=1,user-scalable=no"><meta name="theme-color" content="#0b1929"><title>🎣 神戸釣り情報 v6.0</title>
-<style>@import url('https://fonts.googleapis.com/css2?family=Noto+Sans+JP:wght@400;600;800&display=swap');*{{margin:0;padding:0;box-sizing:border-box}}:root{{--bg:#0b1929;--card:#12243d;--card2:#182d4a;--acc:#00c2e0;--acc2:#0090b8;--gold:#f5a623;--grn:#26b895;--red:#e8634a;--txt:#e4ecf5;--txt2:#7a90a8;--bdr:#1c3455}}html{{font-size:15px;scroll-behavior:smooth}}body{{font-family:'Noto Sans JP',sans-serif;background:var(--bg);color:var(--txt);min-height:100vh;padding-bottom:68px}}.hdr{{background:linear-gradient(180deg,#0f1f35,var(--bg));border-bottom:1px solid var(--bdr);padding:14px 16px 10px;position:sticky;top:0;z-index:100;backdrop-filter:blur(12px)}}.hdr-row{{display:flex;justify-content:space-between;align-items:center}}.logo{{font-size:1.2rem;font-weight:800;background:linear-gradient(120deg,var(--acc),var(--grn));-webkit-background-clip:text;-webkit-text-fill-color:transparent}}.ver{{font-size:.6rem;font-weight:600;background:var(--acc);color:#000;padding:2px 7px;border-radius:8px}}.hdr-date{{font-size:.72rem;color:var(--txt2);margin-top:3px}}.tabs{{display:flex;gap:6px;padding:10px 16px 0;overflow-x:auto}}.tabs::-webkit-scrollbar{{display:none}}.tab{{flex-shrink:0;padding:7px 15px;border-radius:18px;font-size:.78rem;font-weight:600;border:1px solid var(--bdr);background:transparent;color:var(--txt2);cursor:pointer;font-family:inherit}}.tab.on{{background:var(--acc);color:#000;border-color:var(--acc)}}.sec{{padding:14px 16px;display:none}}.sec.on{{display:block}}.sec-t{{font-size:1rem;font-weight:800;margin-bottom:10px;display:flex;align-items:center;gap:6px}}.pc{{background:linear-gradient(140deg,var(--card),var(--card2));border:1px solid var(--bdr);border-radius:14px;padding:14px;margin-bottom:12px;position:relative;overflow:hidden}}.pc::before{{content:'';position:absolute;top:0;left:0;right:0;height:3px}}.pc.g1::before{{background:linear-gradient(90deg,var(--gold),var(--red))}}.pc.g2::before{{background:linear-gradient(90deg,var(--acc),var(--grn))}}.pc.g3::before{{background:linear-gradient(90deg,var(--grn),var(--acc2))}}.badge{{display:inline-block;font-size:.65rem;font-weight:700;padding:2px 9px;border-radius:10px;margin-bottom:6px}}.b1{{background:var(--gold);color:#000}}.b2{{background:var(--acc);color:#000}}.b3{{background:var(--grn);color:#fff}}.pc-name{{font-size:1.05rem;font-weight:800;margin-bottom:3px}}.pc-desc{{font-size:.78rem;color:var(--txt2);line-height:1.5;margin-bottom:10px}}.pc-grid{{display:grid;grid-template-columns:1fr 1fr;gap:6px;margin-bottom:8px}}.pc-item{{background:rgba(0,0,0,.2);border-radius:9px;padding:7px 9px}}.pc-label{{font-size:.62rem;color:var(--txt2)}}.pc-val{{font-size:.82rem;font-weight:700}}.pc-val.hi{{color:var(--gold)}}.pc-val.ac{{color:var(--acc)}}.pc-tackle{{background:rgba(0,194,224,.07);border:1px solid rgba(0,194,224,.12);border-radius:9px;padding:9px;margin-top:8px}}.pc-tt{{font-size:.67rem;color:var(--acc);font-weight:700;margin-bottom:3px}}.pc-tx{{font-size:.78rem;line-height:1.55}}.conf{{display:flex;align-items:center;gap:6px;margin-top:8px}}.conf-bar{{flex:1;height:5px;background:rgba(255,255,255,.06);border-radius:3px;overflow:hidden}}.conf-fill{{height:100%;border-radius:3px}}.conf-txt{{font-size:.67rem;font-weight:700;min-width:36px;text-align:right}}.tide-box{{background:var(--card);border:1px solid var(--bdr);border-radius:12px;padding:12px;margin-bottom:12px}}.tide-row{{display:flex;justify-content:space-between;align-items:center;padding:5px 0}}.tide-row+.tide-row{{border-top:1px solid rgba(255,255,255,.04)}}.tide-k{{font-size:.72rem;color:var(--txt2)}}.tide-v{{font-size:.82rem;font-weight:700}}.tide-v.ac{{color:var(--acc)}}.tide-v.gd{{color:var(--gold)}}.spot{{background:var(--card);border:1px solid var(--bdr);border-radius:14px;margin-bottom:12px;overflow:hidden}}.spot-hdr{{padding:12px 14px 8px;display:flex;justify-content:space-between;align-items:flex-start}}.spot-name{{font-size:.95rem;font-weight:800}}.spot-cnt{{font-size:.62rem;color:var(--acc);font-weight:600;background:rgba(0,194,224,.1);padding:2px 8px;border-radius:8px}}.spot-info{{font-size:.7rem;color:var(--txt2);padding:0 14px 8px}}.catch-list{{padding:0 10px 6px}}.catch{{display:flex;align-items:center;gap:8px;padding:7px 6px;border-top:1px solid rgba(255,255,255,.03)}}.catch-icon{{font-size:1.1rem}}.catch-body{{flex:1;min-width:0}}.catch-main{{font-size:.8rem;font-weight:700}}.catch-sub{{font-size:.68rem;color:var(--txt2)}}.catch-time{{font-size:.65rem;color:var(--txt2)}}.more-btn{{display:block;width:100%;padding:8px;background:rgba(0,194,224,.06);border:none;border-top:1px solid var(--bdr);color:var(--acc);font-size:.75rem;font-weight:600;cursor:pointer;font-family:inherit}}.catch.hid{{display:none}}.nav{{position:fixed;bottom:0;left:0;right:0;background:rgba(11,25,41,.95);border-top:1px solid var(--bdr);display:flex;z-index:100;backdrop-filter:blur(12px);padding-bottom:env(safe-area-inset-bottom)}}.nav-btn{{flex:1;padding:8px 0 6px;text-align:center;font-size:.6rem;font-weight:600;color:var(--txt2);border:none;background:none;cursor:pointer;font-family:inherit}}.nav-btn.on{{color:var(--acc)}}.nav-ico{{font-size:1.2rem;display:block;margin-bottom:1px}}.area-f{{display:flex;gap:5px;flex-wrap:wrap;margin-bottom:10px}}.af{{padding:5px 12px;border-radius:14px;font-size:.7rem;font-weight:600;border:1px solid var(--bdr);background:transparent;color:var(--txt2);cursor:pointer;font-family:inherit}}.af.on{{background:var(--card2);border-color:var(--acc);color:var(--acc)}}.hist-card{{background:var(--card);border:1px solid var(--bdr);border-radius:12px;padding:12px;margin-bottom:8px}}.hist-top{{display:flex;justify-content:space-between;align-items:center;margin-bottom:4px}}.hist-spot{{font-size:.82rem;font-weight:700}}.hist-date{{font-size:.65rem;color:var(--txt2)}}.hist-fish{{font-size:.78rem;color:var(--gold);font-weight:600}}.hist-method{{font-size:.68rem;color:var(--txt2);margin-top:2px}}.divider{{height:1px;background:var(--bdr);margin:16px 0}}.footer{{text-align:center;padding:20px 0 10px;font-size:.65rem;color:var(--txt2)}}</style></head><body>
+<link rel="stylesheet" href="{css}"></head><body data-src="{src}">
 <div class="hdr"><div class="hdr-row"><div><span class="logo">🎣 神戸釣り情報</span> <span class="ver">v6.0</span></div></div><div class="hdr-date">{fd(TODAY)} 自動更新</div></div>
 <div class="tabs"><button class="tab on" data-sec="ai">🤖 AI予測</button><button class="tab" data-sec="spots">📍 釣り場</button><button class="tab" data-sec="history">📊 釣果履歴</button></div>
 <div class="sec on" id="sec-ai">
@@ -231,35 +292,35 @@ def gen_html(data):
 <div class="sec-t">📅 週末 {ws} のおすすめ</div><div id="wkC"></div>
 </div>
 <div class="sec" id="sec-spots"><div class="sec-t">📍 釣りスポット一覧</div><div class="area-f" id="aFilt"></div><div id="sList"></div></div>
-<div class="sec" id="sec-history"><div class="sec-t">📊 最近の釣果履歴</div><div class="area-f" id="hFilt"></div><div id="hList"></div></div>
+<div class="sec" id="sec-history"><div class="sec-t">📊 最近の釣果履歴</div><input class="srch" id="hQ" type="search" placeholder="🔍 魚種・釣り場・釣り方・エサで検索"><div class="area-f" id="hFilt"></div><div id="hList"></div></div>
 <div class="nav"><button class="nav-btn on" data-sec="ai"><span class="nav-ico">🤖</span>AI予測</button><button class="nav-btn" data-sec="spots"><span class="nav-ico">📍</span>釣り場</button><button class="nav-btn" data-sec="history"><span class="nav-ico">📊</span>履歴</button></div>
-<script>
-var D={{spots:[{sj}]}};
-function pc(rank,cls,bcls,spot,fish,sz,ct,bt,tk,td,conf,desc){{var cc=conf>=85?'var(--grn)':conf>=70?'var(--gold)':'var(--red)';return'<div class="pc '+cls+'"><span class="badge '+bcls+'">'+rank+'</span><div class="pc-name">'+spot+'</div><div class="pc-desc">'+desc+'</div><div class="pc-grid"><div class="pc-item"><div class="pc-label">🎯 狙い目</div><div class="pc-val hi">'+fish+'</div></div><div class="pc-item"><div class="pc-label">📏 予想サイズ</div><div class="pc-val">'+sz+'</div></div><div class="pc-item"><div class="pc-label">🐟 予想匹数</div><div class="pc-val">'+ct+'</div></div><div class="pc-item"><div class="pc-label">⏰ ベストタイム</div><div class="pc-val ac">'+bt+'</div></div></div><div class="pc-tackle"><div class="pc-tt">🎣 '+tk+'</div><div class="pc-tx">'+td+'</div></div><div class="conf"><div class="conf-bar"><div class="conf-fill" style="width:'+conf+'%;background:'+cc+'"></div></div><div class="conf-txt" style="color:'+cc+'">信頼度'+conf+'%</div></div></div>'}}
-document.getElementById('tmrC').innerHTML=pc('🥇 おすすめ1','g1','b1','南芦屋浜','チヌ（黒鯛）','30-48cm','2-4枚','朝まずめ {tmz["ams"]}','フカセ / エビ撒き','オキアミ+配合エサ。ハリス1.5号。ハネダービー開催中！',92,'{ttt}。チヌ30-48cm実績多数。')+pc('🥈 おすすめ2','g2','b2','神戸空港ベランダ','アジ','14-25cm','25-40匹','朝まずめ {tmz["ams"]}','サビキ仕掛け','アミコマセ+サビキ6号。朝マズメが狙い目。',90,'{ttt}。初心者にもおすすめ。')+pc('🥉 おすすめ3','g3','b3','須磨海釣り公園','アジ + サバ','アジ18-25cm / サバ28cm','アジ30匹+サバ10匹','朝 06:30-09:00','サビキ + のませ','サビキでアジ・サバ、活アジでのませも可。',88,'アジ・サバ回遊安定。ファミリー最適。');
-document.getElementById('wkC').innerHTML=pc('🥇 週末1','g1','b1','南芦屋浜','チヌ大物','35-48cm','3-6枚','朝まずめ 06:15-08:00','フカセ（半日コース）','朝イチから半日。オキアミ+コーンMIX。タモ網必須。',88,'東護岸先端が狙い目。')+pc('🥈 週末2','g2','b2','六甲アイランド','タチウオ','78-95cm','3-5匹','夕まずめ～夜 17:00-21:00','ワインド / テンヤ','ジグヘッド1/2oz+ワーム。ケミホタル必須。',85,'夕まずめの時合い安定。')+pc('🥉 週末3','g3','b3','明石港','メバル + タコ','メバル18-26cm / タコ350-600g','メバル5-10匹 / タコ1-3匹','日中タコ→夕方メバル','タコテンヤ + メバリング','昼タコテンヤ、夕方メバリング。一日で二度おいしい！',82,'タコは明石が本場。');
-var ARS=[...new Set(D.spots.map(function(s){{return s.a}}))];
-function mkF(id,cb){{var c=document.getElementById(id);c.innerHTML='<button class="af on" data-a="すべて">すべて</button>'+ARS.map(function(a){{return'<button class="af" data-a="'+a+'">'+a+'</button>'}}).join('');c.querySelectorAll('.af').forEach(function(b){{b.onclick=function(){{c.querySelectorAll('.af').forEach(function(x){{x.classList.remove('on')}});b.classList.add('on');cb(b.dataset.a)}}}})}};
-function rS(ar){{var el=document.getElementById('sList');var sp=ar==='すべて'?D.spots:D.spots.filter(function(s){{return s.a===ar}});el.innerHTML=sp.map(function(s){{var h='';s.c.forEach(function(c,ci){{h+='<div class="catch'+(ci>=5?' hid':'')+'">'+'<div class="catch-icon">'+c.i+'</div><div class="catch-body"><div class="catch-main">'+c.f+' '+c.s+' × '+c.ct+'</div><div class="catch-sub">'+c.u+' | '+c.m+'</div></div><div class="catch-time">'+c.t+'</div></div>'}});var mb=s.c.length>5?'<button class="more-btn" onclick="tM(this)">もっと見る（残り'+(s.c.length-5)+'件）</button>':'';return'<div class="spot"><div class="spot-hdr"><div class="spot-name">'+s.n+'</div><div class="spot-cnt">釣果'+s.c.length+'件</div></div><div class="spot-info">📍 '+s.d+'km｜'+s.info+'</div><div class="catch-list">'+h+'</div>'+mb+'</div>'}}).join('')}};
-function tM(b){{var sp=b.closest('.spot'),hd=sp.querySelectorAll('.catch.hid');if(hd.length){{hd.forEach(function(h){{h.classList.remove('hid')}});b.textContent='閉じる'}}else{{var al=sp.querySelectorAll('.catch');al.forEach(function(c,i){{if(i>=5)c.classList.add('hid')}});b.textContent='もっと見る（残り'+(al.length-5)+'件）'}}}};
-mkF('aFilt',rS);rS('すべて');
-function rH(ar){{var el=document.getElementById('hList'),all=[];var sp=ar==='すべて'?D.spots:D.spots.filter(function(s){{return s.a===ar}});sp.forEach(function(s){{s.c.forEach(function(c){{all.push({{f:c.f,s:c.s,ct:c.ct,t:c.t,u:c.u,m:c.m,i:c.i,sn:s.n}})}})}});all.sort(function(a,b){{return b.t.localeCompare(a.t)}});el.innerHTML=all.slice(0,30).map(function(c){{return'<div class="hist-card"><div class="hist-top"><div class="hist-spot">'+c.i+' '+c.sn+'</div><div class="hist-date">'+c.t+'</div></div><div class="hist-fish">'+c.f+' '+c.s+' × '+c.ct+'</div><div class="hist-method">'+c.u+' | '+c.m+'</div></div>'}}).join('')}};
-mkF('hFilt',rH);rH('すべて');
-function sw(id){{document.querySelectorAll('.sec').forEach(function(s){{s.classList.remove('on')}});document.querySelectorAll('.tab').forEach(function(t){{t.classList.remove('on')}});document.querySelectorAll('.nav-btn').forEach(function(n){{n.classList.remove('on')}});document.getElementById('sec-'+id).classList.add('on');document.querySelectorAll('[data-sec="'+id+'"]').forEach(function(e){{e.classList.add('on')}});window.scrollTo(0,0)}};
-document.querySelectorAll('.tab').forEach(function(t){{t.onclick=function(){{sw(t.dataset.sec)}}}});
-document.querySelectorAll('.nav-btn').forEach(function(n){{n.onclick=function(){{sw(n.dataset.sec)}}}});
-</script>
-<div class="footer">神戸釣り情報 v6.0 ｜ 自動更新: {fd(TODAY)}<br>データ元: フィッシングマックス・アングラーズ + 季節パターン<br>© 2026 Kobe Fishing Info</div>
+<script src="{js}" defer></script>
+<div class="footer">神戸釣り情報 v6.0 ｜ 自動更新: {fd(TODAY)}<br>データ元: 須磨・平磯海づり公園・カンパリ・フィッシングマックス・アングラーズ + 例年の傾向<br>© 2026 Kobe Fishing Info</div>
 </body></html>'''
 
-if __name__=="__main__":
+def main(spots=None,out=".",job="site"):
+    """収集済みデータと履歴DBから index.html・アセット・データを書き出す（ネットワークは使わない）"""
+    M=run_metrics.start(job)
     try:
-        data=collect()
-        html=gen_html(data)
-        with open("index.html","w",encoding="utf-8") as f: f.write(html)
+        if spots is None: spots=load_collected()
+        key=stage_cache.digest(SITE_VERSION,spots,stage_cache.file_digest(DB_PATH),TODAY.date(),os.path.abspath(out))
+        if STAGES.unchanged("render",key) and os.path.exists(os.path.join(out,"index.html")):
+            print("♻️ 収集結果・履歴DB・日付に変化なし: サイト生成をスキップ"); return
+        with M.stage("aggregate"): data=STAGES.memo("aggregate",stage_cache.digest(SITE_VERSION,spots,stage_cache.file_digest(DB_PATH),TODAY.date()),lambda:collect(spots))
+        with M.stage("render"): html=build(data,out)
+        with M.stage("write"), open(os.path.join(out,"index.html"),"w",encoding="utf-8") as f: f.write(html)
+        STAGES.mark("render",key); STAGES.save()
         print(f"🎉 index.html生成完了！ {len(html):,}バイト")
     except Exception as e:
         print(f"❌ エラー: {e}"); traceback.print_exc()
-        data=seasonal(); html=gen_html(data)
-        with open("index.html","w",encoding="utf-8") as f: f.write(html)
+        M.record_error("site","",e)
+        with M.stage("fallback"):
+            # 保存済みの例年の傾向だけで描画（履歴DB・予報は失敗の原因かもしれないので触らない）
+            base=seasonal.SeasonalBaseline(); data={sp:baseline_catches(base,sp) for sp in SPOTS}; html=build(data,out,stored=False)
+            with open(os.path.join(out,"index.html"),"w",encoding="utf-8") as f: f.write(html)
         print("✅ フォールバック版生成")
+    finally: M.write()
+
+if __name__=="__main__":
+    # 収集は collect_fishing_data.py（まとめて実行するなら pipeline.py）
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ホスト単位のアクセス間隔スケジューラ
+トークンバケットで同一ホストへのリクエスト頻度を制限し、別ホストへのアクセスは並行させる
+"""
+
+import threading
+import time
+from urllib.parse import urlparse
+
+# ホストごとの制限 (1秒あたりのリクエスト数, バースト数)
+HOST_LIMITS = {
+    'sumasakana-park.com': (1.0, 1),
+    'kobeumiduri.jp': (1.0, 1),
+    'fishing.ne.jp': (1.0, 1),
+    'fishingmax.co.jp': (1.0, 1),
+    'anglers.jp': (1.0, 1),
+    'google.com': (0.5, 1),
+}
+DEFAULT_LIMIT = (1.0, 1)
+
+
+class TokenBucket:
+    """スレッドセーフなトークンバケット（rate 個/秒で補充、最大 burst 個）"""
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """トークンを1つ予約し、使えるようになるまでの待ち秒数を返す"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # 不足分は前借りして後続の予約を順番待ちにする
+            self._tokens -= 1
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def acquire(self):
+        """トークンが使えるまで待機し、待った秒数を返す"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+def host_key(url):
+    """URLから制限表のキーになるホスト名を取得（www.google.com → google.com）"""
+    host = (urlparse(url).hostname or url).lower()
+    for key in HOST_LIMITS:
+        if host == key or host.endswith('.' + key):
+            return key
+    return host
+
+
+class HostScheduler:
+    """ホスト名ごとにトークンバケットを割り当てるスケジューラ"""
+
+    def __init__(self, limits=None, default=DEFAULT_LIMIT):
+        self.limits = dict(HOST_LIMITS if limits is None else limits)
+        self.default = default
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def configure(self, host, rate, burst=1):
+        """ホストの制限を変更（既存のバケットは作り直す）"""
+        with self._lock:
+            self.limits[host] = (rate, burst)
+            self._buckets.pop(host, None)
+
+    def bucket(self, url):
+        key = host_key(url)
+        with self._lock:
+            b = self._buckets.get(key)
+            if b is None:
+                rate, burst = self.limits.get(key, self.default)
+                b = self._buckets[key] = TokenBucket(rate, burst)
+            return b
+
+    def acquire(self, url):
+        """URLのホストへアクセスしてよくなるまで待機"""
+        return self.bucket(url).acquire()
+
+
+# 全コレクター共通のスケジューラ
+SCHEDULER = HostScheduler()
+
+
+def acquire(url):
+    """共通スケジューラでURLのホストへのアクセス許可を待つ"""
+    return SCHEDULER.acquire(url)
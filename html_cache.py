@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+取得したHTMLのディスクキャッシュ
+本文はハッシュをキーにgzip圧縮で1回だけ保存し、URLごとに取得スナップショットを記録する
+（リプレイモードではネットワークを使わずここから応答を返す）
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+
+DEFAULT_TTL_DAYS = 14
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+
+class HtmlCache:
+    """コンテンツアドレス方式のHTMLキャッシュ"""
+
+    def __init__(self, directory, ttl_days=DEFAULT_TTL_DAYS, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.objects_dir = os.path.join(directory, 'objects')
+        self.index_path = os.path.join(directory, 'index.json')
+        self.ttl = timedelta(days=ttl_days)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._dirty = False
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self._index = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._index = {}
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest + '.gz')
+
+    def read(self, digest):
+        """ハッシュから本文を読み出す"""
+        with gzip.open(self._object_path(digest), 'rb') as f:
+            return f.read()
+
+    def put(self, url, content, encoding=None, etag=None, last_modified=None):
+        """本文を保存してスナップショットを記録し、ハッシュを返す"""
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp, 'wb', compresslevel=6) as f:
+                f.write(content)
+            os.replace(tmp, path)
+        now = datetime.now().isoformat(timespec='seconds')
+        snap = {
+            'hash': digest,
+            'fetched_at': now,
+            'encoding': encoding,
+            'etag': etag,
+            'last_modified': last_modified,
+        }
+        with self._lock:
+            snaps = self._index.setdefault(url, [])
+            if snaps and snaps[-1]['hash'] == digest:
+                # 内容が同じなら最新スナップショットの時刻と検証ヘッダーだけ更新
+                snaps[-1].update(fetched_at=now, etag=etag or snaps[-1].get('etag'),
+                                 last_modified=last_modified or snaps[-1].get('last_modified'))
+            else:
+                snaps.append(snap)
+            self._dirty = True
+        return digest
+
+    def touch(self, url):
+        """304応答などで最新スナップショットがまだ有効だと確認できた"""
+        with self._lock:
+            snaps = self._index.get(url)
+            if snaps:
+                snaps[-1]['fetched_at'] = datetime.now().isoformat(timespec='seconds')
+                self._dirty = True
+
+    def latest(self, url, at=None):
+        """URLの最新スナップショット（at 指定時はその時刻以前で最新のもの）"""
+        with self._lock:
+            snaps = list(self._index.get(url, []))
+        if at is not None:
+            at = at.isoformat(timespec='seconds')
+            snaps = [s for s in snaps if s['fetched_at'] <= at]
+        return snaps[-1] if snaps else None
+
+    def urls(self):
+        with self._lock:
+            return list(self._index)
+
+    def iter_snapshots(self, url_filter=None):
+        """(url, スナップショット) を取得時刻順に列挙"""
+        with self._lock:
+            items = [(url, s) for url, snaps in self._index.items() for s in snaps
+                     if url_filter is None or url_filter(url)]
+        items.sort(key=lambda x: x[1]['fetched_at'])
+        return items
+
+    def prune(self):
+        """TTL切れと容量超過のスナップショットを削除し、参照されない本文を消す"""
+        cutoff = (datetime.now() - self.ttl).isoformat(timespec='seconds')
+        with self._lock:
+            for url in list(self._index):
+                # 最新スナップショットは TTL 切れでも条件付きリクエスト用に残す
+                snaps = self._index[url]
+                keep = [s for s in snaps[:-1] if s['fetched_at'] >= cutoff] + snaps[-1:]
+                if len(keep) != len(snaps):
+                    self._index[url] = keep
+                    self._dirty = True
+
+            sizes = {}
+            for root, _, files in os.walk(self.objects_dir):
+                for name in files:
+                    if name.endswith('.gz'):
+                        sizes[name[:-3]] = os.path.getsize(os.path.join(root, name))
+
+            # 古いスナップショットから容量上限に収まるまで削る
+            refs = Counter(s['hash'] for snaps in self._index.values() for s in snaps)
+            total = sum(sizes.get(digest, 0) for digest in refs)
+            if total > self.max_bytes:
+                ordered = sorted(((s['fetched_at'], url, s) for url, snaps in self._index.items()
+                                  for s in snaps), key=lambda x: x[0])
+                for _, url, snap in ordered:
+                    if total <= self.max_bytes:
+                        break
+                    self._index[url].remove(snap)
+                    refs[snap['hash']] -= 1
+                    if not refs[snap['hash']]:
+                        total -= sizes.get(snap['hash'], 0)
+                    if not self._index[url]:
+                        del self._index[url]
+                    self._dirty = True
+
+            referenced = {s['hash'] for snaps in self._index.values() for s in snaps}
+            for digest in set(sizes) - referenced:
+                try:
+                    os.remove(self._object_path(digest))
+                except OSError:
+                    pass
+
+    def flush(self):
+        """インデックスを保存"""
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = self.index_path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self._index, f, ensure_ascii=False)
+            os.replace(tmp, self.index_path)
+            self._dirty = False
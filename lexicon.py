@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本文からの魚種・釣り場・サイズ・匹数の抽出
+species.py の魚種別名・釣り場の別名・単位をまとめて1つの照合器にし、1回の走査で全ての言及を拾う
+"""
+
+from typing import NamedTuple
+
+from matcher import Matcher
+from species import NOT_SPECIES, aliases as species_aliases
+from spots import CATALOG
+
+# 釣り場: 別名リスト（位置・エリアとあわせて spots.py のカタログで管理）
+SPOTS = {s.name: list(s.aliases) for s in CATALOG}
+
+# 単位 → 種類（直前に数字があるときだけサイズ・重さ・匹数として扱う）
+# サイズは長さだけ。重さ（「30gのジグ」などの仕掛けの重さも多い）はサイズ・匹数の集計や重複判定には使わない
+UNITS = {
+    'cm': 'size', 'CM': 'size', 'Cm': 'size', 'ｃｍ': 'size', 'ＣＭ': 'size', '㎝': 'size', 'センチ': 'size',
+    'g': 'weight', 'kg': 'weight', 'ｇ': 'weight', 'キロ': 'weight',
+    '匹': 'count', '尾': 'count', '枚': 'count', '杯': 'count', '本': 'count',
+}
+RANGE_MARKS = '-~～〜－'
+# 数字の前へさかのぼる最大文字数（"12.5～20.5 " 程度）
+MAX_NUMBER_LEN = 16
+
+
+class Mention(NamedTuple):
+    """本文中の言及（kind: species / spot / size / weight / count）"""
+    kind: str
+    key: str     # 魚種ID・釣り場名・数値部分（"20-30" など）
+    start: int
+    end: int
+    text: str    # 本文での表記
+
+
+_LEXICON = Matcher(
+    [(alias, ('species', sid)) for alias, sid in species_aliases()]
+    + [(alias, ('spot', spot)) for spot, names in SPOTS.items() for alias in names]
+    + [(unit, ('unit', kind)) for unit, kind in UNITS.items()]
+    + [(word, ('other', word)) for word in NOT_SPECIES]
+)
+
+
+def _number_before(text, end):
+    """text[:end] の末尾にある数値（範囲を含む）の開始位置。なければ -1"""
+    i = end
+    while i > 0 and text[i - 1] == ' ':
+        i -= 1
+    stop = max(0, end - MAX_NUMBER_LEN)
+    start = -1
+    while i > stop:
+        ch = text[i - 1]
+        if ch.isdigit():
+            start = i - 1
+        elif ch not in '.．' and not (ch in RANGE_MARKS and start >= 0 and i > 1 and text[i - 2].isdigit()):
+            break
+        i -= 1
+    return start
+
+
+def scan(text):
+    """本文を1回走査して言及を出現順に返す"""
+    mentions = []
+    for start, end, (kind, key) in _LEXICON.find(text or ''):
+        if kind == 'other':
+            continue
+        if kind == 'unit':
+            num_start = _number_before(text, start)
+            if num_start < 0:
+                continue
+            number = text[num_start:start].strip()
+            mentions.append(Mention(key, number, num_start, end, text[num_start:end]))
+        else:
+            mentions.append(Mention(kind, key, start, end, text[start:end]))
+    return mentions
+
+
+def first_spot(mentions):
+    """最初に出てくる釣り場名（なければ None）"""
+    return next((m.key for m in mentions if m.kind == 'spot'), None)
+
+
+def species_mentions(mentions):
+    """魚種の言及（同じ魚種は最初の1つ）"""
+    seen = set()
+    result = []
+    for m in mentions:
+        if m.kind == 'species' and m.key not in seen:
+            seen.add(m.key)
+            result.append(m)
+    return result
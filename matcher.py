@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+複数パターンの一括照合（Aho-Corasick 法）
+パターン数に関係なく、テキストを1回なめるだけで全パターンの出現位置が分かる
+"""
+
+from collections import deque
+
+
+class Matcher:
+    """文字列パターン → 値 の照合器（構築は1回、照合はテキスト長に比例）"""
+
+    def __init__(self, patterns):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for pattern, value in patterns:
+            if pattern:
+                self._add(pattern, value)
+        self._link()
+
+    def _add(self, pattern, value):
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(pattern), value))
+
+    def _link(self):
+        # 幅優先で失敗リンクを張り、失敗先の出力を引き継ぐ
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[child] = self._goto[f].get(ch, 0) if node else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+                queue.append(child)
+        # 失敗リンクをたどった先まで展開した遷移表（照合時は1文字1回の辞書引きで済む）
+        self._delta = [dict(self._goto[0])]
+        self._delta.extend({} for _ in range(len(self._goto) - 1))
+        for node in self._bfs_order():
+            if node:
+                self._delta[node] = {**self._delta[self._fail[node]], **self._goto[node]}
+
+    def _bfs_order(self):
+        order, queue = [], deque([0])
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            queue.extend(self._goto[node].values())
+        return order
+
+    def iter(self, text):
+        """全ての出現を (開始, 終了, 値) で返す（重なりも含む、終了位置順）"""
+        delta, out = self._delta, self._out
+        node = 0
+        for i, ch in enumerate(text):
+            node = delta[node].get(ch, 0)
+            if out[node]:
+                for length, value in out[node]:
+                    yield i + 1 - length, i + 1, value
+
+    def find(self, text):
+        """重ならない出現を左から（同じ位置なら長いものを優先）返す"""
+        matches = sorted(self.iter(text), key=lambda m: (m[0], m[0] - m[1]))
+        result, pos = [], 0
+        for start, end, value in matches:
+            if start >= pos:
+                result.append((start, end, value))
+                pos = end
+        return result
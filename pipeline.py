@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+収集からサイト生成までの一連の処理
+  fetch → parse → normalize（collect_fishing_data: 取得・解析・ソース間の重複統合）
+  → store（履歴DB）→ aggregate → render（generate_site: 収集結果と履歴DBから生成）
+各ページは1回の実行で1回だけ取得し、サイト生成はネットワークを使わない
+
+使い方:
+  python pipeline.py                 # 収集してサイト生成
+  python pipeline.py --render-only   # 収集せず fishing-data.json と履歴DBからサイト生成
+  python pipeline.py --replay        # キャッシュ済みHTMLから再解析し、.cache/replay-site/ に生成
+  python pipeline.py --force         # 段ごとのメモを使わず全段を計算・書き出し
+ページの本文・前段の出力・日付・コードが前回と同じ段は stage_cache のメモで飛ばす
+"""
+
+import argparse
+import os
+from datetime import datetime
+
+import collect_fishing_data
+import generate_site
+import stage_cache
+from fetcher import CACHE_DIR
+
+REPLAY_SITE_DIR = os.path.join(CACHE_DIR, 'replay-site')
+
+
+def run(collect=True, concurrent=True, replay=False, replay_at=None, output=None, out='.', force=False):
+    """収集（collect=False なら保存済みの収集結果を使う）→ サイト生成（force=True ならメモを使わない）"""
+    if force:
+        collect_fishing_data.STAGES = generate_site.STAGES = stage_cache.StageCache(force=True)
+    spots = None
+    if collect:
+        data = collect_fishing_data.run(concurrent=concurrent, replay=replay, replay_at=replay_at,
+                                        output=output or ('fishing-data.replay.json' if replay else 'fishing-data.json'))
+        spots = data['spots']
+    os.makedirs(out, exist_ok=True)
+    generate_site.main(spots, out=out, job='site-replay' if replay else 'site')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="神戸釣り情報 収集＋サイト生成")
+    parser.add_argument('--render-only', action='store_true', help='収集せず保存済みの収集結果と履歴DBからサイト生成')
+    parser.add_argument('--sequential', action='store_true', help='ソースを1つずつ順番に収集する')
+    parser.add_argument('--replay', action='store_true', help='ネットワークを使わずキャッシュ済みHTMLから再解析する')
+    parser.add_argument('--replay-at', type=datetime.fromisoformat, help='リプレイに使うスナップショットの時刻 (例: 2026-02-10T12:00)')
+    parser.add_argument('--force', action='store_true', help='段ごとのメモを使わず全段を計算・書き出す')
+    parser.add_argument('--out', help=f'サイトの出力先（既定: カレントディレクトリ、リプレイ時は {REPLAY_SITE_DIR}）')
+    args = parser.parse_args()
+    replay = args.replay or args.replay_at is not None
+    run(collect=not args.render_only, concurrent=not args.sequential, replay=replay, replay_at=args.replay_at,
+        out=args.out or (REPLAY_SITE_DIR if replay else '.'), force=args.force)
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+実行メトリクスの記録
+1回の実行（collect_fishing_data.run / generate_site.py）ごとに、URLごとの取得時間の内訳・バイト数・
+ステータス・リトライ、ソースごとの解析時間・釣果数・エラー、段階ごとの経過時間/CPU時間（プロセス全体・段階のスレッド）を集め、
+JSONレポート・Prometheus テキストファイル・履歴（JSON Lines）に書き出す
+
+出力（METRICS_DIR、既定は .cache/metrics/）:
+  <job>-last.json : 直近の実行の全記録
+  <job>.prom      : node_exporter の textfile collector 用
+  history.jsonl   : 実行ごとの要約を1行ずつ追記（KEEP_DAYS 日分）
+
+使い方:
+  python run_metrics.py              # 履歴からホストごとの週次推移を表示
+  python run_metrics.py --weeks 12
+"""
+
+import argparse
+import json
+import os
+import statistics
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+
+import fetcher
+
+METRICS_DIR = os.environ.get('FISHING_METRICS_DIR', os.path.join(fetcher.CACHE_DIR, 'metrics'))
+HISTORY_NAME = 'history.jsonl'
+KEEP_DAYS = 180
+PREFIX = 'kobe_fishing'
+
+# 取得時間の内訳（秒）。connect は名前解決を含み、接続を使い回したリクエストは 0
+TIMINGS = ('wait', 'connect', 'ttfb', 'download', 'total')
+
+
+def _host(url):
+    host = urlparse(url).hostname or ''
+    return host[4:] if host.startswith('www.') else host
+
+
+class RunMetrics:
+    """1回の実行分のメトリクス（スレッドセーフ）"""
+
+    def __init__(self, job='collect'):
+        self.job = job
+        self.started = datetime.now()
+        self._t0 = time.perf_counter()
+        self._cpu0 = time.process_time()
+        self._lock = threading.Lock()
+        self.fetches = []
+        self.parses = []
+        self.errors = []
+        self.stages = []
+
+    def record_fetch(self, url, status, size, attempts, timings, not_modified=False, error=None):
+        """1リクエスト分（timings は TIMINGS の秒数、リトライ時は最後の試行の内訳と全体の total）"""
+        entry = {
+            'url': url,
+            'host': _host(url),
+            'status': status,
+            'bytes': size,
+            'retries': max(0, attempts - 1),
+            'not_modified': not_modified,
+            **{k: round(timings.get(k, 0.0), 4) for k in TIMINGS},
+        }
+        if error:
+            entry['error'] = error
+        with self._lock:
+            self.fetches.append(entry)
+
+    def record_parse(self, source, url, seconds, catches, error=None):
+        entry = {'source': source, 'url': url, 'seconds': round(seconds, 4), 'catches': catches}
+        if error:
+            entry['error'] = error
+        with self._lock:
+            self.parses.append(entry)
+
+    def record_error(self, source, url, error):
+        with self._lock:
+            self.errors.append({'source': source, 'url': url, 'error': f"{type(error).__name__}: {error}"})
+
+    @contextmanager
+    def stage(self, name):
+        """段階の経過時間とCPU時間を記録する
+        cpu はその間のプロセス全体（ワーカースレッドの分も含む。並行して動く段階どうしは重なる）、
+        thread_cpu は段階を実行したスレッドだけのCPU時間"""
+        wall, cpu, thread_cpu = time.perf_counter(), time.process_time(), time.thread_time()
+        try:
+            yield
+        finally:
+            entry = {'stage': name, 'wall': round(time.perf_counter() - wall, 4),
+                     'cpu': round(time.process_time() - cpu, 4),
+                     'thread_cpu': round(time.thread_time() - thread_cpu, 4)}
+            with self._lock:
+                self.stages.append(entry)
+
+    def parse(self, source, url, func, *args, count=len):
+        """func(*args) を実行して解析時間・件数（count(結果)）を記録し、結果を返す"""
+        started = time.perf_counter()
+        try:
+            result = func(*args)
+        except Exception as e:
+            self.record_parse(source, url, time.perf_counter() - started, 0, f"{type(e).__name__}: {e}")
+            raise
+        self.record_parse(source, url, time.perf_counter() - started, count(result))
+        return result
+
+    # ---------------------------------------------------------
+    # 集計・出力
+    # ---------------------------------------------------------
+    def hosts(self):
+        """ホストごとの要約"""
+        by_host = defaultdict(list)
+        for f in self.fetches:
+            by_host[f['host']].append(f)
+        out = {}
+        for host, fs in sorted(by_host.items()):
+            out[host] = {
+                'requests': len(fs),
+                'errors': sum(1 for f in fs if f.get('error') or f['status'] >= 400),
+                'retries': sum(f['retries'] for f in fs),
+                'not_modified': sum(1 for f in fs if f['not_modified']),
+                'bytes': sum(f['bytes'] for f in fs),
+                **{f'{k}_sum': round(sum(f[k] for f in fs), 4) for k in TIMINGS},
+                'ttfb_p50': round(statistics.median(f['ttfb'] for f in fs), 4),
+                'total_max': round(max(f['total'] for f in fs), 4),
+            }
+        return out
+
+    def sources(self):
+        """ソースごとの要約"""
+        out = defaultdict(lambda: {'pages': 0, 'catches': 0, 'parse_seconds': 0.0, 'errors': 0})
+        for p in self.parses:
+            s = out[p['source']]
+            s['pages'] += 1
+            s['catches'] += p['catches']
+            s['parse_seconds'] = round(s['parse_seconds'] + p['seconds'], 4)
+            s['errors'] += 1 if p.get('error') else 0
+        for e in self.errors:
+            out[e['source']]['errors'] += 1
+        return dict(sorted(out.items()))
+
+    def report(self):
+        return {
+            'job': self.job,
+            'started': self.started.isoformat(timespec='seconds'),
+            'wall': round(time.perf_counter() - self._t0, 4),
+            'cpu': round(time.process_time() - self._cpu0, 4),
+            'stages': self.stages,
+            'hosts': self.hosts(),
+            'sources': self.sources(),
+            'fetches': self.fetches,
+            'parses': self.parses,
+            'errors': self.errors,
+        }
+
+    def prometheus(self, report):
+        """Prometheus テキスト形式"""
+        job = f'job="{self.job}"'
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{PREFIX}_{name}{{{','.join([job] + labels)}}} {value}")
+
+        metric('run_timestamp_seconds', 'gauge', 'Run start time',
+               [([], int(self.started.timestamp()))])
+        metric('run_wall_seconds', 'gauge', 'Run wall time', [([], report['wall'])])
+        metric('run_cpu_seconds', 'gauge', 'Run process CPU time', [([], report['cpu'])])
+        metric('stage_wall_seconds', 'gauge', 'Stage wall time',
+               [([f'stage="{s["stage"]}"'], s['wall']) for s in report['stages']])
+        metric('stage_cpu_seconds', 'gauge', 'Process CPU time during the stage, all threads',
+               [([f'stage="{s["stage"]}"'], s['cpu']) for s in report['stages']])
+        metric('stage_thread_cpu_seconds', 'gauge', 'CPU time of the thread that ran the stage',
+               [([f'stage="{s["stage"]}"'], s['thread_cpu']) for s in report['stages']])
+        hosts = report['hosts']
+        for key, kind, help_text in (('requests', 'gauge', 'HTTP requests'),
+                                     ('errors', 'gauge', 'Failed HTTP requests'),
+                                     ('retries', 'gauge', 'HTTP retries'),
+                                     ('bytes', 'gauge', 'Response bytes')):
+            metric(f'host_{key}', kind, help_text, [([f'host="{h}"'], v[key]) for h, v in hosts.items()])
+        metric('host_phase_seconds', 'gauge', 'Summed request time by phase',
+               [([f'host="{h}"', f'phase="{k}"'], v[f'{k}_sum']) for h, v in hosts.items() for k in TIMINGS])
+        metric('host_ttfb_p50_seconds', 'gauge', 'Median time to first byte',
+               [([f'host="{h}"'], v['ttfb_p50']) for h, v in hosts.items()])
+        sources = report['sources']
+        for key, help_text in (('pages', 'Parsed pages'), ('catches', 'Parsed catches'),
+                               ('parse_seconds', 'Parse time'), ('errors', 'Errors')):
+            metric(f'source_{key}', 'gauge', help_text, [([f'source="{s}"'], v[key]) for s, v in sources.items()])
+        return '\n'.join(lines) + '\n'
+
+    def summary(self, report):
+        """履歴に残す1行分（URLごとの記録は含めない）"""
+        return {k: report[k] for k in ('job', 'started', 'wall', 'cpu', 'stages', 'hosts', 'sources')}
+
+    def write(self, directory=METRICS_DIR):
+        """レポート・Prometheus テキストファイルを書き、履歴に追記する（失敗しても実行は止めない）"""
+        try:
+            os.makedirs(directory, exist_ok=True)
+            report = self.report()
+            _write_atomic(os.path.join(directory, f'{self.job}-last.json'),
+                          json.dumps(report, ensure_ascii=False, indent=2))
+            _write_atomic(os.path.join(directory, f'{self.job}.prom'), self.prometheus(report))
+            append_history(self.summary(report), directory)
+            print(f"📈 メトリクス: {directory}/{self.job}-last.json（{len(self.fetches)}リクエスト）")
+            return report
+        except Exception as e:
+            print(f"⚠️ メトリクス書き出し失敗: {e}")
+            return None
+
+
+def _write_atomic(path, text):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def load_history(directory=METRICS_DIR):
+    try:
+        with open(os.path.join(directory, HISTORY_NAME), 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def append_history(entry, directory=METRICS_DIR):
+    """履歴に1行追記し、KEEP_DAYS より古い行を落とす"""
+    cutoff = (datetime.now() - timedelta(days=KEEP_DAYS)).isoformat()
+    rows = [r for r in load_history(directory) if r.get('started', '') >= cutoff] + [entry]
+    _write_atomic(os.path.join(directory, HISTORY_NAME),
+                  ''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in rows))
+
+
+def weekly_trend(rows, weeks=8):
+    """ホストごと・ISO週ごとの (実行数, 1リクエストあたり平均秒, TTFB中央値の中央値, エラー数)"""
+    since = (datetime.now() - timedelta(weeks=weeks)).isoformat()
+    table = defaultdict(lambda: defaultdict(list))
+    for r in rows:
+        if r.get('started', '') < since:
+            continue
+        y, w, _ = datetime.fromisoformat(r['started']).isocalendar()
+        for host, h in r.get('hosts', {}).items():
+            table[host][f"{y}-W{w:02d}"].append(h)
+    out = {}
+    for host, by_week in sorted(table.items()):
+        out[host] = {
+            wk: (len(hs),
+                 sum(h['total_sum'] for h in hs) / max(1, sum(h['requests'] for h in hs)),
+                 statistics.median(h['ttfb_p50'] for h in hs),
+                 sum(h['errors'] for h in hs))
+            for wk, hs in sorted(by_week.items())
+        }
+    return out
+
+
+# 現在の実行（collect_fishing_data / generate_site が開始時に入れ替える）
+METRICS = RunMetrics()
+
+
+def start(job):
+    """新しい実行の記録を始める"""
+    global METRICS
+    METRICS = RunMetrics(job)
+    return METRICS
+
+
+def current():
+    return METRICS
+
+
+# 共通フェッチャーの取得はすべて現在の実行に記録する
+fetcher.add_listener(lambda *args, **kwargs: METRICS.record_fetch(*args, **kwargs))
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="実行メトリクスの週次推移")
+    ap.add_argument('--weeks', type=int, default=8, help='表示する週数')
+    ap.add_argument('--dir', default=METRICS_DIR, help='メトリクスのディレクトリ')
+    args = ap.parse_args()
+    trend = weekly_trend(load_history(args.dir), args.weeks)
+    if not trend:
+        print("❌ 履歴がありません（collect_fishing_data.py を実行すると記録されます）")
+    for host, weeks in trend.items():
+        print(f"🌐 {host}")
+        for wk, (runs, avg, ttfb, errors) in weeks.items():
+            print(f"  {wk}  実行{runs:>3}回  平均{avg:6.2f}秒/件  TTFB中央値{ttfb:6.2f}秒  エラー{errors:>3}件")
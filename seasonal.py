@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+釣り場 × 魚種 × ISO週 の例年の傾向（季節の基準表）
+履歴DBの釣果を (釣り場, 魚種, 日) ごとに1件へまとめて保存し、前後1週を含めた同じ時期の
+  釣れる確率（その釣り場で釣果の出た日のうち、その魚種が釣れた日の割合）・サイズ・匹数・釣り方
+を .cache/seasonal-baseline.json の表にしておく
+前回以降に登録された釣果だけを取り込み、その日を含む週の行だけを計算し直す（同じ日の釣果は何度取り込んでも同じ結果）
+登録後に重複になった・釣り場が変わった釣果（catch_store の changed）の日は、DBの今の状態で取り込み直す
+サイトで釣果の少ない釣り場を補うときは (釣り場, 週) の表を引くだけ
+
+使い方:
+  python seasonal.py                     # 履歴DBから更新して今週の表を表示
+  python seasonal.py --week 20           # 指定した週の表を表示
+  python seasonal.py --rebuild           # 保存済みの表を捨てて全件から作り直す
+"""
+
+import argparse
+import functools
+import json
+import math
+import os
+import statistics
+import threading
+from collections import Counter
+from datetime import date
+from typing import NamedTuple
+
+import dedup
+from catch_store import DB_PATH, CatchStore
+from fetcher import CACHE_DIR
+from species import species_name
+
+VERSION = 2
+BASELINE_PATH = os.path.join(CACHE_DIR, 'seasonal-baseline.json')
+# 前後何週までを同じ時期として数えるか
+WINDOW_WEEKS = 1
+# 表に載せる最小の釣れた日数
+MIN_DAYS = 2
+
+
+class Expected(NamedTuple):
+    """ある時期のある釣り場での1魚種の例年の傾向"""
+    species: str
+    probability: float
+    size_lo: float
+    size_hi: float
+    size_unit: str
+    count: float
+    method: str
+    days: int
+    observed: int
+
+
+@functools.lru_cache(maxsize=None)
+def week_of(ordinal):
+    """日の序数の ISO週番号"""
+    return date.fromordinal(ordinal).isocalendar()[1]
+
+
+@functools.lru_cache(maxsize=None)
+def window_of(ordinal):
+    """その日の週と前後 WINDOW_WEEKS 週の ISO週番号（実際の暦で数えるので、52週の年の年末は第1週へ続き第53週は入らない）"""
+    return frozenset(week_of(ordinal + 7 * d) for d in range(-WINDOW_WEEKS, WINDOW_WEEKS + 1))
+
+
+def _value(v):
+    return None if v is None or math.isnan(v) else v
+
+
+def _merge(old, new):
+    """同じ (釣り場, 魚種, 日) の釣果を1件に（サイズは最小〜最大、匹数は最大、釣り方は最初のもの）"""
+    if old is None:
+        return new
+    lo = min((v for v in (old[0], new[0]) if v is not None), default=None)
+    hi = max((v for v in (old[1], new[1]) if v is not None), default=None)
+    count = max((v for v in (old[3], new[3]) if v is not None), default=None)
+    return [lo, hi, old[2] or new[2], count, old[4] or new[4]]
+
+
+def _median(values):
+    return statistics.median(values) if values else None
+
+
+class SeasonalBaseline:
+    """季節の基準表
+    days: 釣り場 → 魚種ID → 日の序数 → [サイズ下限, 上限, 単位, 匹数, 釣り方]（魚種ID '' は釣果の出た日）
+    table: 釣り場 → ISO週 → Expected の並びのリスト"""
+
+    def __init__(self, path=BASELINE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.watermark = None
+        self.changed = None
+        self.days = {}
+        self.table = {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            if saved.get('version') == VERSION:
+                self.watermark = saved['watermark']
+                self.changed = saved['changed']
+                self.days = saved['days']
+                self.table = saved['table']
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            pass
+
+    def update(self, store):
+        """前回以降に登録された釣果を取り込み、登録後に変わった釣果の日は取り込み直して、
+        影響する週の行を計算し直し、取り込んだ件数（取り込み直した日数を含む）を返す"""
+        rows = store.added_since(self.watermark)
+        dates, changed = store.changed_since(self.changed)
+        # 初回は全件を今の状態で取り込むので、取り込み直す日はない
+        dates = dates if self.watermark is not None else set()
+        touched = set()
+        with self._lock:
+            if dates:
+                # 変わった日をいったん全ての釣り場・魚種から外し、重複を除いた今の釣果で数え直す
+                redo = {str(date.fromisoformat(d).toordinal()) for d in dates}
+                for spot, by_species in self.days.items():
+                    for cell in by_species.values():
+                        for day in redo & cell.keys():
+                            del cell[day]
+                            touched |= {(spot, w) for w in window_of(int(day))}
+            for row in [*store.on_dates(dates), *rows]:
+                touched |= self._add(row)
+            for spot, week in touched:
+                self._derive(spot, week)
+            if rows:
+                self.watermark = rows[-1]['first_seen']
+            self.changed = changed
+        return len(rows) + len(dates)
+
+    def _add(self, row):
+        """1件を日ごとの表へ入れ、影響する (釣り場, 週) を返す"""
+        c = dedup.from_row(row)
+        if not c.spot:
+            return set()
+        day = str(c.day)
+        # '' には魚種の分からない釣果・「釣果なし」も含めて釣果の出た日を数える
+        self.days.setdefault(c.spot, {}).setdefault('', {})[day] = 1
+        if c.species:
+            cell = self.days[c.spot].setdefault(c.species, {})
+            cell[day] = _merge(cell.get(day), [_value(c.size_lo), _value(c.size_hi), row['size_unit'],
+                                                _value(c.count_hi), row['method']])
+        return {(c.spot, w) for w in window_of(c.day)}
+
+    def _derive(self, spot, week):
+        """(釣り場, 週) の行を作り直す"""
+        hits = {sid: {int(d): v for d, v in cell.items() if week in window_of(int(d))}
+                for sid, cell in self.days.get(spot, {}).items()}
+        observed = len(hits.pop('', {}))
+        rows = []
+        for sid, cell in hits.items():
+            if len(cell) < MIN_DAYS:
+                continue
+            mids = [(lo + hi) / 2 for lo, hi, *_ in cell.values() if lo is not None and hi is not None]
+            sizes = statistics.quantiles(mids, n=4) if len(mids) >= 2 else mids * 2
+            unit = Counter(v[2] for v in cell.values() if v[2]).most_common(1)
+            method = Counter(v[4] for v in cell.values() if v[4] and v[4] != '-').most_common(1)
+            count = _median([v[3] for v in cell.values() if v[3] is not None])
+            rows.append([sid, round(len(cell) / observed, 3),
+                         round(sizes[0], 1) if sizes else None, round(sizes[-1], 1) if sizes else None,
+                         unit[0][0] if unit else '', round(count, 1) if count is not None else None,
+                         method[0][0] if method else '', len(cell), observed])
+        rows.sort(key=lambda r: (-r[1], -r[7]))
+        if rows:
+            self.table.setdefault(spot, {})[str(week)] = rows
+        else:
+            self.table.get(spot, {}).pop(str(week), None)
+
+    def lookup(self, spot, week):
+        """(釣り場, ISO週) の例年の傾向（釣れる確率の高い順）"""
+        return [Expected(*r) for r in self.table.get(spot, {}).get(str(week), [])]
+
+    def expected(self, spot, species, week):
+        """(釣り場, 魚種ID, ISO週) の例年の傾向（なければ None）"""
+        return next((e for e in self.lookup(spot, week) if e.species == species), None)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + '.tmp'
+        with self._lock, open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': VERSION, 'watermark': self.watermark, 'changed': self.changed, 'days': self.days,
+                       'table': self.table}, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp, self.path)
+
+
+def load(db_path=DB_PATH, path=BASELINE_PATH):
+    """保存済みの表を読み、履歴DBがあれば差分を取り込んで保存する（DBを読めなくても保存済みの表は返す）"""
+    baseline = SeasonalBaseline(path)
+    if os.path.exists(db_path):
+        try:
+            with CatchStore(db_path) as store:
+                if baseline.update(store):
+                    baseline.save()
+        except Exception as e:
+            print(f"  ⚠️ 季節の基準表の更新失敗: {e}")
+    return baseline
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="釣り場 × 魚種 × ISO週 の例年の傾向")
+    ap.add_argument('--week', type=int, default=date.today().isocalendar()[1], help='表示するISO週（既定: 今週）')
+    ap.add_argument('--db', default=DB_PATH, help=f'履歴DB（既定: {DB_PATH}）')
+    ap.add_argument('--rebuild', action='store_true', help='保存済みの表を捨てて全件から作り直す')
+    args = ap.parse_args()
+    if args.rebuild and os.path.exists(BASELINE_PATH):
+        os.remove(BASELINE_PATH)
+    base = load(args.db)
+    print(f"📅 第{args.week}週（前後{WINDOW_WEEKS}週を含む）: 取り込み済み {base.watermark or '-'} まで")
+    for spot in sorted(base.table):
+        for e in base.lookup(spot, args.week):
+            size = f"{e.size_lo:g}-{e.size_hi:g}{e.size_unit}" if e.size_lo is not None else '-'
+            count = f"{e.count:g}" if e.count is not None else '-'
+            print(f"  {spot:<14}{species_name(e.species) or e.species:<8}{e.probability:>5.0%}"
+                  f"（{e.days}/{e.observed}日） {size:<12}{count:>5}匹 {e.method}")
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ソースの健全性とサーキットブレーカー
+取得先（店舗ページ・Google 検索・アングラーズ直接など）ごとに 連続失敗数・空振り連続数・最終成功 を保存し、
+続けて失敗・空振りした取得先は一定時間スキップする（closed → open → half_open → closed）
+open の間はリクエストを送らず、待ち時間が過ぎたら1回だけリトライなし・短いタイムアウトで試し（half_open）、
+成功すれば closed に戻し、失敗すれば待ち時間を倍にして open に戻す
+
+使い方:
+  python source_health.py            # 取得先ごとの状態を表示
+  python source_health.py --reset    # 全取得先を closed に戻す
+"""
+
+import argparse
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+
+from fetcher import CACHE_DIR
+
+HEALTH_PATH = os.path.join(CACHE_DIR, 'source-health.json')
+
+# 連続でこの回数失敗（例外・HTTPエラー・ブロック）したら遮断
+FAILURE_THRESHOLD = 3
+# 連続でこの回数、取得できても釣果が0件なら遮断
+EMPTY_THRESHOLD = 6
+# 遮断時間（half_open の試行が失敗するたびに倍、上限あり）
+BASE_COOLDOWN = timedelta(hours=12)
+MAX_COOLDOWN = timedelta(days=7)
+# half_open の試行はリトライせず短いタイムアウトで行う
+PROBE_OPTIONS = {'retries': 0, 'timeout': 5}
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+# Google のブロックページ（200 で返ることもある）
+BLOCK_MARKERS = ('unusual traffic', '/sorry/index', 'g-recaptcha', 'detected unusual')
+
+
+class SourceUnavailable(Exception):
+    """取得先がエラー・ブロックを返した"""
+
+
+def check_response(resp, min_length=0):
+    """HTTPエラー・Google のブロックページなら SourceUnavailable"""
+    if resp.status_code != 200:
+        raise SourceUnavailable(f"HTTP {resp.status_code}")
+    text = resp.text
+    if len(text) < min_length or any(m in text[:20000] for m in BLOCK_MARKERS):
+        raise SourceUnavailable("ブロックまたは空のページ")
+    return resp
+
+
+def _now():
+    return datetime.now()
+
+
+def _new_entry():
+    return {'state': CLOSED, 'failures': 0, 'empty': 0, 'last_success': None, 'last_attempt': None,
+            'last_error': '', 'opened_at': None, 'cooldown_hours': BASE_COOLDOWN.total_seconds() / 3600}
+
+
+class SourceHealth:
+    """取得先ごとの状態（スレッドセーフ、enabled=False なら常に許可して保存もしない）"""
+
+    def __init__(self, path=HEALTH_PATH, enabled=True):
+        self.path = path
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.skipped = []
+        if enabled:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self._entries = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                pass
+
+    def _entry(self, key):
+        return self._entries.setdefault(key, _new_entry())
+
+    def allow(self, key, now=None):
+        """今回 key にリクエストしてよいか（open で待ち時間が過ぎていれば half_open にして1回許可）"""
+        if not self.enabled:
+            return True
+        now = now or _now()
+        with self._lock:
+            e = self._entry(key)
+            if e['state'] == CLOSED:
+                return True
+            if e['state'] == OPEN:
+                opened = datetime.fromisoformat(e['opened_at'])
+                if now - opened < timedelta(hours=e['cooldown_hours']):
+                    self.skipped.append(key)
+                    return False
+                e['state'] = HALF_OPEN
+            return True
+
+    def fetch_options(self, key):
+        """fetch に渡す追加引数（half_open の試行はリトライなし・短いタイムアウト）"""
+        if not self.enabled:
+            return {}
+        with self._lock:
+            return dict(PROBE_OPTIONS) if self._entry(key)['state'] == HALF_OPEN else {}
+
+    def record_success(self, key, items, now=None):
+        """取得・解析できた（items = 釣果数。0件が続くと空振りとして遮断）"""
+        if not self.enabled:
+            return
+        now = now or _now()
+        with self._lock:
+            e = self._entry(key)
+            e['last_attempt'] = now.isoformat(timespec='seconds')
+            e['failures'] = 0
+            if items:
+                e.update(state=CLOSED, empty=0, last_success=e['last_attempt'], last_error='',
+                         opened_at=None, cooldown_hours=BASE_COOLDOWN.total_seconds() / 3600)
+                return
+            e['empty'] += 1
+            if e['state'] == HALF_OPEN or e['empty'] >= EMPTY_THRESHOLD:
+                self._open(e, now, '釣果0件が続いています')
+
+    def record_failure(self, key, error, now=None):
+        """例外・HTTPエラー・ブロック"""
+        if not self.enabled:
+            return
+        now = now or _now()
+        with self._lock:
+            e = self._entry(key)
+            e['last_attempt'] = now.isoformat(timespec='seconds')
+            e['failures'] += 1
+            if e['state'] == HALF_OPEN or e['failures'] >= FAILURE_THRESHOLD:
+                self._open(e, now, f"{type(error).__name__}: {error}")
+            else:
+                e['last_error'] = f"{type(error).__name__}: {error}"
+
+    def _open(self, e, now, reason):
+        if e['state'] in (OPEN, HALF_OPEN) and e['opened_at']:
+            e['cooldown_hours'] = min(e['cooldown_hours'] * 2, MAX_COOLDOWN.total_seconds() / 3600)
+        e.update(state=OPEN, opened_at=now.isoformat(timespec='seconds'), last_error=reason[:200])
+
+    def state(self, key):
+        with self._lock:
+            return dict(self._entries.get(key) or _new_entry())
+
+    def describe(self, key):
+        e = self.state(key)
+        if e['state'] != OPEN:
+            return e['state']
+        until = datetime.fromisoformat(e['opened_at']) + timedelta(hours=e['cooldown_hours'])
+        return f"{until.strftime('%m/%d %H:%M')} まで遮断・{e['last_error']}"
+
+    def reset(self):
+        with self._lock:
+            self._entries = {}
+
+    def save(self):
+        if not self.enabled:
+            return
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp = self.path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, self.path)
+
+    def items(self):
+        with self._lock:
+            return sorted((k, dict(e)) for k, e in self._entries.items())
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="取得先の健全性")
+    ap.add_argument('--reset', action='store_true', help='全取得先を closed に戻す')
+    args = ap.parse_args()
+    health = SourceHealth()
+    if args.reset:
+        health.reset()
+        health.save()
+        print("✅ 全取得先の状態をリセットしました")
+    icons = {CLOSED: '🟢', HALF_OPEN: '🟡', OPEN: '🔴'}
+    for key, e in health.items():
+        print(f"{icons[e['state']]} {key:<28} 失敗{e['failures']:>2}回  空振り{e['empty']:>2}回  "
+              f"最終成功 {e['last_success'] or '-'}  {health.describe(key) if e['state'] == OPEN else ''}")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+魚種の正規化辞書
+地方名・成長段階の呼び名（ガシラ/カサゴ、ハネ/シーバス/スズキ、ツバス/ハマチ/ブリ、チヌ/クロダイ など）を1つの魚種IDにまとめる
+"""
+
+from functools import lru_cache
+
+from matcher import Matcher
+
+# 魚種ID: (表示名, 別名リスト, 絵文字)
+SPECIES = {
+    'aji': ('アジ', ['アジ', '豆アジ', '小アジ'], '🐠'),
+    'saba': ('サバ', ['サバ'], '🐟'),
+    'mebaru': ('メバル', ['メバル'], '🐟'),
+    'tachiuo': ('タチウオ', ['タチウオ', '太刀魚'], '🗡️'),
+    'tako': ('タコ', ['タコ', 'マダコ'], '🐙'),
+    'aoriika': ('アオリイカ', ['アオリイカ'], '🦑'),
+    'ika': ('イカ', ['イカ', 'ケンサキイカ', 'コウイカ', 'ヤリイカ'], '🦑'),
+    'kurodai': ('チヌ', ['チヌ', 'クロダイ', '黒鯛'], '🐟'),
+    'kisu': ('キス', ['キス', 'シロギス'], '🐠'),
+    'karei': ('カレイ', ['カレイ'], '🐟'),
+    'haze': ('ハゼ', ['ハゼ'], '🐠'),
+    'kasago': ('ガシラ', ['ガシラ', 'カサゴ'], '🐟'),
+    'suzuki': ('ハネ(シーバス)', ['ハネ', 'シーバス', 'スズキ', 'セイゴ'], '🐟'),
+    'buri': ('ハマチ', ['ハマチ', 'ツバス', 'ブリ', 'メジロ'], '🐟'),
+    'sawara': ('サワラ', ['サワラ', 'サゴシ'], '🐟'),
+    'madai': ('マダイ', ['マダイ', '真鯛'], '🎣'),
+    'iwashi': ('イワシ', ['イワシ'], '🐠'),
+    'gure': ('グレ', ['グレ', 'メジナ'], '🐟'),
+    'sayori': ('サヨリ', ['サヨリ'], '🐠'),
+    'umitanago': ('ウミタナゴ', ['ウミタナゴ'], '🐟'),
+    'kobudai': ('コブダイ', ['コブダイ'], '🐟'),
+    'fugu': ('フグ', ['フグ'], '🐡'),
+    'umazurahagi': ('ウマヅラハギ', ['ウマヅラハギ'], '🐟'),
+    'kawahagi': ('カワハギ', ['カワハギ'], '🐟'),
+    'ainame': ('アイナメ', ['アイナメ'], '🐟'),
+    'hirame': ('ヒラメ', ['ヒラメ'], '🐟'),
+    'bera': ('ベラ', ['ベラ'], '🐠'),
+    'unagi': ('ウナギ', ['ウナギ'], '🐍'),
+    'anago': ('アナゴ', ['アナゴ'], '🐍'),
+    'sanbasou': ('サンバソウ', ['サンバソウ', 'イシダイ'], '🐟'),
+}
+
+
+def aliases():
+    """(別名, 魚種ID) を全て返す"""
+    return [(alias, sid) for sid, (_, names, _) in SPECIES.items() for alias in names]
+
+
+# 魚種の別名を含むが魚種ではない語（照合器では長い方が優先されるので、ベランダ の ベラ は魚種にならない）
+NOT_SPECIES = ('ベランダ',)
+
+# 別名 → 魚種ID（長い別名が優先されるので アオリイカ は イカ にならない）
+_MATCHER = Matcher(aliases() + [(word, '') for word in NOT_SPECIES])
+
+
+@lru_cache(maxsize=4096)
+def species_id(name):
+    """魚名から魚種IDを返す（該当なしは空文字）"""
+    return next((sid for _, _, sid in _MATCHER.find(name or '') if sid), '')
+
+
+def species_name(sid):
+    """魚種IDの表示名"""
+    return SPECIES[sid][0] if sid in SPECIES else ''
+
+
+def species_emoji(sid):
+    """魚種IDの絵文字（該当なしは 🐟）"""
+    return SPECIES[sid][2] if sid in SPECIES else '🐟'
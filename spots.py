@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+釣り場カタログ（位置・エリア・別名）と空間索引
+半径検索・近い順k件の検索は、釣り場が SCAN_MAX 件以下（今のカタログの十数件を含む）なら全件の距離を numpy で一度に測り、
+それより多ければ緯度経度の格子（約5km四方）で周りのマスの釣り場だけを距離計算する
+カンパリ・アングラーズのエリア名（神戸東部・垂水 など）は AREAS の中心と半径で表し、エリア内の釣り場のどれかとして扱う
+（狭いエリアは中心に一番近い釣り場、広いエリアは本文に手がかりの言葉がある釣り場、なければ中心に一番近い釣り場）
+
+使い方:
+  python spots.py                                   # カタログと三宮からの距離を表示
+  python spots.py --near 34.69,135.19 --radius 20   # 半径20km以内の釣り場（直近7日の釣果数つき）
+  python spots.py --near 34.69,135.19 --k 3 --fish アジ --days 14
+"""
+
+import argparse
+import json
+import math
+import os
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+import numpy as np
+
+from species import species_id, species_name
+
+EARTH_KM = 6371.0
+# 距離の基準点（三宮）
+ORIGIN = (34.6946, 135.1956)
+# 格子の1マスの大きさ（度）。緯度方向 約5.6km
+CELL_DEG = 0.05
+# 半径がこれより大きい広いエリア（神戸東部 など）は、本文の手がかり（Spot.hints）でエリア内の釣り場を選ぶ
+SNAP_KM = 3.0
+# 釣り場がこれ以下なら格子を引かずに全釣り場の距離を測る（bench_spots では千件ほどまでは numpy 1回のほうが速い）
+SCAN_MAX = 1000
+
+
+class Spot(NamedTuple):
+    name: str
+    area: str
+    lat: float
+    lon: float
+    aliases: tuple
+    info: str
+    # 広いエリア名の釣果のときだけ見る本文の手がかり（単独では釣り場名と言い切れない言葉）
+    hints: tuple = ()
+
+
+# 釣り場（位置はおおよその釣り座の中心、別名は lexicon で本文から釣り場を見つけるのに使う）
+CATALOG = (
+    Spot("須磨海釣り公園", "神戸", 34.6362, 135.1077, ("須磨海釣り", "須磨"), "ファミリー向け・設備充実", ("須磨浦", "塩屋")),
+    Spot("平磯海づり公園", "神戸", 34.6297, 135.0626, ("平磯海づり", "平磯"), "垂水区・足場良好・投げ釣り人気", ("垂水",)),
+    Spot("南芦屋浜", "尼崎", 34.7096, 135.3158, ("南芦屋浜", "南芦屋"), "関西最大級・ハネダービー開催中"),
+    Spot("神戸空港ベランダ", "神戸", 34.6390, 135.2312, ("神戸空港",), "アジ好調・24時間", ("空港", "ベランダ")),
+    Spot("アジュール舞子", "神戸", 34.6302, 135.0336, ("アジュール舞子", "舞子"), "サビキ大人気・初心者OK", ("舞子浜", "大蔵海岸")),
+    Spot("六甲アイランド", "神戸", 34.6880, 135.2675, ("六甲アイランド", "六アイ"), "タチウオの聖地", ("六甲", "東灘")),
+    Spot("明石港", "明石", 34.6448, 134.9932, ("明石港", "明石"), "タコ・メバルの名所"),
+    Spot("芦屋浜", "尼崎", 34.7163, 135.3046, ("芦屋浜",), "投げ釣りの名所"),
+    Spot("ポートアイランド北公園", "神戸", 34.6879, 135.1979, ("ポートアイランド",), "メバル好ポイント", ("ポーアイ", "北公園")),
+    Spot("林崎漁港", "明石", 34.6413, 134.9603, ("林崎",), "穴場スポット"),
+    Spot("岩屋港(淡路島)", "淡路島", 34.5907, 135.0189, ("岩屋", "淡路島"), "多魚種・車必須"),
+    Spot("赤穂港", "赤穂", 34.7398, 134.3951, ("赤穂",), "穴場・のんびり"),
+    Spot("姫路港", "姫路", 34.7805, 134.6536, ("姫路",), "大型港・多魚種"),
+)
+
+# カンパリの area_detail・アングラーズのエリア名 → (緯度, 経度, 半径km)
+AREAS = {
+    "神戸東部": (34.7050, 135.2600, 8.0),
+    "神戸西部": (34.6400, 135.0900, 8.0),
+    "神戸": (34.6700, 135.1700, 15.0),
+    "明石": (34.6440, 134.9900, 6.0),
+    "芦屋": (34.7150, 135.3050, 3.0),
+    "須磨": (34.6400, 135.1150, 3.0),
+    "垂水": (34.6290, 135.0560, 3.0),
+    "平磯": (34.6297, 135.0626, 2.0),
+}
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """大円距離(km)（lat2, lon2 は配列でもよい）"""
+    p1, p2 = np.radians(lat1), np.radians(lat2)
+    a = np.sin((p2 - p1) / 2) ** 2 + np.cos(p1) * np.cos(p2) * np.sin(np.radians(lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_KM * np.arcsin(np.sqrt(a))
+
+
+class SpotIndex:
+    """釣り場の格子索引
+    マスの番号（行 × 列数 + 列）の順に釣り場を並べておき、検索範囲の各行で連続するマスの区間を二分探索で切り出す"""
+
+    def __init__(self, spots=CATALOG, cell_deg=CELL_DEG, scan_max=SCAN_MAX):
+        self.spots = tuple(spots)
+        self.cell = cell_deg
+        self.scan_max = scan_max
+        self.by_name = {s.name: s for s in self.spots}
+        self.lat = np.array([s.lat for s in self.spots], dtype=float)
+        self.lon = np.array([s.lon for s in self.spots], dtype=float)
+        self._phi = np.radians(self.lat)
+        self._lam = np.radians(self.lon)
+        self._cos = np.cos(self._phi)
+        rows = np.floor(self.lat / cell_deg).astype(int)
+        cols = np.floor(self.lon / cell_deg).astype(int)
+        self._row0 = int(rows.min()) if len(rows) else 0
+        self._col0 = int(cols.min()) if len(cols) else 0
+        self._width = int(cols.max()) - self._col0 + 1 if len(cols) else 1
+        self._height = int(rows.max()) - self._row0 + 1 if len(rows) else 1
+        # 釣り場のある範囲の面積(km²)
+        mid = float(self.lat.mean()) if len(self.lat) else 0.0
+        self._km2 = self._width * self._height * (cell_deg * 111.0) ** 2 * math.cos(math.radians(mid))
+        keys = (rows - self._row0) * self._width + (cols - self._col0)
+        self._order = np.argsort(keys, kind='stable')
+        self._keys = keys[self._order]
+
+    def _distance(self, lat, lon, idx):
+        """(lat, lon) から添字 idx の釣り場までの大円距離(km)（haversine と同じ式を前計算した値で）"""
+        phi, lam = math.radians(lat), math.radians(lon)
+        a = (np.sin((self._phi[idx] - phi) / 2) ** 2
+             + math.cos(phi) * self._cos[idx] * np.sin((self._lam[idx] - lam) / 2) ** 2)
+        return 2 * EARTH_KM * np.arcsin(np.sqrt(a))
+
+    def _candidates(self, lat, lon, radius_km):
+        """中心から radius_km の外接矩形にかかるマスの釣り場の添字"""
+        if len(self.spots) <= self.scan_max:
+            return self._order
+        dlat = radius_km / 111.0
+        dlon = radius_km / (111.0 * max(0.01, math.cos(math.radians(min(abs(lat) + dlat, 89)))))
+        y0 = max(math.floor((lat - dlat) / self.cell) - self._row0, 0)
+        y1 = min(math.floor((lat + dlat) / self.cell) - self._row0, self._height - 1)
+        x0 = max(math.floor((lon - dlon) / self.cell) - self._col0, 0)
+        x1 = min(math.floor((lon + dlon) / self.cell) - self._col0, self._width - 1)
+        if y0 > y1 or x0 > x1:
+            return self._order[:0]
+        rows = np.arange(y0, y1 + 1) * self._width
+        lo = np.searchsorted(self._keys, rows + x0)
+        hi = np.searchsorted(self._keys, rows + x1, side='right')
+        if len(rows) == 1:
+            return self._order[lo[0]:hi[0]]
+        n = hi - lo
+        total = int(n.sum())
+        # 各行の区間 [lo, hi) をつなげた位置
+        pos = np.repeat(lo - np.concatenate(([0], np.cumsum(n)[:-1])), n) + np.arange(total)
+        return self._order[pos]
+
+    def _sorted(self, idx, lat, lon, radius_km, k=None):
+        """idx のうち radius_km 以内を近い順に（k を指定すれば先頭 k 件だけ Spot にする）"""
+        dist = self._distance(lat, lon, idx)
+        keep = dist <= radius_km
+        idx, dist = idx[keep], dist[keep]
+        if k is not None and k < len(dist):
+            # 先頭 k 件だけを選んでから並べる
+            top = np.argpartition(dist, k - 1)[:k]
+            order = top[np.argsort(dist[top], kind='stable')]
+        else:
+            order = np.argsort(dist, kind='stable')
+        return [(self.spots[i], float(d)) for i, d in zip(idx[order], dist[order])]
+
+    def within(self, lat, lon, radius_km):
+        """半径 radius_km 以内の釣り場を近い順に [(Spot, 距離km)]"""
+        return self._sorted(self._candidates(lat, lon, radius_km), lat, lon, radius_km)
+
+    def nearest(self, lat, lon, k=1):
+        """近い順に k 件 [(Spot, 距離km)]（k 件見つかるまで半径を倍にして半径検索する）"""
+        k = min(k, len(self.spots))
+        if k <= 0:
+            return []
+        if len(self.spots) <= self.scan_max:
+            return self._sorted(self._order, lat, lon, math.inf, k)
+        # 釣り場が範囲内に均等にあるとして k 件入りそうな半径から始める
+        radius = max(self.cell * 111.0 / 2, math.sqrt(k * self._km2 / (math.pi * len(self.spots))))
+        while True:
+            hits = self._sorted(self._candidates(lat, lon, radius), lat, lon, radius, k)
+            if len(hits) >= k:
+                return hits
+            if radius > 2 * EARTH_KM:
+                return self._sorted(self._order, lat, lon, math.inf, k)
+            radius *= 2
+
+    def distance(self, name, origin=ORIGIN):
+        """釣り場の origin からの距離(km、小数1桁)（カタログにない釣り場は None）"""
+        s = self.by_name.get(name)
+        return round(float(haversine(origin[0], origin[1], s.lat, s.lon)), 1) if s else None
+
+    def area_spot(self, area, text=''):
+        """エリア名の釣果を寄せる釣り場名（エリア名でない・半径内に釣り場がないなら ''）
+        狭いエリアは中心に一番近い釣り場、広いエリアは text に手がかり（hints）のある釣り場、なければ中心に一番近い釣り場"""
+        if area not in AREAS:
+            return ''
+        lat, lon, radius = AREAS[area]
+        hits = self.within(lat, lon, radius)
+        if not hits:
+            return ''
+        if radius > SNAP_KM and text:
+            hinted = next((s for s, _ in hits if any(h in text for h in s.hints)), None)
+            if hinted:
+                return hinted.name
+        return hits[0][0].name
+
+    def area_spots(self, area):
+        """エリアの半径内の釣り場名（近い順）"""
+        if area not in AREAS:
+            return []
+        lat, lon, radius = AREAS[area]
+        return [s.name for s, _ in self.within(lat, lon, radius)]
+
+
+INDEX = SpotIndex()
+
+
+def recent_activity(store, days=7, today=None):
+    """履歴DBの直近 days 日の釣果を 釣り場 → Counter(魚種ID → 件数) に（他ソースの重複は除く）"""
+    # dedup は lexicon 経由でこのモジュールを読むので、ここで import する
+    import dedup
+    since = ((today or datetime.now()) - timedelta(days=days)).date()
+    activity = {}
+    for spot, sid, fish, extra in store.history(since, ('spot', 'species', 'fish', 'extra')):
+        x = json.loads(extra or '{}')
+        name = dedup.canonical_spot(x.get('location'), x.get('description'), spot)
+        if name:
+            activity.setdefault(name, Counter())[sid or species_id(fish)] += 1
+    return activity
+
+
+def nearby(lat, lon, radius_km=None, k=None, activity=None, species=None, index=INDEX):
+    """半径 radius_km 以内（k を指定すれば近い順 k 件）の釣り場を [(Spot, 距離km, 釣果数)] で返す
+    species（魚種ID）を指定すると、activity でその魚種の釣果がある釣り場だけに絞る"""
+    if radius_km is not None:
+        hits = index.within(lat, lon, radius_km)
+    else:
+        hits = index.nearest(lat, lon, k if k and not species else len(index.spots))
+    out = []
+    for spot, dist in hits:
+        counts = (activity or {}).get(spot.name, Counter())
+        n = counts.get(species, 0) if species else sum(counts.values())
+        if species and not n:
+            continue
+        out.append((spot, dist, n))
+        if k and len(out) >= k:
+            break
+    return out
+
+
+if __name__ == "__main__":
+    from catch_store import DB_PATH, CatchStore
+
+    ap = argparse.ArgumentParser(description="釣り場カタログの検索")
+    ap.add_argument('--near', help='検索の中心 "緯度,経度"（既定: 三宮）')
+    ap.add_argument('--radius', type=float, help='半径km')
+    ap.add_argument('--k', type=int, help='近い順の件数')
+    ap.add_argument('--fish', help='直近に釣果のある魚種だけ（例: アジ）')
+    ap.add_argument('--days', type=int, default=7, help='釣果を数える日数（既定: 7）')
+    ap.add_argument('--db', default=DB_PATH, help=f'履歴DB（既定: {DB_PATH}）')
+    args = ap.parse_args()
+
+    lat, lon = (float(v) for v in args.near.split(',')) if args.near else ORIGIN
+    activity = {}
+    if os.path.exists(args.db):
+        with CatchStore(args.db) as store:
+            activity = recent_activity(store, args.days)
+    sid = species_id(args.fish) if args.fish else None
+    if args.fish and not sid:
+        print(f"❌ 魚種が分かりません: {args.fish}")
+    else:
+        label = f"{species_name(sid)}の" if sid else ''
+        print(f"📍 ({lat}, {lon}) から{f' {args.radius:g}km以内' if args.radius else ''}"
+              f"{f' 近い順{args.k}件' if args.k else ''}（直近{args.days}日の{label}釣果数）")
+        for spot, dist, n in nearby(lat, lon, args.radius, args.k, activity, sid):
+            print(f"  {dist:6.1f}km {spot.name:<14}{spot.area:<5}{n:>4}件  {spot.info}")
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+パイプラインの段ごとのメモ化
+段（parse / normalize / aggregate / render）ごとに、入力（ページ本文・前段の出力・日付・コードのバージョン）の
+ハッシュをキーにして出力を .cache/stages/<段>/<キー>.pickle に保存し、同じ入力なら計算せずに返す
+書き出しを伴う段（fishing-data.json の保存・履歴DB・サイトの描画）は、前回のキーと同じなら丸ごと飛ばす
+
+使い方:
+  python stage_cache.py           # 段ごとの保存件数・前回のキーを表示
+  python stage_cache.py --clear   # 保存済みの出力を全て消す
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import threading
+import time
+
+from fetcher import CACHE_DIR
+
+STAGE_DIR = os.path.join(CACHE_DIR, 'stages')
+LAST_NAME = 'last.json'
+# これより長く使われていない出力は削除
+KEEP_DAYS = 14
+
+
+def digest(*parts):
+    """入力のハッシュ（bytes・文字列はそのまま、それ以外は JSON にして連結）"""
+    h = hashlib.blake2b(digest_size=16)
+    for p in parts:
+        if isinstance(p, str):
+            p = p.encode('utf-8')
+        elif not isinstance(p, bytes):
+            p = json.dumps(p, ensure_ascii=False, sort_keys=True, default=str).encode('utf-8')
+        h.update(len(p).to_bytes(8, 'big'))
+        h.update(p)
+    return h.hexdigest()
+
+
+def file_digest(path):
+    """ファイル内容のハッシュ（なければ ''）"""
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+    except FileNotFoundError:
+        return ''
+
+
+def code_version(*modules):
+    """モジュールのソースのハッシュ（パーサーや描画のコードが変わったら別のキーになる）"""
+    return digest(*(file_digest(m.__file__) for m in modules))
+
+
+class StageCache:
+    """段ごとの出力の保存先（enabled=False なら何も読み書きしない、force=True なら読まずに書くだけ）"""
+
+    def __init__(self, directory=STAGE_DIR, enabled=True, force=False):
+        self.directory = directory
+        self.enabled = enabled
+        self.force = force
+        self._lock = threading.Lock()
+        self.hits = {}
+        self.misses = {}
+        self._last = {}
+        if enabled:
+            try:
+                with open(os.path.join(directory, LAST_NAME), 'r', encoding='utf-8') as f:
+                    self._last = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                pass
+
+    def _path(self, stage, key):
+        return os.path.join(self.directory, stage, f'{key}.pickle')
+
+    def _count(self, counter, stage):
+        with self._lock:
+            counter[stage] = counter.get(stage, 0) + 1
+
+    def get(self, stage, key):
+        """保存済みの出力（なければ None）"""
+        if not self.enabled or self.force:
+            self._count(self.misses, stage)
+            return None
+        path = self._path(stage, key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            self._count(self.misses, stage)
+            return None
+        os.utime(path)
+        self._count(self.hits, stage)
+        return value
+
+    def put(self, stage, key, value):
+        if not self.enabled:
+            return
+        path = self._path(stage, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    def memo(self, stage, key, compute):
+        """key の出力が保存済みならそれを、なければ compute() を実行して保存して返す"""
+        value = self.get(stage, key)
+        if value is not None:
+            return value
+        value = compute()
+        self.put(stage, key, value)
+        return value
+
+    def unchanged(self, stage, key):
+        """書き出しを伴う段の入力が前回の実行と同じか"""
+        if not self.enabled or self.force:
+            return False
+        with self._lock:
+            return self._last.get(stage) == key
+
+    def mark(self, stage, key):
+        """書き出しが済んだ入力のキーを記録する（save で保存）"""
+        with self._lock:
+            self._last[stage] = key
+
+    def summary(self):
+        stages = sorted(set(self.hits) | set(self.misses))
+        return ', '.join(f"{s} {self.hits.get(s, 0)}/{self.hits.get(s, 0) + self.misses.get(s, 0)}" for s in stages)
+
+    def save(self):
+        """前回のキーを保存し、長く使われていない出力を削除する"""
+        if not self.enabled:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock:
+            # 別プロセス（収集とサイト生成）の記録を消さないよう読み直してから書く
+            try:
+                with open(os.path.join(self.directory, LAST_NAME), 'r', encoding='utf-8') as f:
+                    last = {**json.load(f), **self._last}
+            except (FileNotFoundError, json.JSONDecodeError):
+                last = dict(self._last)
+            tmp = os.path.join(self.directory, LAST_NAME + '.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(last, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, os.path.join(self.directory, LAST_NAME))
+        self.prune()
+
+    def prune(self, keep_days=KEEP_DAYS):
+        cutoff = time.time() - keep_days * 86400
+        removed = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                if name.endswith('.pickle') and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+        return removed
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="パイプラインの段ごとのメモ化")
+    ap.add_argument('--clear', action='store_true', help='保存済みの出力と前回のキーを全て消す')
+    args = ap.parse_args()
+    if args.clear:
+        shutil.rmtree(STAGE_DIR, ignore_errors=True)
+        print(f"🧹 {STAGE_DIR} を削除しました")
+    cache = StageCache()
+    if not os.path.isdir(STAGE_DIR):
+        print("❌ 保存済みの出力はありません")
+    for stage in sorted(os.listdir(STAGE_DIR)) if os.path.isdir(STAGE_DIR) else []:
+        path = os.path.join(STAGE_DIR, stage)
+        if os.path.isdir(path):
+            files = [f for f in os.listdir(path) if f.endswith('.pickle')]
+            size = sum(os.path.getsize(os.path.join(path, f)) for f in files)
+            print(f"📦 {stage:<10} {len(files):>5}件 {size / 1024:8.0f} KiB")
+    for stage, key in sorted(cache._last.items()):
+        print(f"🔑 {stage:<10} 前回 {key}")